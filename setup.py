@@ -13,9 +13,14 @@ setup(
         "python-docx",
         "dataclasses-json",
         "pillow",
-        "easyocr",
+        "easyocr>=1.7.0,<1.8",
         "openai",
+        "numpy",
     ],
+    extras_require={
+        "codecs": ["zstandard", "msgpack"],
+        "pdf": ["pymupdf"],
+    },
     entry_points={
         'console_scripts': [
             'swisshacks-play=swisshacks.play_game:run_game',
@@ -0,0 +1,266 @@
+"""
+Parse every client document below a dataset root in parallel.
+
+Client folders are found by walking the root (train/{0,1}/0/<id>/ or any folder
+holding account.pdf, description.txt, profile.docx or passport.png). Every
+document is parsed as its own task on a process pool sized to the cores, and each
+client is written out as soon as all of its documents are done: as one line of a
+JSONL file, or as <client>.json below an output folder. Per document type the
+number of documents, errors and the parse time are printed at the end.
+
+With the easyocr_pool passport backend the passports are not parsed in the worker
+processes, which would each start a pool of their own, but from threads of the
+main process on the single shared OCR pool.
+
+Usage (from the swisshacks folder):
+    python batch_parse.py                                          # ../train into ../train_parsed.jsonl
+    python batch_parse.py --root ../train --format json --output ../train_parsed
+    python batch_parse.py --types account profile description --workers 8
+"""
+import os
+import json
+import time
+import queue
+import logging
+import argparse
+import traceback
+import concurrent.futures
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(__file__), "..", "train")
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "..", "train_parsed.jsonl")
+# Document type -> file name in the client folder
+DOCUMENTS = {
+    "account": "account.pdf",
+    "description": "description.txt",
+    "profile": "profile.docx",
+    "passport": "passport.png",
+}
+
+# Passport parsers load OCR models, so each worker process builds one per backend and keeps it
+_passport_parsers = {}
+# Passport backend parsed on the shared OCR pool of the main process, never in workers
+POOL_BACKEND = "easyocr_pool"
+_in_worker = False
+
+
+def _init_worker():
+    global _in_worker
+    _in_worker = True
+    # One process per core already uses every core, OCR must not start a thread pool per process
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    # The parsers log every document at INFO level
+    logging.basicConfig(level=logging.WARNING)
+
+
+def _get_passport_parser(passport_backend: str):
+    from data_parsing.client_passport_parser import ClientPassportParser, PassportBackendType
+
+    if passport_backend not in _passport_parsers:
+        if _in_worker and passport_backend == POOL_BACKEND:
+            # Every worker would start its own pool of OCR processes, one per core each
+            raise ValueError(f"The {POOL_BACKEND} passport backend cannot run in batch_parse workers")
+        _passport_parsers[passport_backend] = ClientPassportParser(PassportBackendType(passport_backend))
+    return _passport_parsers[passport_backend]
+
+
+def parse_document(document_type: str, path: str, passport_backend: str = "easyocr"):
+    """Parse one document with the parser of its type and return the parsed dataclass."""
+    if document_type == "account":
+        from data_parsing.client_account_parser import ClientAccountParser
+        return ClientAccountParser.parse(path)
+    if document_type == "description":
+        from data_parsing.client_description_parser import ClientDescriptionParser
+        return ClientDescriptionParser.parse(path)
+    if document_type == "profile":
+        from data_parsing.client_profile_parser import ClientProfileParser
+        return ClientProfileParser.parse(path)
+    if document_type == "passport":
+        return _get_passport_parser(passport_backend).parse(path)
+    raise ValueError(f"Unknown document type {document_type!r}, available: {', '.join(DOCUMENTS)}")
+
+
+def _parse_task(task: Tuple[str, str, str, str]) -> Tuple[str, str, Optional[dict], Optional[str], float]:
+    """Worker side of a task: (client, type, parsed dict or None, error or None, seconds)."""
+    client, document_type, path, passport_backend = task
+    start = time.perf_counter()
+    try:
+        parsed = parse_document(document_type, path, passport_backend)
+        result, error = parsed.to_dict(encode_json=True), None
+    except Exception as e:
+        logging.getLogger(__name__).debug(traceback.format_exc())
+        result, error = None, f"{type(e).__name__}: {e}"
+    return client, document_type, result, error, time.perf_counter() - start
+
+
+def find_clients(root: str, document_types: List[str]) -> Dict[str, Dict[str, str]]:
+    """Return {client folder relative to root: {document type: path}} for every folder with documents."""
+    clients = {}
+    for folder, _, files in os.walk(root):
+        files = set(files)
+        documents = {document_type: os.path.join(folder, DOCUMENTS[document_type])
+                     for document_type in DOCUMENTS
+                     if document_type in document_types and DOCUMENTS[document_type] in files}
+        if documents:
+            client = os.path.relpath(folder, root).replace(os.sep, "/")
+            clients[client] = documents
+    return dict(sorted(clients.items()))
+
+
+class _Writer:
+    """Writes finished clients as JSONL lines or one JSON file per client."""
+
+    def __init__(self, output: str, output_format: str):
+        self.output = output
+        self.output_format = output_format
+        self._file = None
+        if output_format == "jsonl":
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            self._file = open(output, "w", encoding="utf-8")
+
+    def write(self, record: dict):
+        if self._file is not None:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+        path = os.path.join(self.output, f"{record['client']}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(record, file, indent=2, ensure_ascii=False)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _client_record(client: str, document_types: List[str]) -> dict:
+    record = {"client": client}
+    # train/<label>/<level>/<id>: keep the label next to the parsed documents
+    parts = client.split("/")
+    if len(parts) == 3 and parts[0] in ("0", "1"):
+        record["label"] = int(parts[0])
+    # Same key order for every client, whichever document finishes first
+    record.update((document_type, None) for document_type in document_types)
+    record["errors"] = {}
+    return record
+
+
+def _merge_pool_results(results, pool_threads: concurrent.futures.ThreadPoolExecutor, pool_tasks: list):
+    """Yield the worker results, interleaved with the passports parsed on the shared OCR pool as they finish."""
+    done = queue.Queue()
+    for task in pool_tasks:
+        pool_threads.submit(_parse_task, task).add_done_callback(done.put)
+    remaining = len(pool_tasks)
+    for result in results:
+        yield result
+        while remaining:
+            try:
+                future = done.get_nowait()
+            except queue.Empty:
+                break
+            remaining -= 1
+            yield future.result()
+    for _ in range(remaining):
+        yield done.get().result()
+
+
+def batch_parse(root: str = DEFAULT_ROOT, output: str = DEFAULT_OUTPUT, output_format: str = "jsonl",
+                document_types: Optional[List[str]] = None, workers: Optional[int] = None,
+                passport_backend: str = "easyocr", limit: Optional[int] = None) -> dict:
+    """
+    Parse the documents of every client below root on a process pool.
+
+    Args:
+        root: Dataset root to walk for client folders
+        output: JSONL file, or folder for the per-client JSON files
+        output_format: "jsonl" or "json"
+        document_types: Document types to parse (default: all of DOCUMENTS)
+        workers: Number of worker processes (default: number of cores)
+        passport_backend: PassportBackendType value used for passport.png
+        limit: Only parse the first limit clients
+    Returns:
+        Statistics per document type: {"documents", "errors", "seconds"}
+    """
+    document_types = document_types or list(DOCUMENTS)
+    if output_format not in ("jsonl", "json"):
+        raise ValueError(f"Unknown output format {output_format!r}, use 'jsonl' or 'json'")
+    clients = find_clients(root, document_types)
+    if limit is not None:
+        clients = dict(list(clients.items())[:limit])
+    tasks = [(client, document_type, path, passport_backend)
+             for client, documents in clients.items() for document_type, path in documents.items()]
+    document_count = len(tasks)
+    workers = workers or os.cpu_count() or 1
+    print(f"Parsing {document_count} documents of {len(clients)} clients with {workers} workers")
+    pool_tasks = []
+    if passport_backend == POOL_BACKEND:
+        pool_tasks = [task for task in tasks if task[1] == "passport"]
+        tasks = [task for task in tasks if task[1] != "passport"]
+
+    stats = {document_type: {"documents": 0, "errors": 0, "seconds": 0.0} for document_type in document_types}
+    remaining = {client: len(documents) for client, documents in clients.items()}
+    records = {}
+    writer = _Writer(output, output_format)
+    start = time.perf_counter()
+    pool_threads = None
+    try:
+        if pool_tasks:
+            from data_parsing.ocr_pool import get_ocr_pool
+
+            # One thread per OCR process keeps the shared pool busy
+            pool_threads = concurrent.futures.ThreadPoolExecutor(max_workers=get_ocr_pool().workers)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            # Small chunks keep the slow passports from piling up in one worker
+            results = executor.map(_parse_task, tasks, chunksize=max(1, min(16, len(tasks) // (workers * 8))))
+            if pool_tasks:
+                results = _merge_pool_results(results, pool_threads, pool_tasks)
+            for client, document_type, result, error, seconds in results:
+                stat = stats[document_type]
+                stat["documents"] += 1
+                stat["seconds"] += seconds
+                if client not in records:
+                    records[client] = _client_record(client, list(clients[client]))
+                record = records[client]
+                if error is not None:
+                    stat["errors"] += 1
+                    record["errors"][document_type] = error
+                record[document_type] = result
+                remaining[client] -= 1
+                if remaining[client] == 0:
+                    writer.write(records.pop(client))
+    finally:
+        if pool_threads is not None:
+            pool_threads.shutdown(wait=False, cancel_futures=True)
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"{'type':<12} {'docs':>7} {'errors':>7} {'ms/doc':>9} {'docs/s/worker':>14}")
+    for document_type, stat in stats.items():
+        per_document = stat["seconds"] / stat["documents"] if stat["documents"] else 0.0
+        rate = 1 / per_document if per_document else 0.0
+        print(f"{document_type:<12} {stat['documents']:>7} {stat['errors']:>7} "
+              f"{1000 * per_document:>9.1f} {rate:>14.1f}")
+    print(f"{document_count} documents in {elapsed:.1f}s ({document_count / max(elapsed, 1e-9):.1f} docs/s), "
+          f"written to {output}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse all client documents below a dataset root")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Dataset root with client folders")
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT,
+                        help="JSONL file, or output folder with --format json")
+    parser.add_argument("--format", choices=("jsonl", "json"), default="jsonl",
+                        help="One JSONL file, or one JSON file per client")
+    parser.add_argument("--types", nargs="+", choices=list(DOCUMENTS), default=list(DOCUMENTS),
+                        help="Document types to parse")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: cores)")
+    parser.add_argument("--passport-backend", default="easyocr", help="Passport parser backend")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of clients")
+    args = parser.parse_args()
+
+    batch_parse(args.root, args.output, args.format, args.types, args.workers,
+                args.passport_backend, args.limit)
+
+
+if __name__ == "__main__":
+    main()
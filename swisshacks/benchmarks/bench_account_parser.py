@@ -0,0 +1,77 @@
+"""
+Benchmark ClientAccountParser on the account PDFs of the train set.
+
+Reports documents per second for parsing the PDF structure only, reading the
+AcroForm fields, extracting the text of every page and the full ClientAccount
+parse, plus the share of pages whose text the parse actually had to extract.
+
+Usage (from the swisshacks folder):
+    python -m benchmarks.bench_account_parser                    # account.pdf files below train/
+    python -m benchmarks.bench_account_parser --folder ../data --repeat 5
+"""
+import os
+import time
+import argparse
+
+from data_parsing.client_account_parser import ClientAccountParser
+from data_parsing.pdf_document import PdfDocument
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(__file__), "..", "..", "train")
+
+
+def load_documents(folder: str, limit: int = None) -> list:
+    """Load the bytes of every account.pdf below folder."""
+    documents = []
+    for root, _, files in sorted(os.walk(folder)):
+        for filename in files:
+            if filename == "account.pdf":
+                with open(os.path.join(root, filename), "rb") as handle:
+                    documents.append(handle.read())
+                if limit is not None and len(documents) >= limit:
+                    return documents
+    return documents
+
+
+def measure(func, documents: list, repeat: int) -> float:
+    """Return the documents per second of func over all documents, best of repeat passes."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in documents:
+            func(data)
+        best = min(best, time.perf_counter() - start)
+    return len(documents) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the client account PDF parser")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER, help="Folder with account.pdf files")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of documents")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed passes per step")
+    args = parser.parse_args()
+
+    documents = load_documents(args.folder, args.limit)
+    if not documents:
+        raise SystemExit(f"No account.pdf found below {args.folder}")
+    print(f"{len(documents)} documents, {sum(map(len, documents)) / 1e6:.2f} MB")
+
+    steps = {
+        "open": lambda data: PdfDocument.open(data),
+        "form fields": lambda data: PdfDocument.open(data).fields,
+        "all page text": lambda data: PdfDocument.open(data).text,
+        "parse": ClientAccountParser.extract_client_data_from_pdf,
+    }
+    for name, func in steps.items():
+        print(f"{name:<14} {measure(func, documents, args.repeat):>10.1f} docs/s")
+
+    pages = extracted = 0
+    for data in documents:
+        pdf = PdfDocument.open(data)
+        ClientAccountParser.extract_client_data_from_pdf(pdf)
+        pages += pdf.page_count
+        extracted += pdf.extracted_page_count
+    print(f"Text extracted for {extracted} of {pages} pages ({100 * extracted / max(pages, 1):.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
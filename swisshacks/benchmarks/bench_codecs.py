@@ -0,0 +1,100 @@
+"""
+Compare the store_dict codecs on the documents of the train set.
+
+Reports the total encoded size, the compression ratio against plain JSON and the
+encode/decode throughput (MB of JSON per second) of every codec. The zstd
+dictionary is trained on half of the documents and measured on the other half.
+
+Usage (from the swisshacks folder):
+    python -m benchmarks.bench_codecs                   # *.json files below train/
+    python -m benchmarks.bench_codecs --prefix train/   # *.json objects in storage
+"""
+import os
+import json
+import time
+import random
+import argparse
+
+import storage
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(__file__), "..", "..", "train")
+
+
+def load_local_documents(folder: str) -> list:
+    """Load every JSON document below folder."""
+    documents = []
+    for root, _, files in os.walk(folder):
+        for filename in files:
+            if filename.endswith(".json"):
+                with open(os.path.join(root, filename), "rb") as handle:
+                    documents.append(storage.decode_dict(handle.read()))
+    return documents
+
+
+def load_storage_documents(prefix: str) -> list:
+    """Load every JSON object below prefix from storage."""
+    keys = [key for key in storage.list_objects(prefix) if key.endswith(".json")]
+    return [storage.decode_dict(data) for data in storage.read_many(keys).values() if data]
+
+
+def measure(codec_name: str, documents: list, repeat: int) -> dict:
+    """Encode and decode all documents with a codec and return size and timings."""
+    encoded = [storage.encode_dict(document, codec_name) for document in documents]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for document in documents:
+            storage.encode_dict(document, codec_name)
+    encode_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in encoded:
+            storage.decode_dict(data)
+    decode_seconds = (time.perf_counter() - start) / repeat
+
+    assert [storage.decode_dict(data) for data in encoded] == documents
+    return {
+        "size": sum(len(data) for data in encoded),
+        "encode_seconds": encode_seconds,
+        "decode_seconds": decode_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark store_dict codecs on the train set")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER, help="Folder with JSON documents")
+    parser.add_argument("--prefix", default=None, help="Read JSON objects from storage under this prefix instead")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed passes per codec")
+    parser.add_argument("--dict-size", type=int, default=16 * 1024, help="Size of the trained zstd dictionary")
+    args = parser.parse_args()
+
+    documents = load_storage_documents(args.prefix) if args.prefix else load_local_documents(args.folder)
+    if len(documents) < 2:
+        raise SystemExit("Need at least two JSON documents to benchmark")
+
+    random.Random(42).shuffle(documents)
+    training, documents = documents[:len(documents) // 2], documents[len(documents) // 2:]
+    try:
+        storage.train_zstd_dictionary(training, dict_size=args.dict_size)
+    except ImportError as e:
+        print(f"Not training a zstd dictionary: {e}")
+
+    raw_size = sum(len(json.dumps(document).encode("utf-8")) for document in documents)
+    print(f"{len(documents)} documents, {raw_size / 1e6:.2f} MB of JSON")
+    print(f"{'codec':<16} {'bytes':>12} {'ratio':>7} {'encode MB/s':>12} {'decode MB/s':>12}")
+    for codec_name in storage.available_codecs():
+        try:
+            result = measure(codec_name, documents, args.repeat)
+        except (ImportError, ValueError) as e:
+            print(f"{codec_name:<16} skipped: {e}")
+            continue
+        print(
+            f"{codec_name:<16} {result['size']:>12} {raw_size / result['size']:>7.2f} "
+            f"{raw_size / 1e6 / result['encode_seconds']:>12.1f} "
+            f"{raw_size / 1e6 / result['decode_seconds']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark ClientDescriptionParser on the description files of the train set.
+
+Reports files and megabytes per second of parse_many() over the file paths
+(including reading the files) and over the texts already in memory.
+
+Usage (from the swisshacks folder):
+    python -m benchmarks.bench_description_parser                # description.txt files below train/
+    python -m benchmarks.bench_description_parser --folder ../data --repeat 5
+"""
+import os
+import time
+import argparse
+
+from data_parsing.client_description_parser import ClientDescriptionParser
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(__file__), "..", "..", "train")
+
+
+def find_files(folder: str, limit: int = None) -> list:
+    """Return the paths of every description.txt below folder."""
+    paths = []
+    for root, _, files in sorted(os.walk(folder)):
+        for filename in files:
+            if filename == "description.txt":
+                paths.append(os.path.join(root, filename))
+                if limit is not None and len(paths) >= limit:
+                    return paths
+    return paths
+
+
+def measure(func, repeat: int) -> float:
+    """Return the best wall time of repeat calls of func."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the client description parser")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER, help="Folder with description.txt files")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of files")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed passes per step")
+    args = parser.parse_args()
+
+    paths = find_files(args.folder, args.limit)
+    if not paths:
+        raise SystemExit(f"No description.txt found below {args.folder}")
+    texts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as file:
+            texts.append(file.read())
+    megabytes = sum(len(text.encode("utf-8")) for text in texts) / 1e6
+    print(f"{len(paths)} files, {megabytes:.2f} MB")
+
+    steps = {
+        "from paths": lambda: ClientDescriptionParser.parse_many(paths, skip_errors=True),
+        "from text": lambda: ClientDescriptionParser.parse_many(texts, from_text=True),
+    }
+    for name, func in steps.items():
+        seconds = measure(func, args.repeat)
+        print(f"{name:<11} {len(paths) / seconds:>10.1f} files/s {megabytes / seconds:>8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
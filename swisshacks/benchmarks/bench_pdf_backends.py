@@ -0,0 +1,107 @@
+"""
+Compare the PDF backends of ClientAccountParser on a folder of PDFs.
+
+Reports documents per second of the full ClientAccount parse for every backend,
+and the field-level agreement of each backend with the reference backend
+(pypdf2): the share of documents for which every ClientAccount field is equal.
+Backends whose library is not installed are skipped.
+
+Usage (from the swisshacks folder):
+    python -m benchmarks.bench_pdf_backends                       # account.pdf files below train/
+    python -m benchmarks.bench_pdf_backends --folder ../data --pattern .pdf
+"""
+import os
+import time
+import argparse
+import dataclasses
+from collections import Counter
+
+from data_parsing.client_account_parser import ClientAccountParser
+from data_parsing.pdf_document import BACKENDS
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(__file__), "..", "..", "train")
+REFERENCE_BACKEND = "pypdf2"
+# Set at parse time, never equal between two parses
+IGNORED_FIELDS = {"parsed_date"}
+
+
+def load_documents(folder: str, pattern: str, limit: int = None) -> list:
+    """Load (path, bytes) of every file below folder whose name ends with pattern."""
+    documents = []
+    for root, _, files in sorted(os.walk(folder)):
+        for filename in sorted(files):
+            if filename.endswith(pattern):
+                path = os.path.join(root, filename)
+                with open(path, "rb") as handle:
+                    documents.append((path, handle.read()))
+                if limit is not None and len(documents) >= limit:
+                    return documents
+    return documents
+
+
+def parse_all(backend: str, documents: list) -> tuple:
+    """Parse every document with a backend; return the field dicts (None on error) and the seconds taken."""
+    results = []
+    start = time.perf_counter()
+    for _, data in documents:
+        try:
+            account = ClientAccountParser.extract_client_data_from_pdf(data, backend=backend)
+        except ValueError:
+            results.append(None)
+            continue
+        results.append({
+            field.name: getattr(account, field.name)
+            for field in dataclasses.fields(account)
+            if field.name not in IGNORED_FIELDS
+        })
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF backends on account forms")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER, help="Folder with PDF files")
+    parser.add_argument("--pattern", default="account.pdf", help="Only use files whose name ends with this")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of documents")
+    args = parser.parse_args()
+
+    documents = load_documents(args.folder, args.pattern, args.limit)
+    if not documents:
+        raise SystemExit(f"No {args.pattern} found below {args.folder}")
+    print(f"{len(documents)} documents, {sum(len(data) for _, data in documents) / 1e6:.2f} MB")
+
+    results = {}
+    print(f"{'backend':<10} {'docs/s':>10} {'errors':>7}")
+    for backend in BACKENDS:
+        try:
+            results[backend], seconds = parse_all(backend, documents)
+        except ImportError as e:
+            print(f"{backend:<10} skipped: {e}")
+            continue
+        errors = sum(result is None for result in results[backend])
+        print(f"{backend:<10} {len(documents) / seconds:>10.1f} {errors:>7}")
+
+    reference = results.get(REFERENCE_BACKEND)
+    if reference is None:
+        return
+    for backend, backend_results in results.items():
+        if backend == REFERENCE_BACKEND:
+            continue
+        identical = 0
+        mismatches = Counter()
+        for (path, _), expected, actual in zip(documents, reference, backend_results):
+            if expected is None or actual is None:
+                mismatches["<parse error>"] += expected is not actual
+                identical += expected is actual
+                continue
+            differing = [name for name in expected if expected[name] != actual[name]]
+            mismatches.update(differing)
+            identical += not differing
+        print(f"{backend} agrees with {REFERENCE_BACKEND} on {identical}/{len(documents)} documents "
+              f"({100 * identical / len(documents):.1f}%)")
+        for name, count in mismatches.most_common():
+            if count:
+                print(f"  {name:<24} differs in {count} documents")
+
+
+if __name__ == "__main__":
+    main()
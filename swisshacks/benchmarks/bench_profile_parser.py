@@ -0,0 +1,88 @@
+"""
+Benchmark ClientProfileParser on the profile documents of the train set.
+
+Reports the time per document for reading the tables out of the docx, for
+dispatching the rows of the already read tables to the profile fields, and for
+the full ClientProfile parse. With --reader python-docx the rows are dispatched
+from python-docx tables, as in the parser's fallback for files the streaming
+reader cannot read.
+
+Usage (from the swisshacks folder):
+    python -m benchmarks.bench_profile_parser                    # profile.docx files below train/
+    python -m benchmarks.bench_profile_parser --folder ../data --repeat 5
+    python -m benchmarks.bench_profile_parser --reader python-docx
+"""
+import io
+import os
+import time
+import logging
+import argparse
+
+import docx
+
+from client_data.client_profile import ClientProfile
+from data_parsing.client_profile_parser import ClientProfileParser
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(__file__), "..", "..", "train")
+
+
+def load_documents(folder: str, limit: int = None) -> list:
+    """Load the bytes of every profile.docx below folder."""
+    documents = []
+    for root, _, files in sorted(os.walk(folder)):
+        for filename in files:
+            if filename == "profile.docx":
+                with open(os.path.join(root, filename), "rb") as handle:
+                    documents.append(handle.read())
+                if limit is not None and len(documents) >= limit:
+                    return documents
+    return documents
+
+
+def measure(func, items: list, repeat: int) -> float:
+    """Return the microseconds per item of func over all items, best of repeat passes."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return 1e6 * best / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the client profile docx parser")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER, help="Folder with profile.docx files")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of documents")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed passes per step")
+    parser.add_argument("--reader", choices=("streaming", "python-docx"), default="streaming",
+                        help="Table reader used for the read and row dispatch steps")
+    args = parser.parse_args()
+
+    # The parser logs every document at INFO level, which would dominate the timings
+    logging.getLogger("ClientProfileParser").setLevel(logging.WARNING)
+
+    documents = load_documents(args.folder, args.limit)
+    if not documents:
+        raise SystemExit(f"No profile.docx found below {args.folder}")
+    print(f"{len(documents)} documents, {sum(map(len, documents)) / 1e6:.2f} MB")
+
+    if args.reader == "streaming":
+        def read_tables(data):
+            return ClientProfileParser.load_tables(io.BytesIO(data))
+    else:
+        def read_tables(data):
+            return docx.Document(io.BytesIO(data)).tables
+
+    tables = [read_tables(data) for data in documents]
+    steps = {
+        "read tables": (read_tables, documents),
+        "parse rows": (lambda document: ClientProfileParser.parse_tables(document, ClientProfile()), tables),
+        "parse": (lambda data: ClientProfileParser.parse(io.BytesIO(data)), documents),
+    }
+    for name, (func, items) in steps.items():
+        print(f"{name:<12} {measure(func, items, args.repeat):>10.1f} us/doc")
+
+
+if __name__ == "__main__":
+    main()
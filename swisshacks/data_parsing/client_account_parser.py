@@ -1,88 +1,74 @@
 #system imports
 import re
 import argparse
-from io import BytesIO
-import io
 from pathlib import Path
 from typing import Union, BinaryIO, Dict, Any
 
-try:
-    from PyPDF2 import PdfReader
-except ImportError:
-    raise ImportError("PyPDF2 package is required. Install it with: pip install PyPDF2")
-
 # local imports
 from client_data.client_account import ClientAccount
 from data_parsing.client_parser import ParserClass
+from data_parsing.pdf_document import PdfDocument
+
+# Headings of the signature section, searched on pages embedding images
+SIGNATURE_SECTION_PATTERN = re.compile(
+    r"specimen\s+signature|signature\s+specimen|signature\s+of\s+applicant|customer\s+signature",
+    re.IGNORECASE,
+)
+# Signature indicators searched in the whole text when the form has no signature fields
+SIGNATURE_TEXT_PATTERN = re.compile(
+    r"specimen\s+signature|signature\s+specimen|signature\s+of\s+applicant|customer\s+signature|sign\s+here",
+    re.IGNORECASE,
+)
+
+PdfInput = Union[PdfDocument, bytes, BinaryIO]
 
 class ClientAccountParser(ParserClass):
     """Parser for client account pdf files"""
 
     @staticmethod
     def extract_text_from_pdf(
-        file_content: Union[bytes, BinaryIO], password: str = None
+        file_content: PdfInput, password: str = None, backend: str = None
     ) -> str:
         """
         Extract text from a PDF file.
 
         Args:
-            file_content: Either bytes content of the PDF or a file-like object
+            file_content: A parsed PdfDocument, bytes content of the PDF or a file-like object
             password: Optional password if the PDF is encrypted
+            backend: PDF backend ("pypdf2" or "pymupdf"), default from PDF_BACKEND
 
         Returns:
             str: The extracted text from the PDF
         """
         try:
-            # If we get bytes, convert to file-like object
-            if isinstance(file_content, bytes):
-                file_content = io.BytesIO(file_content)
-
-            # Create PDF reader object
-            pdf = PdfReader(file_content)
-
-            # If the PDF is encrypted and a password is provided, try to decrypt it
-            if pdf.is_encrypted and password:
-                pdf.decrypt(password)
-
-            # Extract text from all pages
-            text_content = []
-            for _, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if text:
-                    text_content.append(text)
-
-            return "\n\n".join(text_content)
+            return PdfDocument.open(file_content, password, backend).text
         except Exception as e:
             raise ValueError(f"Error extracting text from PDF: {str(e)}")
 
     @staticmethod
-    def extract_pdf_metadata(file_content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+    def extract_pdf_metadata(file_content: PdfInput, backend: str = None) -> Dict[str, Any]:
         """
         Extract metadata from a PDF file.
 
         Args:
-            file_content: Either bytes content of the PDF or a file-like object
+            file_content: A parsed PdfDocument, bytes content of the PDF or a file-like object
+            backend: PDF backend ("pypdf2" or "pymupdf"), default from PDF_BACKEND
 
         Returns:
             Dict: Document metadata including author, creation date, etc.
         """
         try:
-            # If we get bytes, convert to file-like object
-            if isinstance(file_content, bytes):
-                file_content = io.BytesIO(file_content)
-
-            pdf = PdfReader(file_content)
+            pdf = PdfDocument.open(file_content, backend=backend)
 
             # Extract metadata from info dictionary
             metadata = {}
-            if pdf.metadata:
-                for key, value in pdf.metadata.items():
-                    # Convert /Key format to regular key format
-                    clean_key = key.strip("/") if isinstance(key, str) else key
-                    metadata[clean_key] = value
+            for key, value in pdf.metadata.items():
+                # Convert /Key format to regular key format
+                clean_key = key.strip("/") if isinstance(key, str) else key
+                metadata[clean_key] = value
 
             # Add other useful information
-            metadata["Pages"] = len(pdf.pages)
+            metadata["Pages"] = pdf.page_count
             metadata["Encrypted"] = pdf.is_encrypted
 
             return metadata
@@ -91,30 +77,30 @@ class ClientAccountParser(ParserClass):
 
     @staticmethod
     def extract_form_fields(
-        file_content: Union[bytes, BinaryIO], clean_output: bool = True
+        file_content: PdfInput, clean_output: bool = True, backend: str = None
     ) -> Dict[str, Any]:
         """
         Extract form fields from a PDF file.
         Particularly useful for account opening forms and financial documents.
 
+        Page text is only extracted when the form fields do not already report a
+        specimen signature, and only for pages embedding images.
+
         Args:
-            file_content: Either bytes content of the PDF or a file-like object
+            file_content: A parsed PdfDocument, bytes content of the PDF or a file-like object
             clean_output: If True, returns only field names and values (simplified format)
                         If False, returns the raw field data
+            backend: PDF backend ("pypdf2" or "pymupdf"), default from PDF_BACKEND
 
         Returns:
             Dict: Form field names and their values
         """
         try:
-            # If we get bytes, convert to file-like object
-            if isinstance(file_content, bytes):
-                file_content = io.BytesIO(file_content)
-
-            pdf = PdfReader(file_content)
+            pdf = PdfDocument.open(file_content, backend=backend)
 
             # Get form fields if they exist
             form_data = {}
-            raw_fields = pdf.get_fields() or {}
+            raw_fields = pdf.fields
 
             if clean_output:
                 # Process and clean form fields
@@ -157,33 +143,14 @@ class ClientAccountParser(ParserClass):
                     has_signature = "/V" in field_data and field_data["/V"] is not None
                     signature_fields[name] = has_signature
 
-            # Check for embedded signatures (not form fields)
-            embedded_signature_found = False
-            signature_section_patterns = [
-                r"(?i)specimen\s+signature",
-                r"(?i)signature\s+specimen",
-                r"(?i)signature\s+of\s+applicant",
-                r"(?i)customer\s+signature",
-            ]
-
-            # Check text content for signature sections
-            for page_num, page in enumerate(pdf.pages):
-                text = page.extract_text() or ""
-
-                # Look for signature section patterns in the text
-                for pattern in signature_section_patterns:
-                    if re.search(pattern, text):
-                        # If we find a signature section, check for images or XObject references
-                        if "/Resources" in page and "/XObject" in page["/Resources"]:
-                            # XObject can be images or other embedded objects
-                            embedded_signature_found = True
-                            break
-
-                if embedded_signature_found:
-                    break
-
-            # Add embedded signature detection to the output
-            if embedded_signature_found:
+            # Check for embedded signatures (not form fields): a signature section heading
+            # on a page with images or other XObjects. Checking the XObjects first avoids
+            # extracting the text of pages that cannot match.
+            if signature_fields.get("specimen_signature") is not True and any(
+                pdf.page_has_xobject(page_number)
+                and SIGNATURE_SECTION_PATTERN.search(pdf.page_text(page_number))
+                for page_number in range(pdf.page_count)
+            ):
                 signature_fields["specimen_signature"] = True
 
             if signature_fields:
@@ -203,45 +170,32 @@ class ClientAccountParser(ParserClass):
             raise ValueError(f"Error extracting form fields from PDF: {str(e)}")
 
     @staticmethod
-    def extract_client_data_from_pdf(data: bytes) -> ClientAccount:
+    def extract_client_data_from_pdf(data: PdfInput, backend: str = None) -> ClientAccount:
         """
         Parse banking form PDF data and extract information into a ClientAccount object.
+        The PDF is parsed once; the form fields and any page text are shared by all steps.
 
         Args:
-            data: Bytes of the PDF file
+            data: Bytes or file object of the PDF, or an already parsed PdfDocument
+            backend: PDF backend ("pypdf2" or "pymupdf"), default from PDF_BACKEND
 
         Returns:
             ClientAccount: Populated client account object
         """
         client_account = ClientAccount()
-        pdf_file = BytesIO(data)
+        pdf = PdfDocument.open(data, backend=backend)
 
         # Extract form fields with clean_output=True for simplified output
-        form_data = ClientAccountParser.extract_form_fields(pdf_file, clean_output=True)
+        form_data = ClientAccountParser.extract_form_fields(pdf, clean_output=True)
 
         # If we couldn't detect a signature in the form fields, try text-based detection
         has_signature = False
         if "_signature_fields" not in form_data:
-            # Reset the file pointer to the beginning
-            pdf_file.seek(0)
-
-            # Extract text from the PDF to look for signature sections
-            text = ClientAccountParser.extract_text_from_pdf(pdf_file)
-
-            # Look for common signature section indicators in the text
-            signature_patterns = [
-                r"(?i)specimen\s+signature",
-                r"(?i)signature\s+specimen",
-                r"(?i)signature\s+of\s+applicant",
-                r"(?i)customer\s+signature",
-                r"(?i)sign\s+here",
-            ]
-
-            for pattern in signature_patterns:
-                if re.search(pattern, text):
-                    form_data["_signature_fields"] = {"specimen_signature": True}
-                    has_signature = True
-                    break
+            # Look for common signature section indicators in the text (cached per page)
+            text = ClientAccountParser.extract_text_from_pdf(pdf)
+            if SIGNATURE_TEXT_PATTERN.search(text):
+                form_data["_signature_fields"] = {"specimen_signature": True}
+                has_signature = True
 
         # Map form data to ClientAccount fields
         # Account holder information
@@ -306,11 +260,11 @@ class ClientAccountParser(ParserClass):
         return client_account
 
     @staticmethod
-    def parse(pdf_path: Path) -> ClientAccount:
+    def parse(pdf_path: Path, backend: str = None) -> ClientAccount:
         """Parse the client account pdf file and return a ClientAccount object"""
         # Read the PDF file
         with open(pdf_path, "rb") as file:
-            return ClientAccountParser.extract_client_data_from_pdf(file.read())
+            return ClientAccountParser.extract_client_data_from_pdf(file.read(), backend=backend)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,86 @@
-import re
 import os
 from pathlib import Path
 import argparse  # Add import for argument parsing
+from typing import Dict, Iterable, List, Optional, Union
 
 from client_data.client_description import ClientDescription
 from data_parsing.client_parser import ParserClass
 
+# Section headers in the order they appear in the text, and the field each one fills
+SECTION_FIELDS = {
+    "Summary Note": "summary_note",
+    "Family Background": "family_background",
+    "Education Background": "education_background",
+    "Occupation History": "occupation_history",
+    "Wealth Summary": "wealth_summary",
+    "Client Summary": "client_summary",
+}
+
+
 class ClientDescriptionParser(ParserClass):
     """Parser for client description text files"""
 
+    @staticmethod
+    def split_sections(content: str) -> Dict[str, str]:
+        """
+        Split the text into its sections in a single scan for the section headers.
+
+        A section starts after the first occurrence of its header and ends at the
+        first following header of the next section, the last one at the end of the
+        text. A section whose next header does not follow it is left out.
+
+        Headers are found by jumping from colon to colon, which are rare in the text,
+        and checking whether a header name ends there.
+        """
+        # Header -> end of its first occurrence (after "Header:" or "Header: "),
+        # and -> starts of its occurrences written as "Header: "
+        first_ends = {}
+        spaced_starts = {}
+        colon = content.find(":")
+        while colon != -1:
+            for header in SECTION_FIELDS:
+                if content.endswith(header, 0, colon):
+                    spaced = content.startswith(" ", colon + 1)
+                    first_ends.setdefault(header, colon + 1 + spaced)
+                    if spaced:
+                        spaced_starts.setdefault(header, []).append(colon - len(header))
+                    # No header name is the end of another one
+                    break
+            colon = content.find(":", colon + 1)
+
+        sections = {}
+        headers = list(SECTION_FIELDS)
+        for i, header in enumerate(headers):
+            if header not in first_ends:
+                continue
+            start = first_ends[header]
+            if i == len(headers) - 1:
+                end = len(content)
+            else:
+                end = next((position for position in spaced_starts.get(headers[i + 1], ()) if position >= start), None)
+                if end is None:
+                    continue
+            sections[header] = content[start:end]
+        return sections
+
+    @staticmethod
+    def parse_text(content: str) -> ClientDescription:
+        """
+        Parse the text of a client description and return a ClientDescription object
+
+        Args:
+            content (str): Text of a description file
+
+        Returns:
+            ClientDescription: Populated client description object
+        """
+        client_description = ClientDescription()
+        for header, section_content in ClientDescriptionParser.split_sections(content).items():
+            # Clean the section content (here just collapse runs of newlines)
+            section_content = "\n".join(filter(None, section_content.strip().split("\n")))
+            setattr(client_description, SECTION_FIELDS[header], section_content)
+        return client_description
+
     @staticmethod
     def parse(text_path: Path) -> ClientDescription:
         """
@@ -28,51 +100,37 @@ class ClientDescriptionParser(ParserClass):
             # Read the text file
             with open(text_path, 'r', encoding='utf-8') as file:
                 content = file.read()
-            
-            # Create ClientDescription object
-            client_description = ClientDescription()
-            
-            # Define sections to extract (with the original text format)
-            section_mappings = {
-                "Summary Note": "summary_note",
-                "Family Background": "family_background",
-                "Education Background": "education_background",
-                "Occupation History": "occupation_history",
-                "Wealth Summary": "wealth_summary",
-                "Client Summary": "client_summary"
-            }
-            
-            sections = list(section_mappings.keys())
-            
-            # Extract content between sections and directly populate the ClientDescription object
-            for i, section in enumerate(sections):
-                # Create pattern to match the section and its content
-                pattern = f"{section}: ?(.*?)"
-                
-                # If this is the last section, match until the end of file
-                if i == len(sections) - 1:
-                    pattern += "(?:\Z)"
-                else:
-                    # Otherwise match until the next section
-                    pattern += f"(?={sections[i+1]}: )"
-                
-                # Find the section in the text
-                matches = re.search(pattern, content, re.DOTALL)
-                if matches:
-                    # Extract and clean the section content
-                    section_content = matches.group(1).strip()
-                    
-                    # Process the section content (here just remove extra whitespace)
-                    section_content = re.sub(r'\n+', '\n', section_content)
-                    
-                    # Directly set the attribute on the ClientDescription object
-                    setattr(client_description, section_mappings[section], section_content)
-            
-            return client_description
+
+            return ClientDescriptionParser.parse_text(content)
         
         except Exception as e:
             raise ValueError(f"Error parsing text file: {str(e)}")
 
+    @staticmethod
+    def parse_many(sources: Iterable[Union[str, Path]], from_text: bool = False,
+                   skip_errors: bool = False) -> List[Optional[ClientDescription]]:
+        """
+        Parse many client descriptions
+
+        Args:
+            sources: Paths of description files, or their texts with from_text=True
+            from_text (bool): Treat sources as the texts instead of paths
+            skip_errors (bool): Return None for a file that cannot be parsed instead of raising
+
+        Returns:
+            List[ClientDescription]: One description per source, in order
+        """
+        parse = ClientDescriptionParser.parse_text if from_text else ClientDescriptionParser.parse
+        descriptions = []
+        for source in sources:
+            try:
+                descriptions.append(parse(source))
+            except ValueError:
+                if not skip_errors:
+                    raise
+                descriptions.append(None)
+        return descriptions
+
 
 if __name__ == "__main__":
     # Set default paths
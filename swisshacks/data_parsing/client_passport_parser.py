@@ -1,5 +1,6 @@
 from pathlib import Path
 from enum import Enum
+from typing import BinaryIO, List, Optional
 
 from client_data.client_passport import ClientPassport
 from data_parsing.client_parser import ParserClass
@@ -7,6 +8,11 @@ from data_parsing.client_parser import ParserClass
 class PassportBackendType(Enum):
     OPENAI = "openai"
     EASY_OCR = "easyocr"
+    # EasyOCR recognition on the fixed field boxes, without text detection, fields
+    # the MRZ carries taken from the decoded MRZ
+    EASY_OCR_FAST = "easyocr_fast"
+    # EASY_OCR_FAST on the process-wide pool of warm OCR worker processes
+    EASY_OCR_POOL = "easyocr_pool"
     TESSERACT = "tesseract"
 
 class ClientPassportParser(ParserClass):
@@ -20,6 +26,12 @@ class ClientPassportParser(ParserClass):
         elif backend_type == PassportBackendType.EASY_OCR:
             from data_parsing.parse_passport_easyocr import PassportParserEasyOCR
             self.parser = PassportParserEasyOCR()
+        elif backend_type == PassportBackendType.EASY_OCR_FAST:
+            from data_parsing.parse_passport_easyocr import PassportParserEasyOCR
+            self.parser = PassportParserEasyOCR(recognition_only=True, mrz_first=True)
+        elif backend_type == PassportBackendType.EASY_OCR_POOL:
+            from data_parsing.ocr_pool import get_ocr_pool
+            self.parser = get_ocr_pool()
         elif backend_type == PassportBackendType.TESSERACT:
             raise NotImplementedError("Tesseract backend is not implemented yet.")
         else:
@@ -40,6 +52,46 @@ class ClientPassportParser(ParserClass):
             raise ValueError("Parser not initialized.")
         
         return self.parser.parse(passport_file_path)
-    
 
-        
\ No newline at end of file
+    def parse_file(self, image_file: BinaryIO) -> ClientPassport:
+        """
+        Parse a passport image (PNG) read from an open binary file, such as a
+        document of a packed dataset.
+
+        Args:
+            image_file: File object positioned at the start of the image
+
+        Returns:
+            ClientPassport object containing extracted passport information
+        """
+        if not self.parser:
+            raise ValueError("Parser not initialized.")
+
+        return self.parser.parse_file(image_file)
+
+    def parse_many(self, passport_file_paths: List[Path], skip_errors: bool = False) -> List[Optional[ClientPassport]]:
+        """
+        Parse many passport images, in one batch if the backend supports it.
+
+        Args:
+            passport_file_paths: Paths to the passport image files
+            skip_errors: Return None for an image that cannot be parsed instead of raising
+
+        Returns:
+            One ClientPassport per path, in order
+        """
+        if not self.parser:
+            raise ValueError("Parser not initialized.")
+
+        if hasattr(self.parser, "parse_many"):
+            return self.parser.parse_many(passport_file_paths, skip_errors=skip_errors)
+
+        passports = []
+        for path in passport_file_paths:
+            try:
+                passports.append(self.parser.parse(path))
+            except (FileNotFoundError, ValueError):
+                if not skip_errors:
+                    raise
+                passports.append(None)
+        return passports
@@ -1,6 +1,9 @@
 import docx
+import zipfile
+import operator
 import logging
 import argparse  # Add import for argument parsing
+import xml.etree.ElementTree as ElementTree
 from swisshacks.client_data.client_profile import (
     ClientProfile,
     Employment,
@@ -15,6 +18,65 @@ from swisshacks.client_data.client_profile import (
     IncomeRange,
     WealthSource,
 )
+from data_parsing.docx_tables import read_tables
+
+
+class _RowRules:
+    """
+    Ordered (substring, handler) rules replacing an if/elif chain on a row's text.
+
+    classify() returns the handlers of all rules whose substring occurs in the text,
+    in rule order, so first() is the branch the if/elif chain would have taken.
+    Labels come from the form template and repeat in every document, so with
+    memoize the classification of each distinct label is computed once.
+    """
+
+    # Distinct texts remembered per rule set before the memo is reset
+    MAX_MEMO = 4096
+
+    def __init__(self, rules, ignore_case=False, memoize=True):
+        # (substring, handler, ignore_case), the substring lowered for case-insensitive rules
+        self.rules = tuple(
+            (needle.lower() if rule_ignore_case else needle, handler, rule_ignore_case)
+            for needle, handler, *rest in rules
+            for rule_ignore_case in [rest[0] if rest else ignore_case]
+        )
+        self._any_ignore_case = any(rule[2] for rule in self.rules)
+        self._memo = {} if memoize else None
+
+    def classify(self, text):
+        if self._memo is not None:
+            handlers = self._memo.get(text)
+            if handlers is not None:
+                return handlers
+        lowered = text.lower() if self._any_ignore_case else text
+        handlers = tuple(
+            handler for needle, handler, ignore_case in self.rules
+            if needle in (lowered if ignore_case else text)
+        )
+        if self._memo is not None:
+            if len(self._memo) >= self.MAX_MEMO:
+                self._memo.clear()
+            self._memo[text] = handlers
+        return handlers
+
+    def first(self, text):
+        handlers = self._memo.get(text) if self._memo is not None else None
+        if handlers is None:
+            handlers = self.classify(text)
+        return handlers[0] if handlers else None
+
+
+def _setter(path, convert=None):
+    """Return a handler setting the (dotted) attribute path of its target to the row value"""
+    parent, _, name = path.rpartition(".")
+    get_parent = operator.attrgetter(parent) if parent else None
+
+    def set_value(target, row_value, row_label=None):
+        if get_parent is not None:
+            target = get_parent(target)
+        setattr(target, name, convert(row_value) if convert is not None else row_value)
+    return set_value
 
 
 class ClientProfileParser:
@@ -35,6 +97,9 @@ class ClientProfileParser:
     TABLE_ACCOUNT_INVESTMENT = 15
     TABLE_ASSETS_INFO = 17
 
+    # Extraction plans by layout fingerprint, at most this many are kept
+    MAX_LAYOUTS = 256
+
     @staticmethod
     def extract_cell_value(row, column_index):
         """Extract cell text value safely"""
@@ -47,59 +112,74 @@ class ClientProfileParser:
         except Exception:
             return ""
 
+    @staticmethod
+    def extract_label_value(row, label_column=0, value_column=2):
+        """Extract the label and value cell texts, building the row's cells only once"""
+        try:
+            cells = row.cells
+            count = len(cells)
+        except Exception:
+            return "", ""
+        try:
+            row_label = cells[label_column].text.strip() if label_column < count else ""
+        except Exception:
+            row_label = ""
+        try:
+            row_value = cells[value_column].text.strip() if value_column < count else ""
+        except Exception:
+            row_value = ""
+        return row_label, row_value
+
     @staticmethod
     def find_checkbox_value(text):
         """Determine if a checkbox is checked"""
         return ClientProfileParser.CHECKBOX_CHECKED in text
 
+    @staticmethod
+    def get_checked(enum_type, text):
+        """Return the first member of enum_type whose checkbox is checked in text"""
+        if ClientProfileParser.CHECKBOX_CHECKED not in text:
+            return None
+        for token, member in _CHECKBOX_TOKENS[enum_type].items():
+            if token in text:
+                return member
+        return None
+
     @staticmethod
     def get_marital_status(text) -> MaritalStatus:
         """Extract marital status from checkbox text"""
-        for status in MaritalStatus:
-            if f"{ClientProfileParser.CHECKBOX_CHECKED} {status.value}" in text:
-                return status
-        return None
+        return ClientProfileParser.get_checked(MaritalStatus, text)
 
     @staticmethod
     def get_gender(text) -> Gender:
         """Extract gender from checkbox text"""
-        for gender in Gender:
-            if f"{ClientProfileParser.CHECKBOX_CHECKED} {gender.value}" in text:
-                return gender
-        return None
+        return ClientProfileParser.get_checked(Gender, text)
 
     @staticmethod
     def get_wealth_range(text) -> WealthRange:
         """Extract wealth range from checkbox text"""
-        for range in WealthRange:
-            if f"{ClientProfileParser.CHECKBOX_CHECKED} {range.value}" in text:
-                return range
-        return None
+        return ClientProfileParser.get_checked(WealthRange, text)
 
     @staticmethod
     def get_income_range(text) -> IncomeRange:
         """Extract income range from checkbox text"""
-        for range in IncomeRange:
-            if f"{ClientProfileParser.CHECKBOX_CHECKED} {range.value}" in text:
-                return range
-        return None
+        return ClientProfileParser.get_checked(IncomeRange, text)
 
     @staticmethod
     def get_risk_profile(text):
         """Extract risk profile from checkbox text"""
-        for risk in RiskProfile:
-            if f"{ClientProfileParser.CHECKBOX_CHECKED} {risk.value}" in text:
-                return risk
-        return None
+        return ClientProfileParser.get_checked(RiskProfile, text)
 
     @staticmethod
     def extract_wealth_sources(text):
         """Extract wealth sources from checkbox text"""
-        sources = []
-        for source in WealthSource:
-            if f"{ClientProfileParser.CHECKBOX_CHECKED} {source.value}" in text:
-                sources.append(source.value)
-        return sources
+        if ClientProfileParser.CHECKBOX_CHECKED not in text:
+            return []
+        return [
+            member.value
+            for token, member in _CHECKBOX_TOKENS[WealthSource].items()
+            if token in text
+        ]
 
     @staticmethod
     def extract_assets(text):
@@ -115,26 +195,17 @@ class ClientProfileParser:
     @staticmethod
     def get_mandate_type(text):
         """Extract mandate type from checkbox text"""
-        for mandate_type in MandateType:
-            if f"{ClientProfileParser.CHECKBOX_CHECKED} {mandate_type.value}" in text:
-                return mandate_type
-        return None
+        return ClientProfileParser.get_checked(MandateType, text)
 
     @staticmethod
     def get_investment_experience(text):
         """Extract investment experience level from checkbox text"""
-        for experience in InvestmentExperience:
-            if f"{ClientProfileParser.CHECKBOX_CHECKED} {experience.value}" in text:
-                return experience
-        return None
+        return ClientProfileParser.get_checked(InvestmentExperience, text)
 
     @staticmethod
     def get_investment_horizon(text):
         """Extract investment horizon from checkbox text"""
-        for horizon in InvestmentHorizon:
-            if f"{ClientProfileParser.CHECKBOX_CHECKED} {horizon.value}" in text:
-                return horizon
-        return None
+        return ClientProfileParser.get_checked(InvestmentHorizon, text)
 
     @staticmethod
     def get_transaction_frequency(text):
@@ -148,50 +219,69 @@ class ClientProfileParser:
         return [market.strip() for market in markets] if markets else []
 
     @staticmethod
-    def parse_basic_info(table, client):
-        """Parse basic client information from table"""
+    def parse_amount(text):
+        """Parse an amount like "1,250,000", keeping the text if it is not a number"""
+        try:
+            return float(text.replace(",", ""))
+        except ValueError:
+            return text
+
+    @staticmethod
+    def set_employee_status(employment, row_value, row_label=None):
+        """Set the employee status and the "Since" date"""
+        employment.current_status.status_type = EmploymentType.EMPLOYEE
+        # Extract the "Since" date
+        if "Since" in row_value:
+            employment.current_status.since = row_value.split("Since")[1].strip()
+
+    @staticmethod
+    def set_position(employment, row_value, row_label=None):
+        """Set the position and possibly the annual income in parentheses"""
+        parts = row_value.replace("Position", "").strip().split("(")
+        employment.position = parts[0].strip()
+        if len(parts) > 1:
+            employment.annual_income = parts[1].replace(")", "").strip()
+
+    @staticmethod
+    def status_setter(status_type):
+        """Return a handler setting the employment status and its non-empty "Since" date"""
+        def set_status(employment, row_value, row_label=None):
+            employment.current_status.status_type = status_type
+            if "Since" in row_value:
+                since_value = row_value.split("Since")[1].strip()
+                if since_value:
+                    employment.current_status.since = since_value
+        return set_status
+
+    @staticmethod
+    def set_wealth_sources(client, row_value, row_label):
+        """Set the checked wealth sources of the label and keep the free text"""
+        client.wealth_info.wealth_sources = ClientProfileParser.extract_wealth_sources(row_label)
+        if row_value:
+            client.wealth_info.source_info.append(row_value)
+
+    @staticmethod
+    def parse_rows(table, target, rules, label_column=0, value_column=2):
+        """Apply the first matching rule to each row, matching on the label column"""
         for row in table.rows:
-            row_label = ClientProfileParser.extract_cell_value(row, 0)
-            row_value = ClientProfileParser.extract_cell_value(row, 2)
+            row_label, row_value = ClientProfileParser.extract_label_value(row, label_column, value_column)
+            handler = rules.first(row_label)
+            if handler is not None:
+                handler(target, row_value, row_label)
 
-            row_label = row_label.lower()
-
-            if "last name" in row_label:
-                client.last_name = row_value
-            elif "first/ middle name" in row_label:
-                client.first_name = row_value
-            elif "address" in row_label:
-                client.address = row_value
-            elif "date of birth" in row_label:
-                client.birth_date = row_value
-            elif "nationality" in row_label:
-                client.nationality = row_value
-            elif "passport no/ unique id" in row_label:
-                client.passport_id = row_value
-            elif "id type" in row_label:
-                client.id_type = row_value
-            elif "id issue date" in row_label:
-                client.id_issue_date = row_value
-            elif "id expiry date" in row_label:
-                client.id_expiry_date = row_value
-            elif "gender" in row_label:
-                client.gender = ClientProfileParser.get_gender(row_value)
-            elif "country of domicile" in row_label:
-                client.country_of_domicile = row_value
+    @staticmethod
+    def parse_basic_info(table, client):
+        """Parse basic client information from table"""
+        ClientProfileParser.parse_rows(table, client, _BASIC_INFO_RULES)
 
     @staticmethod
     def parse_contact_info(table, client):
         """Parse contact information from table"""
         for row in table.rows:
             row_value = ClientProfileParser.extract_cell_value(row, 2)
-            if "Telephone" in row_value:
-                client.contact_info.telephone = row_value.replace(
-                    "Telephone", ""
-                ).strip()
-            elif "E-Mail" in row_value:
-                client.contact_info.email = row_value.replace(
-                    "E-Mail", ""
-                ).strip()
+            handler = _CONTACT_RULES.first(row_value)
+            if handler is not None:
+                handler(client, row_value)
 
     @staticmethod
     def parse_pep_status(table, client):
@@ -204,249 +294,258 @@ class ClientProfileParser:
     @staticmethod
     def parse_marital_education(table, client):
         """Parse marital status and education information"""
-        for row in table.rows:
-            row_label = ClientProfileParser.extract_cell_value(row, 0).lower()
-            row_value = ClientProfileParser.extract_cell_value(row, 2)
-
-            if "marital status" in row_label:
-                client.personal_info.marital_status = (
-                    ClientProfileParser.get_marital_status(row_value)
-                )
-            elif "highest education" in row_label:
-                client.personal_info.highest_education = row_value
-            elif "education history" in row_label:
-                client.personal_info.education_history = row_value
+        ClientProfileParser.parse_rows(table, client, _MARITAL_EDUCATION_RULES)
 
     @staticmethod
     def parse_employment_part1(table, employment):
         """Parse first part of employment information"""
         for row in table.rows:
-            row_label = ClientProfileParser.extract_cell_value(row, 0)
-            row_value = ClientProfileParser.extract_cell_value(row, 2)
+            row_label, row_value = ClientProfileParser.extract_label_value(row)
 
             if "Current employment and function" in row_label:
-                if "Employee" in row_value:
-                    employment.current_status.status_type = (
-                        EmploymentType.EMPLOYEE
-                    )
-                    # Extract the "Since" date
-                    if "Since" in row_value:
-                        employment.current_status.since = (
-                            row_value.split("Since")[1].strip()
-                        )
-                elif "Name Employer" in row_value:
-                    employment.employer = row_value.replace(
-                        "Name Employer", ""
-                    ).strip()
-                elif "Position" in row_value:
-                    # Extract position and possibly annual income
-                    parts = (
-                        row_value.replace("Position", "").strip().split("(")
-                    )
-                    employment.position = parts[0].strip()
-                    if len(parts) > 1:
-                        employment.annual_income = (
-                            parts[1].replace(")", "").strip()
-                        )
+                handler = _EMPLOYMENT_RULES.first(row_value)
+                if handler is not None:
+                    handler(employment, row_value)
 
     @staticmethod
     def parse_employment_part2(table, employment):
         """Parse second part of employment information"""
         for row in table.rows:
             row_value = ClientProfileParser.extract_cell_value(row, 2)
-
-            if (
-                "Currently not employed" in row_value
-                and ClientProfileParser.find_checkbox_value(row_value)
-            ):
-                employment.current_status.status_type = (
-                    EmploymentType.NOT_EMPLOYED
-                )
-                if "Since" in row_value:
-                    since_value = row_value.split("Since")[1].strip()
-                    if since_value:
-                        employment.current_status.since = (
-                            since_value
-                        )
-
-            elif "Previous Profession" in row_value:
-                employment.previous_profession = row_value.replace(
-                    "Previous Profession:", ""
-                ).strip()
-
-            elif (
-                "Retired" in row_value
-                and ClientProfileParser.find_checkbox_value(row_value)
-            ):
-                employment.current_status.status_type = (
-                    EmploymentType.RETIRED
-                )
-                if "Since" in row_value:
-                    since_value = row_value.split("Since")[1].strip()
-                    if since_value:
-                        employment.current_status.since = (
-                            since_value
-                        )
+            # The status rules only apply when a checkbox of the row is checked
+            rules = (
+                _CHECKED_STATUS_RULES
+                if ClientProfileParser.find_checkbox_value(row_value)
+                else _UNCHECKED_STATUS_RULES
+            )
+            handler = rules.first(row_value)
+            if handler is not None:
+                handler(employment, row_value)
 
     @staticmethod
     def parse_wealth_info(table, client):
         """Parse wealth information"""
-        for row in table.rows:
-            row_label = ClientProfileParser.extract_cell_value(row, 0)
-            row_value = ClientProfileParser.extract_cell_value(row, 2)
-
-            if "Total wealth estimated" in row_label:
-                client.wealth_info.total_wealth_range = (
-                    ClientProfileParser.get_wealth_range(row_value)
-                )
-            elif "Origin of wealth" in row_label:
-                client.wealth_info.wealth_sources = (
-                    ClientProfileParser.extract_wealth_sources(row_label)
-                )
-                if row_value:
-                    client.wealth_info.source_info.append(row_value)
-            elif "estimated assets" in row_label.lower():
-                client.wealth_info.assets = (
-                    ClientProfileParser.extract_assets(row_value)
-                )
+        ClientProfileParser.parse_rows(table, client, _WEALTH_RULES)
 
     @staticmethod
     def parse_income_info(table, client):
         """Parse income information"""
         for row in table.rows:
-            row_label = ClientProfileParser.extract_cell_value(row, 0)
-            row_value = ClientProfileParser.extract_cell_value(row, 2)
+            row_label, row_value = ClientProfileParser.extract_label_value(row)
 
-            if "Estimated Total income" in row_label:
-                client.income_info.total_income_range = (
-                    ClientProfileParser.get_income_range(row_value)
-                )
-            if "Country of main source of income" in row_label:
-                client.income_info.source_info = row_value
+            # Both rules apply independently
+            for handler in _INCOME_RULES.classify(row_label):
+                handler(client, row_value, row_label)
 
     @staticmethod
     def parse_account_investment(table, client):
         """Parse account details and investment preferences"""
-        for row in table.rows:
-            row_label = ClientProfileParser.extract_cell_value(row, 0)
-            row_value = ClientProfileParser.extract_cell_value(row, 2)
-
-            if "Account Number" in row_label:
-                client.account_details.account_number = row_value
-            elif "Commercial Account" in row_label:
-                client.account_details.is_commercial_account = (
-                    f"{ClientProfileParser.CHECKBOX_CHECKED} Yes"
-                    in row_value
-                )
-            elif "Investment Risk Profile" in row_label:
-                client.account_details.risk_profile = (
-                    ClientProfileParser.get_risk_profile(row_value)
-                )
-            elif "Type of Mandate" in row_label:
-                client.account_details.investment_preferences.type_of_mandate = ClientProfileParser.get_mandate_type(
-                    row_value
-                )
-            elif "Investment Experience" in row_label:
-                client.account_details.investment_preferences.investment_experience = ClientProfileParser.get_investment_experience(
-                    row_value
-                )
-            elif "Investment Horizon" in row_label:
-                client.account_details.investment_preferences.investment_horizon = ClientProfileParser.get_investment_horizon(
-                    row_value
-                )
-            elif "Expected Transactional Behavior" in row_label:
-                client.account_details.investment_preferences.expected_transactional_behavior = ClientProfileParser.get_transaction_frequency(
-                    row_value
-                )
-            elif "Preferred Markets" in row_label:
-                client.account_details.investment_preferences.preferred_markets = ClientProfileParser.extract_preferred_markets(
-                    row_value
-                )
+        ClientProfileParser.parse_rows(table, client, _ACCOUNT_INVESTMENT_RULES)
 
     @staticmethod
     def parse_assets_info(table, client):
         """Parse assets information"""
-        for row in table.rows:
-            row_label = ClientProfileParser.extract_cell_value(row, 0)
-            row_value = ClientProfileParser.extract_cell_value(row, 2)
+        ClientProfileParser.parse_rows(table, client, _ASSETS_RULES)
 
-            if "Total Asset Under Management" in row_label:
-                try:
-                    client.account_details.total_assets = float(
-                        row_value.replace(",", "")
-                    )
-                except ValueError:
-                    client.account_details.total_assets = row_value
-            elif "Asset Under Management to transfer" in row_label:
+    @staticmethod
+    def load_tables(file_path):
+        """
+        Return the tables of a docx file, read by the fast streaming reader when the
+        file is a plain docx, otherwise through python-docx.
+        """
+        try:
+            return read_tables(file_path)
+        except (zipfile.BadZipFile, KeyError, ValueError, ElementTree.ParseError):
+            if hasattr(file_path, "seek"):
+                file_path.seek(0)
+            return docx.Document(file_path).tables
+
+    @staticmethod
+    def layout_fingerprint(tables) -> tuple:
+        """
+        Fingerprint of the template a document was filled from: the label column of
+        every table, with checkboxes normalized so that the answers do not matter.
+        The number of tables and their row counts are part of it.
+        """
+        return tuple(
+            tuple(
+                ClientProfileParser.extract_cell_value(row, 0).replace(ClientProfileParser.CHECKBOX_CHECKED, "☐")
+                for row in table.rows
+            )
+            for table in tables
+        )
+
+    @staticmethod
+    def build_layout_plan(fingerprint: tuple) -> dict:
+        """
+        Map the table positions of a layout to the positions of the default template.
+
+        Tables with a distinctive label are found by it, preferring their default
+        position, the others keep their default offset from such a table. A table
+        that cannot be found keeps its default position.
+        """
+        logger = logging.getLogger("ClientProfileParser")
+        labels = [" ".join(table_labels).lower() for table_labels in fingerprint]
+        found = {}
+        for default_index, anchor in _TABLE_LAYOUT.items():
+            if not isinstance(anchor, str):
+                continue
+            candidates = [default_index] + [i for i in range(len(labels)) if i != default_index]
+            for i in candidates:
+                if i < len(labels) and i not in found.values() and anchor in labels[i]:
+                    found[default_index] = i
+                    break
+        plan = {}
+        for default_index, anchor in _TABLE_LAYOUT.items():
+            if isinstance(anchor, str):
+                index = found.get(default_index, default_index)
+                if default_index not in found:
+                    logger.warning(f"Profile table {default_index} not found by {anchor!r}, "
+                                   f"assuming position {index}")
+            else:
+                anchor_index, offset = anchor
+                index = found.get(anchor_index, anchor_index) + offset
+            if index != default_index:
+                logger.warning(f"Profile table {default_index} found at position {index}")
+            if 0 <= index < len(fingerprint):
+                plan.setdefault(index, default_index)
+        return plan
+
+    @staticmethod
+    def is_contact_table(table) -> bool:
+        """True if a table holds the telephone or e-mail rows of the contact information"""
+        return any(
+            _CONTACT_RULES.first(ClientProfileParser.extract_cell_value(row, 2)) is not None
+            for row in table.rows
+        )
+
+    @staticmethod
+    def is_pep_table(table) -> bool:
+        """True if a table starts with the politically exposed person question"""
+        label = ClientProfileParser.extract_cell_value(table.rows[0], 0).lower() if table.rows else ""
+        return "pep" in label or "politically exposed" in label
+
+    @staticmethod
+    def verify_layout_plan(tables, plan: dict) -> dict:
+        """
+        Check the tables the plan assigns to _TABLE_CHECKS against their content. A
+        table that fails its check is looked for among the tables the plan leaves out;
+        if it is not found it is skipped instead of parsing the wrong table.
+        """
+        logger = logging.getLogger("ClientProfileParser")
+        positions = {default_index: index for index, default_index in plan.items()}
+        verified = None
+        for default_index, check in _TABLE_CHECKS.items():
+            index = positions.get(default_index)
+            try:
+                if index is not None and check(tables[index]):
+                    continue
+            except Exception:
+                pass
+            if verified is None:
+                verified = dict(plan)
+            verified.pop(index, None)
+            for candidate, table in enumerate(tables):
                 try:
-                    client.account_details.transfer_assets = float(
-                        row_value.replace(",", "")
-                    )
-                except ValueError:
-                    client.account_details.transfer_assets = row_value
+                    matches = candidate not in verified and check(table)
+                except Exception:
+                    matches = False
+                if matches:
+                    verified[candidate] = default_index
+                    break
+            found = next((i for i, d in verified.items() if d == default_index), None)
+            if found is not None:
+                logger.warning(f"Profile table {default_index} is not at planned position {index}, "
+                               f"found at position {found}")
+            elif index is not None:
+                logger.warning(f"Profile table {default_index} is not at planned position {index}, skipped")
+        return plan if verified is None else verified
+
+    @staticmethod
+    def get_layout_plan(tables) -> dict:
+        """Return the extraction plan of the document's layout, built once per layout"""
+        fingerprint = ClientProfileParser.layout_fingerprint(tables)
+        plan = _LAYOUT_PLANS.get(fingerprint)
+        if plan is None:
+            plan = ClientProfileParser.build_layout_plan(fingerprint)
+            if len(_LAYOUT_PLANS) >= ClientProfileParser.MAX_LAYOUTS:
+                _LAYOUT_PLANS.clear()
+            _LAYOUT_PLANS[fingerprint] = plan
+        return plan
+
+    @staticmethod
+    def parse_tables(tables, client: ClientProfile) -> ClientProfile:
+        """Fill client from the tables of a profile document and return it"""
+        primary_employment = Employment()
+        logger = logging.getLogger("ClientProfileParser")
+        # Position of each table in the default template
+        plan = ClientProfileParser.verify_layout_plan(tables, ClientProfileParser.get_layout_plan(tables))
+
+        # Parse tables based on their function
+        for i, table in enumerate(tables):
+            layout_index = plan.get(i)
+            if layout_index is None:  # Skip the "Client Information" header and section tables
+                continue
+
+            try:
+                # Parse each table based on its index in the default template
+                if layout_index == ClientProfileParser.TABLE_BASIC_INFO:
+                    ClientProfileParser.parse_basic_info(table, client)
+                    
+                elif layout_index == ClientProfileParser.TABLE_CONTACT_INFO:
+                    ClientProfileParser.parse_contact_info(table, client)
+                    
+                elif layout_index == ClientProfileParser.TABLE_PEP_STATUS:
+                    ClientProfileParser.parse_pep_status(table, client)
+                    
+                elif layout_index == ClientProfileParser.TABLE_MARITAL_EDUCATION:
+                    ClientProfileParser.parse_marital_education(table, client)
+                    
+                elif layout_index == ClientProfileParser.TABLE_EMPLOYMENT_PART1:
+                    ClientProfileParser.parse_employment_part1(table, primary_employment)
+                    
+                elif layout_index == ClientProfileParser.TABLE_EMPLOYMENT_PART2:
+                    ClientProfileParser.parse_employment_part2(table, primary_employment)
+                    
+                    # Add the parsed employment to client profile
+                    if (
+                        primary_employment.employer
+                        or primary_employment.position
+                        or primary_employment.current_status.status_type
+                    ):
+                        client.employment.append(primary_employment)
+                        
+                elif layout_index == ClientProfileParser.TABLE_WEALTH_INFO:
+                    ClientProfileParser.parse_wealth_info(table, client)
+                    
+                elif layout_index == ClientProfileParser.TABLE_INCOME_INFO:
+                    ClientProfileParser.parse_income_info(table, client)
+                    
+                elif layout_index == ClientProfileParser.TABLE_ACCOUNT_INVESTMENT:
+                    ClientProfileParser.parse_account_investment(table, client)
+                    
+                elif layout_index == ClientProfileParser.TABLE_ASSETS_INFO:
+                    ClientProfileParser.parse_assets_info(table, client)
+                    
+            except Exception as table_error:
+                logger.error(f"Error parsing table {i}: {table_error}")
+                # Continue with next table instead of failing entirely
+                continue
+
+        return client
 
     @staticmethod
     def parse(file_path: str) -> ClientProfile:
         """Parse a docx file and return a ClientProfile object"""
         client = ClientProfile()
-        primary_employment = Employment()
         
         logging.basicConfig(level=logging.INFO)
         logger = logging.getLogger("ClientProfileParser")
 
         try:
             logger.info(f"Parsing profile document: {file_path}")
-            doc = docx.Document(file_path)
-
-            # Parse tables based on their function
-            for i, table in enumerate(doc.tables):
-                if i == 0:  # Skip the "Client Information" header table
-                    continue
-
-                try:
-                    # Parse each table based on its index
-                    if i == ClientProfileParser.TABLE_BASIC_INFO:
-                        ClientProfileParser.parse_basic_info(table, client)
-                        
-                    elif i == ClientProfileParser.TABLE_CONTACT_INFO:
-                        ClientProfileParser.parse_contact_info(table, client)
-                        
-                    elif i == ClientProfileParser.TABLE_PEP_STATUS:
-                        ClientProfileParser.parse_pep_status(table, client)
-                        
-                    elif i == ClientProfileParser.TABLE_MARITAL_EDUCATION:
-                        ClientProfileParser.parse_marital_education(table, client)
-                        
-                    elif i == ClientProfileParser.TABLE_EMPLOYMENT_PART1:
-                        ClientProfileParser.parse_employment_part1(table, primary_employment)
-                        
-                    elif i == ClientProfileParser.TABLE_EMPLOYMENT_PART2:
-                        ClientProfileParser.parse_employment_part2(table, primary_employment)
-                        
-                        # Add the parsed employment to client profile
-                        if (
-                            primary_employment.employer
-                            or primary_employment.position
-                            or primary_employment.current_status.status_type
-                        ):
-                            client.employment.append(primary_employment)
-                            
-                    elif i == ClientProfileParser.TABLE_WEALTH_INFO:
-                        ClientProfileParser.parse_wealth_info(table, client)
-                        
-                    elif i == ClientProfileParser.TABLE_INCOME_INFO:
-                        ClientProfileParser.parse_income_info(table, client)
-                        
-                    elif i == ClientProfileParser.TABLE_ACCOUNT_INVESTMENT:
-                        ClientProfileParser.parse_account_investment(table, client)
-                        
-                    elif i == ClientProfileParser.TABLE_ASSETS_INFO:
-                        ClientProfileParser.parse_assets_info(table, client)
-                        
-                except Exception as table_error:
-                    logger.error(f"Error parsing table {i}: {table_error}")
-                    # Continue with next table instead of failing entirely
-                    continue
+            tables = ClientProfileParser.load_tables(file_path)
+            ClientProfileParser.parse_tables(tables, client)
 
             logger.info(f"Successfully parsed profile for {client.first_name} {client.last_name}")
             
@@ -456,6 +555,121 @@ class ClientProfileParser:
         return client
 
 
+# Default table position -> label found only in that table, or (default position of such
+# a table, offset) for tables without a distinctive label
+_TABLE_LAYOUT = {
+    ClientProfileParser.TABLE_BASIC_INFO: "last name",
+    ClientProfileParser.TABLE_CONTACT_INFO: "communication",
+    ClientProfileParser.TABLE_PEP_STATUS: "pep",
+    ClientProfileParser.TABLE_MARITAL_EDUCATION: "marital status",
+    ClientProfileParser.TABLE_EMPLOYMENT_PART1: "current employment and function",
+    ClientProfileParser.TABLE_EMPLOYMENT_PART2: (ClientProfileParser.TABLE_EMPLOYMENT_PART1, 1),
+    ClientProfileParser.TABLE_WEALTH_INFO: "total wealth estimated",
+    ClientProfileParser.TABLE_INCOME_INFO: "estimated total income",
+    ClientProfileParser.TABLE_ACCOUNT_INVESTMENT: "account number",
+    ClientProfileParser.TABLE_ASSETS_INFO: "total asset under management",
+}
+
+# Default table position -> check of a document's table at the planned position. The
+# contact details sit in the value column, which the layout fingerprint leaves out
+_TABLE_CHECKS = {
+    ClientProfileParser.TABLE_CONTACT_INFO: lambda table: ClientProfileParser.is_contact_table(table),
+    ClientProfileParser.TABLE_PEP_STATUS: lambda table: ClientProfileParser.is_pep_table(table),
+}
+
+# Layout fingerprint -> {table position: default table position}
+_LAYOUT_PLANS = {}
+
+# Checkbox token ("☒ Male") -> enum member, in member order, for every checkbox enum
+_CHECKBOX_TOKENS = {
+    enum_type: {f"{ClientProfileParser.CHECKBOX_CHECKED} {member.value}": member for member in enum_type}
+    for enum_type in (
+        Gender, MaritalStatus, WealthRange, IncomeRange, RiskProfile, WealthSource,
+        MandateType, InvestmentExperience, InvestmentHorizon,
+    )
+}
+
+# Row rules per table, in the priority order of the if/elif chains they replace
+_BASIC_INFO_RULES = _RowRules([
+    ("last name", _setter("last_name")),
+    ("first/ middle name", _setter("first_name")),
+    ("address", _setter("address")),
+    ("date of birth", _setter("birth_date")),
+    ("nationality", _setter("nationality")),
+    ("passport no/ unique id", _setter("passport_id")),
+    ("id type", _setter("id_type")),
+    ("id issue date", _setter("id_issue_date")),
+    ("id expiry date", _setter("id_expiry_date")),
+    ("gender", _setter("gender", ClientProfileParser.get_gender)),
+    ("country of domicile", _setter("country_of_domicile")),
+], ignore_case=True)
+
+# Matched on the value column, which differs per client, so not memoised
+_CONTACT_RULES = _RowRules([
+    ("Telephone", _setter("contact_info.telephone", lambda value: value.replace("Telephone", "").strip())),
+    ("E-Mail", _setter("contact_info.email", lambda value: value.replace("E-Mail", "").strip())),
+], memoize=False)
+
+_MARITAL_EDUCATION_RULES = _RowRules([
+    ("marital status", _setter("personal_info.marital_status", ClientProfileParser.get_marital_status)),
+    ("highest education", _setter("personal_info.highest_education")),
+    ("education history", _setter("personal_info.education_history")),
+], ignore_case=True)
+
+_EMPLOYMENT_RULES = _RowRules([
+    ("Employee", ClientProfileParser.set_employee_status),
+    ("Name Employer", _setter("employer", lambda value: value.replace("Name Employer", "").strip())),
+    ("Position", ClientProfileParser.set_position),
+], memoize=False)
+
+_UNCHECKED_STATUS_RULES = _RowRules([
+    ("Previous Profession", _setter(
+        "previous_profession", lambda value: value.replace("Previous Profession:", "").strip())),
+], memoize=False)
+
+_CHECKED_STATUS_RULES = _RowRules([
+    ("Currently not employed", ClientProfileParser.status_setter(EmploymentType.NOT_EMPLOYED)),
+    *_UNCHECKED_STATUS_RULES.rules,
+    ("Retired", ClientProfileParser.status_setter(EmploymentType.RETIRED)),
+], memoize=False)
+
+_WEALTH_RULES = _RowRules([
+    ("Total wealth estimated", _setter("wealth_info.total_wealth_range", ClientProfileParser.get_wealth_range)),
+    ("Origin of wealth", ClientProfileParser.set_wealth_sources),
+    ("estimated assets", _setter("wealth_info.assets", ClientProfileParser.extract_assets), True),
+])
+
+_INCOME_RULES = _RowRules([
+    ("Estimated Total income", _setter("income_info.total_income_range", ClientProfileParser.get_income_range)),
+    ("Country of main source of income", _setter("income_info.source_info")),
+])
+
+_ACCOUNT_INVESTMENT_RULES = _RowRules([
+    ("Account Number", _setter("account_details.account_number")),
+    ("Commercial Account", _setter(
+        "account_details.is_commercial_account",
+        lambda value: f"{ClientProfileParser.CHECKBOX_CHECKED} Yes" in value)),
+    ("Investment Risk Profile", _setter("account_details.risk_profile", ClientProfileParser.get_risk_profile)),
+    ("Type of Mandate", _setter(
+        "account_details.investment_preferences.type_of_mandate", ClientProfileParser.get_mandate_type)),
+    ("Investment Experience", _setter(
+        "account_details.investment_preferences.investment_experience",
+        ClientProfileParser.get_investment_experience)),
+    ("Investment Horizon", _setter(
+        "account_details.investment_preferences.investment_horizon", ClientProfileParser.get_investment_horizon)),
+    ("Expected Transactional Behavior", _setter(
+        "account_details.investment_preferences.expected_transactional_behavior",
+        ClientProfileParser.get_transaction_frequency)),
+    ("Preferred Markets", _setter(
+        "account_details.investment_preferences.preferred_markets", ClientProfileParser.extract_preferred_markets)),
+])
+
+_ASSETS_RULES = _RowRules([
+    ("Total Asset Under Management", _setter("account_details.total_assets", ClientProfileParser.parse_amount)),
+    ("Asset Under Management to transfer", _setter("account_details.transfer_assets", ClientProfileParser.parse_amount)),
+])
+
+
 if __name__ == "__main__":
     # Set default paths
     default_input_path = "C:\\Users\\jekatrinaj\\swisshacks\\data\\level_5\\profile.docx"
@@ -0,0 +1,153 @@
+"""
+Fast reader for the tables of a .docx file.
+
+python-docx builds the object model of the whole document and rebuilds the cells
+of a row on every row.cells access. read_tables() instead streams
+word/document.xml out of the zip with an incremental XML parser, keeps only one
+top-level table in memory at a time and returns every table as rows of cell texts.
+
+The texts follow python-docx exactly: a horizontally merged cell (gridSpan) is
+repeated once per grid column it spans, a vertically merged continuation cell
+(vMerge) repeats the cell above it, and cell text is the text of its paragraphs
+joined with newlines, so parsers see the same values through either reader.
+"""
+import zipfile
+import xml.etree.ElementTree as ElementTree
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_TBL = f"{_W}tbl"
+_TR = f"{_W}tr"
+_TC = f"{_W}tc"
+_P = f"{_W}p"
+_R = f"{_W}r"
+_HYPERLINK = f"{_W}hyperlink"
+_VAL = f"{_W}val"
+_TYPE = f"{_W}type"
+_GRID_BEFORE = f"{_W}trPr/{_W}gridBefore"
+_GRID_SPAN = f"{_W}tcPr/{_W}gridSpan"
+_V_MERGE = f"{_W}tcPr/{_W}vMerge"
+# Text of the run children python-docx reads; w:t and w:br are handled separately
+_RUN_CHARACTERS = {f"{_W}tab": "\t", f"{_W}ptab": "\t", f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-"}
+_T = f"{_W}t"
+_BR = f"{_W}br"
+
+DOCUMENT_PART = "word/document.xml"
+
+
+class TableCell:
+    """Text of one table cell, the only attribute of a python-docx _Cell the parsers use."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class TableRow:
+    """
+    Cells of a table row, one per layout-grid column as in python-docx's _Row.cells.
+
+    cells is None when python-docx could not build the row either (a vertical merge
+    without a cell above it); accessing it then fails like row.cells does.
+    """
+
+    __slots__ = ("cells",)
+
+    def __init__(self, cells: Optional[Tuple[TableCell, ...]]):
+        self.cells = cells
+
+
+class Table:
+    """Rows of a top-level table of the document body."""
+
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: List[TableRow]):
+        self.rows = rows
+
+
+def _run_text(run: ElementTree.Element) -> str:
+    parts = []
+    for child in run:
+        if child.tag == _T:
+            parts.append(child.text or "")
+        elif child.tag == _BR:
+            # Page and column breaks have no text
+            if child.get(_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif child.tag in _RUN_CHARACTERS:
+            parts.append(_RUN_CHARACTERS[child.tag])
+    return "".join(parts)
+
+
+def _paragraph_text(paragraph: ElementTree.Element) -> str:
+    parts = []
+    for child in paragraph:
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        elif child.tag == _HYPERLINK:
+            parts.extend(_run_text(run) for run in child.findall(_R))
+    return "".join(parts)
+
+
+def _int_value(element: Optional[ElementTree.Element], default: int) -> int:
+    if element is None:
+        return default
+    return int(element.get(_VAL, default))
+
+
+def _read_table(tbl: ElementTree.Element) -> Table:
+    rows = []
+    # Grid offset -> (text, grid span) of the cell starting there in the previous row,
+    # with vertical merges already resolved to the text of their first cell
+    above: Dict[int, Tuple[str, int]] = {}
+    for tr in tbl.findall(_TR):
+        offset = _int_value(tr.find(_GRID_BEFORE), 0)
+        starts: Dict[int, Tuple[str, int]] = {}
+        cells = []
+        broken = False
+        for tc in tr.findall(_TC):
+            span = _int_value(tc.find(_GRID_SPAN), 1)
+            v_merge = tc.find(_V_MERGE)
+            if v_merge is not None and v_merge.get(_VAL, "continue") == "continue":
+                # Continuation of a vertical merge: python-docx yields the cell above it
+                cell = above.get(offset)
+                if cell is None:
+                    broken = True
+                    offset += span
+                    continue
+            else:
+                cell = ("\n".join(_paragraph_text(p) for p in tc.findall(_P)), span)
+            starts[offset] = cell
+            cells.extend([TableCell(cell[0])] * cell[1])
+            offset += span
+        rows.append(TableRow(None if broken else tuple(cells)))
+        above = starts
+    return Table(rows)
+
+
+def read_tables(file: Union[str, BinaryIO]) -> List[Table]:
+    """
+    Return the top-level tables of a .docx file, in document order.
+
+    Args:
+        file: Path or binary file object of the .docx file
+    Raises:
+        zipfile.BadZipFile, KeyError or xml.etree.ElementTree.ParseError if the file
+        is not a .docx document
+    """
+    tables = []
+    with zipfile.ZipFile(file) as archive, archive.open(DOCUMENT_PART) as document:
+        depth = 0
+        for event, element in ElementTree.iterparse(document, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            # Children of w:body (document > body > element) are complete at their end event
+            if depth == 2:
+                if element.tag == _TBL:
+                    tables.append(_read_table(element))
+                element.clear()
+    return tables
@@ -0,0 +1,272 @@
+"""
+Decoder for the machine readable zone (MRZ) of passports (TD3 format, ICAO Doc 9303 part 4).
+
+The two 44 character MRZ lines carry the document number, nationality, birth date,
+sex, expiry date and the names of the holder, with check digits (weights 7, 3, 1)
+over the number, both dates, the personal number and the whole second line.
+
+decode_td3() reads the lines as OCR returns them: it removes spaces, maps common
+misreadings of the filler "<" and of digits and letters at positions that can only
+hold one or the other, and records which check digits hold. passport_fields() then
+returns the ClientPassport fields the MRZ vouches for, so a parser only has to read
+the visual zone for the fields the MRZ does not carry or whose checks failed.
+
+Names are the exception: the MRZ only holds their upper-case transliteration
+("MUELLER" for "Müller"), so parsers keep the names of the visual zone, check them
+with name_matches() and only fall back to MRZ.names() when the visual zone has none.
+"""
+import re
+import datetime
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+LINE_LENGTH = 44
+FILLER = "<"
+_WEIGHTS = (7, 3, 1)
+
+# OCR misreadings at positions that can only hold a digit, or only a letter
+_TO_DIGIT = str.maketrans({"O": "0", "Q": "0", "D": "0", "I": "1", "L": "1", "Z": "2",
+                           "S": "5", "G": "6", "B": "8"})
+_TO_LETTER = str.maketrans({"0": "O", "1": "I", "2": "Z", "5": "S", "6": "G", "8": "B"})
+# A run of fillers read as K reaching the end of the names; a shorter run is a real initial
+_MISREAD_FILLERS = re.compile(r"K{3,}[<K]*$")
+# Fillers read as other characters, and separators OCR inserts
+_FILLER_READS = {"«": "<<", "‹": "<", "≤": "<", "(": "<", "[": "<", "{": "<", " ": "", "\t": ""}
+
+# Positions in the second line
+_NUMBER = slice(0, 9)
+_NUMBER_CHECK = 9
+_NATIONALITY = slice(10, 13)
+_BIRTH_DATE = slice(13, 19)
+_BIRTH_DATE_CHECK = 19
+_SEX = 20
+_EXPIRY_DATE = slice(21, 27)
+_EXPIRY_DATE_CHECK = 27
+_PERSONAL_NUMBER = slice(28, 42)
+_PERSONAL_NUMBER_CHECK = 42
+_COMPOSITE_CHECK = 43
+# Trailing fillers OCR may drop from a first line that still counts as complete
+_LOST_FILLERS = 4
+_DIGIT_POSITIONS = (*range(13, 20), *range(21, 28), _COMPOSITE_CHECK)
+# ICAO transliterations of letters that do not decompose into a letter and accents
+_TRANSLITERATIONS = str.maketrans({"Ä": "AE", "Ö": "OE", "Ü": "UE", "ß": "SS", "Å": "AA", "Æ": "AE",
+                                   "Ø": "OE", "Œ": "OE", "Þ": "TH", "Ð": "D", "Ł": "L"})
+
+
+def character_value(character: str) -> int:
+    """Value of an MRZ character in a check digit: digits as is, A-Z from 10 to 35, "<" as 0."""
+    if character.isdigit():
+        return int(character)
+    if "A" <= character <= "Z":
+        return ord(character) - ord("A") + 10
+    if character == FILLER:
+        return 0
+    raise ValueError(f"Invalid MRZ character {character!r}")
+
+
+def check_digit(data: str) -> str:
+    """Check digit of an MRZ field: sum of the character values weighted 7, 3, 1, ... modulo 10."""
+    return str(sum(character_value(c) * _WEIGHTS[i % 3] for i, c in enumerate(data)) % 10)
+
+
+def _is_valid_check(data: str, digit: str, optional: bool = False) -> bool:
+    # An empty optional field may have a filler as its check digit
+    if optional and digit == FILLER and data.strip(FILLER) == "":
+        return True
+    try:
+        return check_digit(data) == digit
+    except ValueError:
+        return False
+
+
+def normalize_line(text: Optional[str]) -> str:
+    """Upper-case an OCR'd MRZ line, drop spaces and map misread fillers to "<"."""
+    text = (text or "").upper()
+    for read, character in _FILLER_READS.items():
+        text = text.replace(read, character)
+    return text
+
+
+def _fix_positions(line: str, positions, table) -> str:
+    characters = list(line)
+    for position in positions:
+        if position < len(characters):
+            characters[position] = characters[position].translate(table)
+    return "".join(characters)
+
+
+def _pad(line: str) -> str:
+    # OCR tends to lose trailing fillers, which carry no data
+    return line[:LINE_LENGTH].ljust(LINE_LENGTH, FILLER)
+
+
+def _decode_date(text: str, expiry: bool) -> Optional[str]:
+    """YYMMDD as YYYY-MM-DD: birth dates in the past, expiry dates within 50 years from now."""
+    if not text.isdigit():
+        return None
+    today = datetime.date.today()
+    year = 2000 + int(text[:2])
+    if (expiry and year > today.year + 50) or (not expiry and year > today.year):
+        year -= 100
+    try:
+        return datetime.date(year, int(text[2:4]), int(text[4:6])).isoformat()
+    except ValueError:
+        return None
+
+
+def mrz_name(text: str, expand_umlauts: bool = True) -> str:
+    """
+    Transliterate a name the way the MRZ writes it, with spaces for fillers:
+    "Müller-Lüdenscheidt" -> "MUELLER LUEDENSCHEIDT", or "MULLER LUDENSCHEIDT"
+    without expand_umlauts, as some issuing states write it.
+    """
+    text = text.upper()
+    if expand_umlauts:
+        text = text.translate(_TRANSLITERATIONS)
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    text = text.replace("'", "").replace("\u2019", "")
+    return " ".join("".join(c if "A" <= c <= "Z" else " " for c in text).split())
+
+
+def name_matches(visual: Optional[str], mrz: Optional[str]) -> bool:
+    """
+    True if a name read in the visual zone transliterates to the MRZ name. Long names
+    are truncated in the MRZ, so it only has to be a prefix of the transliteration;
+    spaces are ignored, as OCR boxes of one region are joined without them.
+    """
+    if not visual or not mrz:
+        return False
+    mrz = mrz.replace(" ", "")
+    return any(mrz_name(visual, expand).replace(" ", "").startswith(mrz) for expand in (True, False))
+
+
+@dataclass
+class MRZ:
+    """Decoded TD3 machine readable zone; checks holds whether each check digit is valid."""
+
+    line1: str
+    line2: str
+    document_type: str
+    issuing_state: str
+    surname: str
+    given_names: str
+    number: str
+    nationality: str
+    birth_date: Optional[str]
+    sex: Optional[str]
+    expiry_date: Optional[str]
+    personal_number: str
+    checks: Dict[str, bool] = field(default_factory=dict)
+    # Characters OCR returned for the first line; a short read may have lost names
+    line1_read_length: int = LINE_LENGTH
+    # True if the names end in fillers read as K, so where they end is not known
+    names_misread: bool = False
+
+    @property
+    def valid(self) -> bool:
+        """True if every check digit holds."""
+        return all(self.checks.values())
+
+    @property
+    def header_valid(self) -> bool:
+        """True if the first line starts with a passport type and an issuing state code."""
+        return self.document_type.startswith("P") and len(self.issuing_state) == 3 and self.issuing_state.isalpha()
+
+    @property
+    def names_valid(self) -> bool:
+        """
+        True if the first line reads as a complete passport name line (names have no
+        check digit): not cut short, without fillers misread as K, letters only.
+        """
+        names = self.line1[5:]
+        return (self.header_valid and self.line1_read_length >= LINE_LENGTH - _LOST_FILLERS
+                and not self.names_misread
+                and "<<" in names.strip(FILLER) and all(c == FILLER or "A" <= c <= "Z" for c in names))
+
+    def passport_fields(self) -> Dict[str, str]:
+        """
+        ClientPassport fields the MRZ vouches for, with values as the parsers return them.
+
+        The number and dates need their own check digits. Sex is not covered by any
+        check digit, so it is only taken if every check of the second line holds. The
+        issuing state is taken if the first line starts like a passport MRZ. Names are
+        left out, see names().
+        """
+        fields = {}
+        if self.checks.get("number"):
+            fields["number"] = self.number
+        if self.checks.get("birth_date") and self.birth_date:
+            fields["birth_date"] = self.birth_date
+        if self.checks.get("expiry_date") and self.expiry_date:
+            fields["expiry_date"] = self.expiry_date
+        if self.valid and self.sex in ("M", "F"):
+            fields["sex"] = self.sex
+        if self.header_valid:
+            fields["country_code"] = self.issuing_state
+        return fields
+
+    def names(self) -> Dict[str, str]:
+        """
+        surname and given_name of a complete, well-formed first line, in the upper-case
+        MRZ transliteration: to check the visual zone names with, or to use when the
+        visual zone has none.
+        """
+        if not self.names_valid:
+            return {}
+        names = {"surname": self.surname}
+        if self.given_names:
+            names["given_name"] = self.given_names
+        return names
+
+
+def decode_td3(line1: Optional[str], line2: Optional[str]) -> MRZ:
+    """
+    Decode the two lines of a passport MRZ.
+
+    Args:
+        line1: First MRZ line (document type, issuing state, names), as read by OCR
+        line2: Second MRZ line (number, nationality, dates, sex), as read by OCR
+    Raises:
+        ValueError if the lines are too short to be an MRZ
+    """
+    line1, line2 = normalize_line(line1), normalize_line(line2)
+    line1_read_length = len(line1)
+    if len(line1) < 10 or len(line2) < _COMPOSITE_CHECK - 1:
+        raise ValueError(f"Not a TD3 MRZ: {line1!r} / {line2!r}")
+    line1 = _pad(line1)
+    line2 = _fix_positions(_pad(line2), _DIGIT_POSITIONS, _TO_DIGIT)
+    line2 = _fix_positions(line2, (*range(10, 13), _SEX), _TO_LETTER)
+    line1 = line1[:2] + line1[2:].translate(_TO_LETTER)
+
+    # Trailing fillers are often read as K; such names are not trusted, see names_valid
+    names = line1[5:].rstrip(FILLER)
+    misread = _MISREAD_FILLERS.search(names)
+    if misread:
+        names = names[:misread.start()].rstrip(FILLER)
+    surname, _, given_names = names.partition("<<")
+    sex = line2[_SEX]
+    checks = {
+        "number": _is_valid_check(line2[_NUMBER], line2[_NUMBER_CHECK]),
+        "birth_date": _is_valid_check(line2[_BIRTH_DATE], line2[_BIRTH_DATE_CHECK]),
+        "expiry_date": _is_valid_check(line2[_EXPIRY_DATE], line2[_EXPIRY_DATE_CHECK]),
+        "personal_number": _is_valid_check(line2[_PERSONAL_NUMBER], line2[_PERSONAL_NUMBER_CHECK], optional=True),
+        "composite": _is_valid_check(line2[0:10] + line2[13:20] + line2[21:43], line2[_COMPOSITE_CHECK]),
+    }
+    return MRZ(
+        line1=line1,
+        line2=line2,
+        document_type=line1[0:2].strip(FILLER),
+        issuing_state=line1[2:5].strip(FILLER),
+        surname=surname.replace(FILLER, " ").strip(),
+        given_names=given_names.replace(FILLER, " ").strip(),
+        number=line2[_NUMBER].strip(FILLER),
+        nationality=line2[_NATIONALITY].strip(FILLER),
+        birth_date=_decode_date(line2[_BIRTH_DATE], expiry=False),
+        sex=sex if sex in ("M", "F") else None,
+        expiry_date=_decode_date(line2[_EXPIRY_DATE], expiry=True),
+        personal_number=line2[_PERSONAL_NUMBER].strip(FILLER),
+        checks=checks,
+        line1_read_length=line1_read_length,
+        names_misread=misread is not None,
+    )
@@ -0,0 +1,81 @@
+"""
+Process-wide registry of the OCR models.
+
+Building an easyocr.Reader loads the detection and recognition networks from disk
+and takes seconds, so every parser of a process shares one Reader per language
+set, created on first use. Torch's thread pools are sized once per process with
+set_torch_threads(), before the first model runs.
+
+Settings are read from the environment:
+    OCR_TORCH_THREADS    intra-op threads of torch (default: torch's own choice)
+    OCR_GPU              "0" to keep the models on the CPU (default: GPU if there is one)
+"""
+import os
+import logging
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_readers: Dict[Tuple[str, ...], "easyocr.Reader"] = {}
+_readers_lock = threading.Lock()
+_torch_threads: Optional[int] = None
+
+
+def _import_easyocr():
+    try:
+        import easyocr
+    except ImportError:
+        raise ImportError("The easyocr passport backend requires EasyOCR. Install it with: pip install easyocr")
+    return easyocr
+
+
+def set_torch_threads(threads: int, interop_threads: int = 1):
+    """
+    Size torch's thread pools for this process.
+
+    Call it before the first model runs: torch only accepts the inter-op thread
+    count until then, and processes running side by side should split the cores
+    instead of each starting a pool per core.
+
+    Args:
+        threads: Threads used inside one operator (matrix products, convolutions)
+        interop_threads: Threads running independent operators in parallel
+    """
+    global _torch_threads
+    threads = max(1, int(threads))
+    # Read by the OpenMP and MKL runtimes when torch is first imported
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(max(1, int(interop_threads)))
+    except RuntimeError:
+        # Already fixed once torch has run parallel work in this process
+        logger.debug("torch inter-op threads already set, keeping %d", torch.get_num_interop_threads())
+    _torch_threads = threads
+
+
+def get_reader(languages: Sequence[str] = ("en",)) -> "easyocr.Reader":
+    """Return the process-wide easyocr.Reader for languages, loading the models on first use."""
+    key = tuple(languages)
+    reader = _readers.get(key)
+    if reader is None:
+        with _readers_lock:
+            reader = _readers.get(key)
+            if reader is None:
+                easyocr = _import_easyocr()
+                if _torch_threads is None and os.environ.get("OCR_TORCH_THREADS"):
+                    set_torch_threads(int(os.environ["OCR_TORCH_THREADS"]))
+                reader = _readers[key] = easyocr.Reader(list(key), gpu=os.environ.get("OCR_GPU", "1") != "0")
+                logger.info(f"Loaded EasyOCR models for {', '.join(key)}")
+    return reader
+
+
+def clear_readers():
+    """Drop the loaded readers, so the next get_reader() loads the models again."""
+    with _readers_lock:
+        _readers.clear()
@@ -0,0 +1,211 @@
+"""
+Pool of warm OCR worker processes for passport images.
+
+Each worker process loads the EasyOCR models once, in the pool initializer, with
+torch limited to threads_per_worker threads so that the workers together use the
+cores without oversubscribing them. warm_up() (run by the constructor) starts every
+worker up front, so the first passports parsed pay no model loading.
+
+Images reach the workers through shared memory instead of being pickled: the
+caller decodes a batch of images into one multiprocessing.shared_memory block and
+only sends its name and the layout of each array; the worker maps the block and
+parses the arrays in place. Only the parsed ClientPassport objects travel back.
+
+Batch callers use parse_many(), which splits the images into batches of
+batch_size, one task per batch; single-document callers use parse(). The
+process-wide pool of get_ocr_pool() is configured from the environment:
+    OCR_POOL_WORKERS     worker processes (default: cores // OCR_TORCH_THREADS)
+    OCR_TORCH_THREADS    torch threads per worker (default: 2)
+"""
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+import concurrent.futures
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from client_data.client_passport import ClientPassport
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREADS_PER_WORKER = 2
+DEFAULT_BATCH_SIZE = 8
+# Offsets of the images in a shared block are aligned to cache lines
+_ALIGNMENT = 64
+
+# (offset in the block, shape, dtype) of one image
+ImageLayout = Tuple[int, Tuple[int, ...], str]
+
+# Parser of a worker process, built by _init_worker
+_worker_parser = None
+
+
+def _init_worker(threads: int, recognition_only: bool, mrz_first: bool, threshold: float):
+    global _worker_parser
+    from data_parsing.ocr_models import set_torch_threads
+
+    # Before any model is built: torch only accepts the inter-op thread count until it first runs
+    set_torch_threads(threads)
+    from data_parsing.parse_passport_easyocr import PassportParserEasyOCR
+
+    _worker_parser = PassportParserEasyOCR(threshold=threshold, recognition_only=recognition_only,
+                                           mrz_first=mrz_first)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def _parse_shared(name: str, layouts: List[ImageLayout], skip_errors: bool) -> List[Optional[ClientPassport]]:
+    """Worker side of a batch: parse the images laid out in the shared block name."""
+    block = shared_memory.SharedMemory(name=name)
+    images = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+              for offset, shape, dtype in layouts]
+    try:
+        return _worker_parser.parse_images(images, skip_errors)
+    finally:
+        del images
+        try:
+            block.close()
+        except BufferError:
+            # The traceback of a failed parse still references the arrays, the mapping goes with it
+            pass
+
+
+def _share(images: Sequence[np.ndarray]) -> Tuple[shared_memory.SharedMemory, List[ImageLayout]]:
+    """Copy images into a new shared memory block and return it with the layout of each image."""
+    layouts = []
+    size = 0
+    for image in images:
+        layouts.append((size, image.shape, image.dtype.str))
+        size += -(-image.nbytes // _ALIGNMENT) * _ALIGNMENT
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for image, (offset, shape, dtype) in zip(images, layouts):
+        np.ndarray(shape, dtype=image.dtype, buffer=block.buf, offset=offset)[...] = image
+    return block, layouts
+
+
+def _release(block: shared_memory.SharedMemory):
+    block.close()
+    block.unlink()
+
+
+class OCRWorkerPool:
+    """
+    Warm worker processes parsing passport images with PassportParserEasyOCR.
+
+    Args:
+        workers: Worker processes (default: cores // threads_per_worker, at least 1)
+        threads_per_worker: Torch threads of each worker
+        recognition_only: Parse with the detection-free recognition of PassportParserEasyOCR
+        mrz_first: Take the fields the MRZ carries from the decoded MRZ, see PassportParserEasyOCR
+        threshold: OCR confidence threshold of the parsers
+        batch_size: Images per task in parse_many()
+        warm: Start the workers and load their models right away
+    """
+
+    def __init__(self, workers: Optional[int] = None, threads_per_worker: int = DEFAULT_THREADS_PER_WORKER,
+                 recognition_only: bool = True, mrz_first: bool = True, threshold: float = 0.1,
+                 batch_size: int = DEFAULT_BATCH_SIZE, warm: bool = True):
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.workers = workers or max(1, (os.cpu_count() or 1) // self.threads_per_worker)
+        self.batch_size = max(1, batch_size)
+        # Forking a process that already runs torch threads can deadlock the child
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(self.threads_per_worker, recognition_only, mrz_first, threshold))
+        if warm:
+            self.warm_up()
+
+    def warm_up(self):
+        """Start every worker process and wait until each has loaded its models."""
+        # Tasks submitted together start one process each, all running the initializer
+        pids = {future.result() for future in [self._executor.submit(_ready) for _ in range(self.workers)]}
+        logger.info(f"{len(pids)} OCR workers ready with {self.threads_per_worker} torch threads each")
+
+    def _submit(self, images: Sequence[np.ndarray], skip_errors: bool) -> concurrent.futures.Future:
+        block, layouts = _share(images)
+        try:
+            future = self._executor.submit(_parse_shared, block.name, layouts, skip_errors)
+        except BaseException:
+            _release(block)
+            raise
+        # The worker has mapped and parsed the block once its task is done
+        future.add_done_callback(lambda _: _release(block))
+        return future
+
+    def parse_images(self, images: Sequence[np.ndarray], skip_errors: bool = False) -> List[Optional[ClientPassport]]:
+        """
+        Parse decoded passport images on the workers, batch_size images per task.
+
+        Returns:
+            One ClientPassport per image, in order (None for failures with skip_errors)
+        """
+        futures = [self._submit(images[start:start + self.batch_size], skip_errors)
+                   for start in range(0, len(images), self.batch_size)]
+        return [passport for future in futures for passport in future.result()]
+
+    def parse_many(self, passport_file_paths: Sequence[Union[str, Path]],
+                   skip_errors: bool = False) -> List[Optional[ClientPassport]]:
+        """
+        Parse passport image files on the workers.
+
+        Args:
+            passport_file_paths: Paths of the passport images
+            skip_errors: Return None for an image that cannot be read or parsed instead of raising
+
+        Returns:
+            One ClientPassport per path, in order
+        """
+        images = []
+        for path in passport_file_paths:
+            try:
+                images.append(np.asarray(Image.open(path)))
+            except (OSError, UnidentifiedImageError):
+                if not skip_errors:
+                    raise
+                images.append(None)
+
+        parsed = iter(self.parse_images([image for image in images if image is not None], skip_errors))
+        return [None if image is None else next(parsed) for image in images]
+
+    def parse(self, passport_file_path: Union[str, Path]) -> ClientPassport:
+        """Parse one passport image file on a worker."""
+        return self.parse_many([passport_file_path])[0]
+
+    def parse_file(self, image_file: BinaryIO) -> ClientPassport:
+        """Parse a passport image read from an open binary file on a worker."""
+        return self.parse_images([np.asarray(Image.open(image_file))])[0]
+
+    def close(self):
+        """Stop the worker processes."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_pool: Optional[OCRWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_ocr_pool() -> OCRWorkerPool:
+    """Return the process-wide OCR worker pool, starting it from the environment on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                threads = int(os.environ.get("OCR_TORCH_THREADS", DEFAULT_THREADS_PER_WORKER))
+                workers = os.environ.get("OCR_POOL_WORKERS")
+                _pool = OCRWorkerPool(workers=int(workers) if workers else None, threads_per_worker=threads)
+                atexit.register(_pool.close)
+    return _pool
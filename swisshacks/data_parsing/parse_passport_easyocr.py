@@ -1,16 +1,26 @@
 # system imports
+import re
 import argparse
+import datetime
 from pathlib import Path
+from typing import BinaryIO, Optional
 import json
 
 # third party imports
-import easyocr
+try:
+    # Internals of EasyOCR 1.7 used by recognition_only, not part of its public API
+    from easyocr.recognition import get_text
+    from easyocr.utils import get_image_list, reformat_input
+except ImportError:
+    get_text = get_image_list = reformat_input = None
 import numpy as np
 import cv2  # OpenCV for visualization
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 
 # local imports
 from client_data.client_passport import ClientPassport, GenderEnum
+from data_parsing.mrz import decode_td3, name_matches
+from data_parsing.ocr_models import get_reader
 
 FIELD_BB ={
     "issuing_country": [(10,21), (370,21), (370,40), (10,40)],
@@ -29,102 +39,364 @@ FIELD_BB ={
 }
 
 
+# Height EasyOCR's recognition models take their input at; crops are resized to it
+RECOGNITION_HEIGHT = 64
+# Fields still read with text detection in recognition-only mode: whether the signature
+# box holds anything is decided by the detector, the recognizer alone always returns text
+DETECTED_FIELDS = ("signature",)
+# Regions of the machine readable zone, decoded first with mrz_first=True
+MRZ_FIELDS = ("MRZ_line1", "MRZ_line2")
+# Date regions, brought to the YYYY-MM-DD of the decoded MRZ with mrz_first=True
+DATE_FIELDS = ("birth_date", "issue_date", "expiry_date")
+
+# Visual-zone date layouts: year first, day first, and day with a month name
+_ISO_DATE = re.compile(r"(\d{4})\s*[-./ ]\s*(\d{1,2})\s*[-./ ]\s*(\d{1,2})")
+_NUMERIC_DATE = re.compile(r"(\d{1,2})\s*[-./ ]\s*(\d{1,2})\s*[-./ ]\s*(\d{4})")
+_NAMED_DATE = re.compile(r"(\d{1,2})\s*[-./ ]?\s*([A-ZÄÉÛ]{3,4})[A-ZÄÉÛ/ ]*?\s*[-./ ]?\s*(\d{4})")
+# Month name prefixes in English, German and French
+_MONTHS = {
+    "JAN": 1, "FEB": 2, "FEV": 2, "FÉV": 2, "MAR": 3, "MÄR": 3, "APR": 4, "AVR": 4, "MAY": 5, "MAI": 5,
+    "JUN": 6, "JUIN": 6, "JUL": 7, "JUIL": 7, "AUG": 8, "AOU": 8, "AOÛ": 8, "SEP": 9, "OCT": 10, "OKT": 10,
+    "NOV": 11, "DEC": 12, "DÉC": 12, "DEZ": 12,
+}
+
+
+def crop_image(np_image: np.ndarray, bounding_box: list[tuple[int, int]]) -> np.ndarray:
+    """
+    Crop the image using the bounding box coordinates.
+    """
+    # Calculate the min/max coordinates to crop the image
+    x_coords = [point[0] for point in bounding_box]
+    y_coords = [point[1] for point in bounding_box]
+
+    min_x, max_x = max(0, min(x_coords)), min(np_image.shape[1], max(x_coords))
+    min_y, max_y = max(0, min(y_coords)), min(np_image.shape[0], max(y_coords))
+
+    # Crop the image to the region
+    return np_image[min_y:max_y, min_x:max_x]
+
+
+def join_text(values) -> str:
+    """
+    Join the text of the boxes found in a region, skipping the ones below the threshold.
+    """
+    if values is None:
+        return ""
+    if isinstance(values, str):
+        return values
+    return "".join(value for value in values if value is not None)
+
+
+def post_process_MRZ(extracted_fields: dict) -> dict:
+    """
+    Post-process the extracted text to clean it up.
+    """
+    # Join the extracted text and strip whitespace
+    passport_mrz = []
+    for field in MRZ_FIELDS:
+        passport_mrz.append(join_text(extracted_fields.pop(field)))
+    extracted_fields["passport_mrz"] = passport_mrz
+    return extracted_fields
+
+
+def post_process_signature(extracted_fields: dict) -> dict:
+    """
+    Post-process the extracted signature field.
+    """
+    # Check if the signature field is empty or contains only None values
+    if extracted_fields["signature"] is None or all(value is None for value in extracted_fields["signature"]):
+        extracted_fields["signature"] = False
+    else:
+        extracted_fields["signature"] = True
+    return extracted_fields
+
+
+def post_process_sex(extracted_fields: dict) -> dict:
+    if extracted_fields["sex"] is None:
+        raise ValueError("Sex was not parsed correctly")
+
+    extracted_fields["sex"] = GenderEnum.convert_str_to_enum(extracted_fields["sex"])
+    return extracted_fields
+
+
+def normalize_date(text) -> Optional[str]:
+    """
+    Bring a date read from the visual zone to YYYY-MM-DD. Text that does not read as
+    a date is returned as it is, None stays None.
+    """
+    if text is None:
+        return None
+    if not isinstance(text, str):
+        # A date split over several text boxes
+        text = " ".join(value for value in text if value is not None)
+    upper = text.upper()
+    match = _ISO_DATE.search(upper)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = _NUMERIC_DATE.search(upper)
+        if match:
+            day, month, year = match.groups()
+        else:
+            match = _NAMED_DATE.search(upper)
+            if not match:
+                return text
+            day, name, year = match.groups()
+            month = _MONTHS.get(name, _MONTHS.get(name[:3]))
+            if month is None:
+                return text
+    try:
+        return datetime.date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        return text
+
+
+def build_passport(extraction_results: dict) -> ClientPassport:
+    """
+    Turn the OCR text per FIELD_BB region into a ClientPassport.
+    """
+    post_process_MRZ(extraction_results)
+    post_process_signature(extraction_results)
+    post_process_sex(extraction_results)
+
+    return ClientPassport(**extraction_results)
+
+
+def load_image(passport_file_path: Path) -> np.ndarray:
+    if not passport_file_path.exists():
+        raise FileNotFoundError(f"File '{passport_file_path}' does not exist")
+
+    return np.array(Image.open(passport_file_path))
+
+
 class PassportParserEasyOCR:
+    """
+    Reads the fields of a passport image at the fixed FIELD_BB positions with EasyOCR.
+
+    By default every region goes through Reader.readtext, which runs the CRAFT text
+    detector on the crop before recognizing the text it finds. With
+    recognition_only=True the detector is skipped for all regions but DETECTED_FIELDS:
+    the region crops themselves are the text boxes, and the crops of one field are
+    sent to the recognition network as one batch, across all passports given to
+    parse_many. It relies on EasyOCR internals; when they are missing, the regions
+    are read with readtext instead.
+
+    With mrz_first=True only the two MRZ lines are read at first. The fields whose
+    values the decoded MRZ vouches for (see mrz.MRZ.passport_fields) are taken from
+    it, and the visual zone is only read for the other fields: the ones the MRZ does
+    not carry (citizenship, issuing country, issue date, signature) and the ones
+    whose check digits failed. Names are always read from the visual zone, as the
+    MRZ only has their transliteration; the MRZ names are the fallback for a name
+    the visual zone misses. All dates then come as YYYY-MM-DD, like the MRZ ones.
+    """
+
     def __init__(self, *args, **kwargs):
-        self.reader = easyocr.Reader(['en'])  # specify the language
+        # Shared by every parser of the process, the models are only loaded once
+        self.reader = get_reader(['en'])  # specify the language
         self.threshold = 0.1  # default threshold for OCR confidence
-        
+        self.recognition_only = False
+        self.mrz_first = False
+
         if "threshold" in kwargs:
             self.threshold = kwargs["threshold"]
+        if "recognition_only" in kwargs:
+            self.recognition_only = kwargs["recognition_only"]
+        if "mrz_first" in kwargs:
+            self.mrz_first = kwargs["mrz_first"]
+        if self.recognition_only and get_text is None:
+            print("This EasyOCR version lacks the internals recognition_only needs, using readtext")
+            self.recognition_only = False
 
-    def parse(self, passport_file_path: Path) -> ClientPassport:
-        
-        def crop_image(np_image: np.ndarray, bounding_box: list[tuple[int, int]]) -> np.ndarray:
-            """
-            Crop the image using the bounding box coordinates.
-            """
-            # Calculate the min/max coordinates to crop the image
-            x_coords = [point[0] for point in bounding_box]
-            y_coords = [point[1] for point in bounding_box]
-            
-            min_x, max_x = max(0, min(x_coords)), min(np_image.shape[1], max(x_coords))
-            min_y, max_y = max(0, min(y_coords)), min(np_image.shape[0], max(y_coords))
-            
-            # Crop the image to the region
-            return np_image[min_y:max_y, min_x:max_x]
-        
-        def post_process_MRZ(extracted_fields: dict) -> dict:
-            """
-            Post-process the extracted text to clean it up.
-            """
-            # Join the extracted text and strip whitespace
-            passport_mrz = []
-            for field in ["MRZ_line1", "MRZ_line2"]:
-                cleaned_list = [value for value in extracted_fields[field] if value is not None]
-                passport_mrz.append("".join(cleaned_list))
-                extracted_fields.pop(field)
-            extracted_fields["passport_mrz"] = passport_mrz  
-            return extracted_fields 
-        
-        def post_process_signature(extracted_fields: dict) -> dict:
-            """
-            Post-process the extracted signature field.
-            """
-            # Check if the signature field is empty or contains only None values
-            if extracted_fields["signature"] is None or all(value is None for value in extracted_fields["signature"]):
-                extracted_fields["signature"] = False
+    def read_region(self, region_name: str, region_image: np.ndarray):
+        """
+        Detect and recognize the text of one region: None if there is none, the text
+        of a single box, or a list with the text of each box (None below the threshold).
+        """
+        region_results = self.reader.readtext(region_image)
+
+        if not region_results:
+            print(f"No text found in region '{region_name}'")
+            return None
+
+        extracted_text = []
+
+        for r_bbox, text, prob in region_results:
+            # Only include results above the confidence threshold
+            if prob >= self.threshold:
+                # Add text to the filtered list
+                extracted_text.append(text)
             else:
-                extracted_fields["signature"] = True
-            return extracted_fields
-        
-        def post_process_sex(extracted_fields: dict) -> dict:
-            if extracted_fields["sex"] is None:
-                raise ValueError("Sex was not parsed correctly")
-            
-            extracted_fields["sex"] = GenderEnum.convert_str_to_enum(extracted_fields["sex"]) 
-            return extracted_fields  
-            
-        
-        # Read the image using EasyOCR
-        if not passport_file_path.exists():
-            raise FileNotFoundError(f"File '{passport_file_path}' does not exist")
-        
-        image = Image.open(passport_file_path)
-        image_np = np.array(image)
-            
-        extraction_results = dict()    
-            
-        for region_name, bbox in FIELD_BB.items():
-            # Crop the image using the bounding box
-            region_image = crop_image(image_np, bbox)
-            
-            # Process the region
-            region_results = self.reader.readtext(region_image)
-            
-            if not region_results:
-                extraction_results[region_name] = None
+                print(f"Text detection: {text} with Low confidence: {prob}")
+                extracted_text.append(None)
+
+        return extracted_text if len(extracted_text) > 1 else extracted_text[0]
+
+    def recognize_regions(self, region_name: str, region_images: list[np.ndarray]) -> list:
+        """
+        Recognize the text of the same region of several passports in one batch,
+        without text detection: each crop is read as a single line of text.
+
+        Returns:
+            One text per crop, None if it is empty or below the confidence threshold
+        """
+        image_list = []
+        max_width = RECOGNITION_HEIGHT
+        for index, region_image in enumerate(region_images):
+            _, grey = reformat_input(region_image)
+            height, width = grey.shape
+            # The whole crop is the text box; its index comes back as the box of the result
+            crops, crop_width = get_image_list([[0, width, 0, height]], [], grey, model_height=RECOGNITION_HEIGHT)
+            image_list.extend((index, crop) for _, crop in crops)
+            max_width = max(max_width, crop_width)
+
+        texts = [None] * len(region_images)
+        if not image_list:
+            return texts
+
+        reader = self.reader
+        # Same characters and settings as readtext uses for its recognition step
+        ignore_char = ''.join(set(reader.character) - set(reader.lang_char))
+        results = get_text(reader.character, RECOGNITION_HEIGHT, int(max_width), reader.recognizer,
+                           reader.converter, image_list, ignore_char, batch_size=len(image_list),
+                           workers=0, device=reader.device)
+
+        for index, text, prob in results:
+            if not text.strip():
                 print(f"No text found in region '{region_name}'")
+            elif prob >= self.threshold:
+                texts[index] = text
+            else:
+                print(f"Text detection: {text} with Low confidence: {prob}")
+        return texts
+
+    def read_regions(self, region_names, images: list[np.ndarray]) -> dict:
+        """
+        Read the given FIELD_BB regions of every image.
+
+        Returns:
+            Region name -> one result per image, as read_region() returns it
+        """
+        extracted = {}
+        for region_name in region_names:
+            region_images = [crop_image(image, FIELD_BB[region_name]) for image in images]
+            if self.recognition_only and region_name not in DETECTED_FIELDS:
+                extracted[region_name] = self.recognize_regions(region_name, region_images)
+            else:
+                extracted[region_name] = [self.read_region(region_name, region_image)
+                                          for region_image in region_images]
+        return extracted
+
+    def read_mrz_first(self, images: list[np.ndarray]) -> list[dict]:
+        """
+        Read the MRZ of every image, then only the regions of the fields it did not fill.
+
+        Returns:
+            One extraction result per image, region name -> text as for build_passport()
+        """
+        extracted = self.read_regions(MRZ_FIELDS, images)
+        results = [{name: texts[index] for name, texts in extracted.items()} for index in range(len(images))]
+        mrz_names = [{} for _ in results]
+        for result, names in zip(results, mrz_names):
+            try:
+                mrz = decode_td3(join_text(result["MRZ_line1"]), join_text(result["MRZ_line2"]))
+            except ValueError as e:
+                print(f"MRZ not decoded: {e}")
                 continue
-            
-            extracted_text = []
-            
-            for r_bbox, text, prob in region_results:
-            # Only include results above the confidence threshold
-                if prob >= self.threshold:
-                    # Add text to the filtered list
-                    extracted_text.append(text)
-                else:
-                    print(f"Text detection: {text} with Low confidence: {prob}")
-                    extracted_text.append(None)
-                
-                extraction_results[region_name] = extracted_text if len(extracted_text) > 1 else extracted_text[0]
-        
-        post_process_MRZ(extraction_results)
-        post_process_signature(extraction_results)
-        post_process_sex(extraction_results)
-        
-        return ClientPassport(**extraction_results)
-    
+            # The decoded fields are named like their FIELD_BB regions
+            result.update(mrz.passport_fields())
+            names.update(mrz.names())
+
+        # The visual zone only for the fields the MRZ did not fill, batched over the images missing them
+        for region_name in FIELD_BB:
+            missing = [index for index, result in enumerate(results) if region_name not in result]
+            if not missing:
+                continue
+            texts = self.read_regions([region_name], [images[index] for index in missing])[region_name]
+            for index, text in zip(missing, texts):
+                results[index][region_name] = text
+
+        for result, names in zip(results, mrz_names):
+            for region_name, mrz_value in names.items():
+                visual = join_text(result[region_name]).strip()
+                if not visual:
+                    result[region_name] = mrz_value
+                elif not name_matches(visual, mrz_value):
+                    print(f"Visual zone {region_name} {visual!r} does not match the MRZ name {mrz_value!r}")
+
+        # The same date format whether a date came from the MRZ or the visual zone
+        for result in results:
+            for region_name in DATE_FIELDS:
+                result[region_name] = normalize_date(result[region_name])
+        return results
+
+    def parse_image(self, image_np: np.ndarray) -> ClientPassport:
+        """
+        Parse a passport image that is already decoded into an array (as np.array(Image.open(...))).
+        """
+        return self.parse_images([image_np])[0]
+
+    def parse_images(self, images: list[np.ndarray], skip_errors: bool = False) -> list[Optional[ClientPassport]]:
+        """
+        Parse many decoded passport images.
+
+        In recognition-only mode the field crops of all images are recognized
+        together, one batch per field, which is where most of the speedup comes from.
+
+        Args:
+            images: Passport images as arrays
+            skip_errors (bool): Return None for an image that cannot be parsed instead of raising
+
+        Returns:
+            List[ClientPassport]: One passport per image, in order
+        """
+        if self.mrz_first:
+            results = self.read_mrz_first(images)
+        else:
+            extracted = self.read_regions(FIELD_BB, images)
+            results = [{name: texts[index] for name, texts in extracted.items()} for index in range(len(images))]
+
+        passports = []
+        for result in results:
+            try:
+                passports.append(build_passport(result))
+            except ValueError:
+                if not skip_errors:
+                    raise
+                passports.append(None)
+        return passports
+
+    def parse(self, passport_file_path: Path) -> ClientPassport:
+        return self.parse_image(load_image(passport_file_path))
+
+    def parse_file(self, image_file: BinaryIO) -> ClientPassport:
+        """
+        Parse a passport image read from an open binary file.
+        """
+        return self.parse_image(np.array(Image.open(image_file)))
+
+    def parse_many(self, passport_file_paths: list[Path], skip_errors: bool = False) -> list[Optional[ClientPassport]]:
+        """
+        Parse many passport images, see parse_images().
+
+        Args:
+            passport_file_paths: Paths of the passport images
+            skip_errors (bool): Return None for an image that cannot be read or parsed instead of raising
+
+        Returns:
+            List[ClientPassport]: One passport per path, in order
+        """
+        images = []
+        for path in passport_file_paths:
+            try:
+                images.append(load_image(Path(path)))
+            except (OSError, UnidentifiedImageError):
+                if not skip_errors:
+                    raise
+                images.append(None)
+
+        parsed = iter(self.parse_images([image for image in images if image is not None], skip_errors))
+        return [None if image is None else next(parsed) for image in images]
+
     def visualize_bounding_boxes(self, passport_file_path: Path):
         """
         Visualize the bounding boxes on the passport image.
@@ -173,6 +445,10 @@ def parse_arguments():
                         help="Visualize bounding boxes on the image and save")
     parser.add_argument("--threshold", "-t", type=float, default=0.1,
                         help="Confidence threshold for OCR results (default: 0.1)")
+    parser.add_argument("--recognition-only", "-r", action="store_true",
+                        help="Skip text detection and only run text recognition on the field boxes")
+    parser.add_argument("--mrz-first", "-m", action="store_true",
+                        help="Take the fields the MRZ carries from the decoded MRZ, OCR only the rest")
     return parser.parse_args()
 
 if __name__ == "__main__":
@@ -186,7 +462,8 @@ if __name__ == "__main__":
         print(f"Error: File '{image_path_obj.absolute()}' does not exist")
         exit(1)
     
-    parser = PassportParserEasyOCR(threshold=args.threshold)
+    parser = PassportParserEasyOCR(threshold=args.threshold, recognition_only=args.recognition_only,
+                                   mrz_first=args.mrz_first)
     
     extracted_data = parser.parse(image_path_obj)
     
@@ -1,10 +1,12 @@
 import base64
 import json
 from pathlib import Path
+from typing import BinaryIO
 import os
 from openai import AzureOpenAI
 
 from client_data.client_passport import ClientPassport, GenderEnum
+from llm_limiter import chat_completion
 
 # Get API key from environment variable or define it
 api_key = os.environ.get("AZURE_OPENAI_API_KEY")
@@ -21,6 +23,8 @@ class PassportParserOpenAI():
             api_key=api_key,
             api_version="2025-03-01-preview",
             azure_endpoint=api_endpoint,
+            # Throttling is retried by the shared limiter
+            max_retries=0,
         )
 
     def parse(self, path_to_file: Path) -> ClientPassport:
@@ -33,8 +37,22 @@ class PassportParserOpenAI():
         Returns:
             ClientPassport object containing extracted passport information
         """
+        if not path_to_file.exists():
+            raise FileNotFoundError(f"File '{path_to_file!r}' does not exist")
+
+        with open(path_to_file, "rb") as image_file:
+            return self.parse_file(image_file)
+
+    def parse_file(self, image_file: BinaryIO) -> ClientPassport:
+        """
+        Parse a passport PNG read from an open binary file.
+
+        Args:
+            image_file: File object positioned at the start of the PNG
 
-        ""
+        Returns:
+            ClientPassport object containing extracted passport information
+        """
         def preprocess_issuing_country(passport: dict) -> dict:
             issuing_country_strings = passport["issuing_country"].lower().split("/")
             issuing_country_strings = [s.strip() for s in issuing_country_strings]
@@ -48,13 +66,8 @@ class PassportParserOpenAI():
             else:
                 raise ValueError(f"Issuing country format is not recognized: {passport['issuing_country']!r}")
 
-        if not path_to_file.exists():
-            raise FileNotFoundError(f"File '{path_to_file!r}' does not exist")
-
         # Encode PNG as base64 for the AI to analyze
-        with open(path_to_file, "rb") as image_file:
-            image_data = image_file.read()
-            encoded_data = base64.b64encode(image_data).decode("utf-8")
+        encoded_data = base64.b64encode(image_file.read()).decode("utf-8")
 
         passport_data = self.parse_png(encoded_data)
 
@@ -87,7 +100,8 @@ class PassportParserOpenAI():
 
         }"""
 
-        response = self.client.chat.completions.create(
+        response = chat_completion(
+            self.client,
             model="gpt-4o",
             messages=[
                 {
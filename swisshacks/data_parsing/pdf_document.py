@@ -0,0 +1,256 @@
+import io
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    raise ImportError("PyPDF2 package is required. Install it with: pip install PyPDF2")
+
+# Backend used when none is given, "pypdf2" or "pymupdf"
+DEFAULT_BACKEND = os.environ.get("PDF_BACKEND", "pypdf2")
+
+PdfContent = Union[bytes, memoryview, BinaryIO]
+# Indirect reference "12 0 R" in the text form of a PDF object
+_REFERENCE = re.compile(r"(\d+)\s+\d+\s+R")
+
+
+class PdfDocument(ABC):
+    """
+    A PDF parsed once, with everything the parsers need computed lazily and cached.
+
+    The document is opened a single time by a backend; the AcroForm fields and the
+    text of each page are only extracted when first requested, so callers that can
+    decide from the form fields never pay for text extraction. Backends return the
+    fields and metadata in PyPDF2's format (keys such as "/T", "/FT" and "/V"), so
+    parsers give the same result whichever backend is used.
+    """
+
+    name = None
+
+    def __init__(self):
+        self._page_texts: Dict[int, str] = {}
+        self._fields: Optional[Dict[str, Any]] = None
+        self._text: Optional[str] = None
+
+    @staticmethod
+    def open(file_content: Union["PdfDocument", PdfContent], password: Optional[str] = None,
+             backend: Optional[str] = None) -> "PdfDocument":
+        """Return file_content itself if it is already parsed, else parse it with a backend."""
+        if isinstance(file_content, PdfDocument):
+            return file_content
+        backend = backend or DEFAULT_BACKEND
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown PDF backend {backend!r}, available: {', '.join(BACKENDS)}")
+        return BACKENDS[backend](file_content, password)
+
+    @property
+    @abstractmethod
+    def page_count(self) -> int:
+        """Number of pages."""
+
+    @property
+    @abstractmethod
+    def is_encrypted(self) -> bool:
+        """True if the document is encrypted."""
+
+    @property
+    @abstractmethod
+    def metadata(self) -> Dict[str, Any]:
+        """Document information dictionary, keyed like "/Author"."""
+
+    @abstractmethod
+    def _extract_fields(self) -> Dict[str, Any]:
+        """Read the AcroForm fields, in PyPDF2's format."""
+
+    @abstractmethod
+    def _extract_page_text(self, page_number: int) -> str:
+        """Extract the text of one page."""
+
+    @abstractmethod
+    def page_has_xobject(self, page_number: int) -> bool:
+        """True if the page references XObjects (images or embedded forms)."""
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        """AcroForm fields by name, as returned by PdfReader.get_fields()."""
+        if self._fields is None:
+            self._fields = self._extract_fields()
+        return self._fields
+
+    def page_text(self, page_number: int) -> str:
+        """Text of one page, extracted on first use."""
+        if page_number not in self._page_texts:
+            self._page_texts[page_number] = self._extract_page_text(page_number) or ""
+        return self._page_texts[page_number]
+
+    @property
+    def extracted_page_count(self) -> int:
+        """Number of pages whose text has been extracted so far."""
+        return len(self._page_texts)
+
+    @property
+    def text(self) -> str:
+        """Text of all pages with text, separated by blank lines."""
+        if self._text is None:
+            texts: List[str] = [self.page_text(i) for i in range(self.page_count)]
+            self._text = "\n\n".join(text for text in texts if text)
+        return self._text
+
+
+class PyPDF2Document(PdfDocument):
+    """Pure-Python backend based on PyPDF2."""
+
+    name = "pypdf2"
+
+    def __init__(self, file_content: PdfContent, password: Optional[str] = None):
+        super().__init__()
+        if isinstance(file_content, (bytes, bytearray, memoryview)):
+            file_content = io.BytesIO(file_content)
+        self.reader = PdfReader(file_content)
+        # If the PDF is encrypted and a password is provided, try to decrypt it
+        if self.reader.is_encrypted and password:
+            self.reader.decrypt(password)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.reader.pages)
+
+    @property
+    def is_encrypted(self) -> bool:
+        return self.reader.is_encrypted
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return dict(self.reader.metadata or {})
+
+    def _extract_fields(self) -> Dict[str, Any]:
+        return self.reader.get_fields() or {}
+
+    def _extract_page_text(self, page_number: int) -> str:
+        return self.reader.pages[page_number].extract_text()
+
+    def page_has_xobject(self, page_number: int) -> bool:
+        page = self.reader.pages[page_number]
+        return "/Resources" in page and "/XObject" in page["/Resources"]
+
+
+def _import_pymupdf():
+    try:
+        import pymupdf
+    except ImportError:
+        try:
+            import fitz as pymupdf
+        except ImportError:
+            raise ImportError("The pymupdf backend requires PyMuPDF. Install it with: pip install pymupdf")
+    return pymupdf
+
+
+class PyMuPDFDocument(PdfDocument):
+    """Backend based on MuPDF (C library), faster than PyPDF2 for text extraction on text-heavy pages."""
+
+    name = "pymupdf"
+    # Attributes copied from each field dictionary, as in PyPDF2's Field
+    _FIELD_ATTRIBUTES = ("FT", "Parent", "Kids", "T", "TU", "TM", "Ff", "V", "DV", "AA", "Opt")
+
+    def __init__(self, file_content: PdfContent, password: Optional[str] = None):
+        super().__init__()
+        pymupdf = _import_pymupdf()
+        if not isinstance(file_content, (bytes, bytearray, memoryview)):
+            file_content = file_content.read()
+        self.document = pymupdf.open(stream=bytes(file_content), filetype="pdf")
+        self._is_encrypted = bool(self.document.is_encrypted or self.document.needs_pass)
+        if self.document.needs_pass and password:
+            self.document.authenticate(password)
+
+    @property
+    def page_count(self) -> int:
+        return self.document.page_count
+
+    @property
+    def is_encrypted(self) -> bool:
+        return self._is_encrypted
+
+    def _value(self, xref: int, key: str):
+        """Return a PDF object value in PyPDF2's representation, or None if absent."""
+        kind, value = self.document.xref_get_key(xref, key)
+        if kind == "null":
+            return None
+        if kind == "int":
+            return int(value)
+        if kind == "bool":
+            return value == "true"
+        # Names keep their leading slash; strings, references and arrays are returned as text
+        return value
+
+    def _references(self, xref: int, key: str) -> List[int]:
+        """Return the object numbers referenced by an array (or single reference) entry."""
+        kind, value = self.document.xref_get_key(xref, key)
+        if kind not in ("array", "xref"):
+            return []
+        return [int(number) for number in _REFERENCE.findall(value)]
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        kind, info = self.document.xref_get_key(-1, "Info")
+        if kind != "xref":
+            return {}
+        info_xref = int(info.split()[0])
+        return {f"/{key}": self._value(info_xref, key) for key in self.document.xref_get_keys(info_xref)}
+
+    # The field tree is walked exactly like PyPDF2's get_fields() does, so fields come
+    # out with the same names, attributes and order
+    def _is_field(self, xref: int) -> bool:
+        return any(key in self._FIELD_ATTRIBUTES for key in self.document.xref_get_keys(xref))
+
+    def _check_kids(self, xref: int, fields: Dict[str, Any]):
+        for kid in self._references(xref, "Kids"):
+            self._check_kids(kid, fields)
+            if self._is_field(kid):
+                self._build_field(kid, fields)
+
+    def _build_field(self, xref: int, fields: Dict[str, Any]):
+        self._check_kids(xref, fields)
+        # Only look up the attributes the dictionary has, each lookup is a call into MuPDF
+        present = set(self.document.xref_get_keys(xref))
+        attributes = {}
+        for key in self._FIELD_ATTRIBUTES:
+            if key in present:
+                value = self._value(xref, key)
+                if value is not None:
+                    attributes[f"/{key}"] = value
+        name = attributes.get("/TM", attributes.get("/T"))
+        if name is None:
+            # Ignore no-name field
+            return
+        fields[name] = attributes
+
+    def _extract_fields(self) -> Dict[str, Any]:
+        catalog = self.document.pdf_catalog()
+        kind, acroform = self.document.xref_get_key(catalog, "AcroForm")
+        if kind == "null":
+            return {}
+        fields = {}
+        if kind == "xref":
+            acroform_xref = int(acroform.split()[0])
+            self._check_kids(acroform_xref, fields)
+            if self._is_field(acroform_xref):
+                self._build_field(acroform_xref, fields)
+        for xref in self._references(catalog, "AcroForm/Fields"):
+            self._build_field(xref, fields)
+        return fields
+
+    def _extract_page_text(self, page_number: int) -> str:
+        return self.document[page_number].get_text()
+
+    def page_has_xobject(self, page_number: int) -> bool:
+        kind, _ = self.document.xref_get_key(self.document[page_number].xref, "Resources/XObject")
+        return kind != "null"
+
+
+BACKENDS = {
+    PyPDF2Document.name: PyPDF2Document,
+    PyMuPDFDocument.name: PyMuPDFDocument,
+}
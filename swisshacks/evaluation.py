@@ -0,0 +1,142 @@
+import numpy as np
+
+# Rows of the confusion matrices are the ground truth, columns the prediction
+CLASSES = (False, True)
+
+
+def parse_path(path: str) -> tuple[bool, str]:
+    """Return the ground truth and the level of a train/<label>/<level>/<id> client path."""
+    path_parts = path.replace('\\', '/').split('/')
+    return {"0": False, "1": True}[path_parts[-3]], path_parts[-2]
+
+
+def _class_metrics(confusion: np.ndarray) -> dict:
+    """Accuracy and per-class precision/recall of a 2x2 confusion matrix."""
+    total = int(confusion.sum())
+    metrics = {
+        "count": total,
+        "accuracy": float(np.trace(confusion)) / total if total else None,
+    }
+    for index, cls in enumerate(CLASSES):
+        predicted = int(confusion[:, index].sum())
+        actual = int(confusion[index, :].sum())
+        correct = int(confusion[index, index])
+        metrics[str(cls).lower()] = {
+            "support": actual,
+            "precision": correct / predicted if predicted else None,
+            "recall": correct / actual if actual else None,
+        }
+    return metrics
+
+
+class Evaluator:
+    """
+    Incremental evaluation of predictions over a fixed list of client paths.
+
+    The labels and levels are parsed once into NumPy arrays. Every prediction
+    then updates the overall and per-level confusion matrices in O(1), so the
+    current accuracy, precision and recall can be reported at any time without
+    re-reading the paths. Predictions must arrive in the order of paths.
+    """
+
+    def __init__(self, paths: list[str]):
+        self.paths = list(paths)
+        parsed = [parse_path(path) for path in self.paths]
+        self.labels = np.fromiter((label for label, _ in parsed), dtype=bool, count=len(parsed))
+        self.level_names, levels = np.unique([level for _, level in parsed] or [""], return_inverse=True)
+        self.levels = levels[:len(parsed)]
+        self.predictions = np.zeros(len(self.paths), dtype=bool)
+        self.count = 0
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+        self.level_confusion = np.zeros((len(self.level_names), 2, 2), dtype=np.int64)
+
+    @classmethod
+    def from_predictions(cls, paths: list[str], predictions: list[bool]) -> "Evaluator":
+        """Create an evaluator and add all predictions at once."""
+        if len(paths) != len(predictions):
+            raise ValueError(
+                f"Groundtruth and predictions must have the same length: {len(paths)} vs {len(predictions)}")
+        evaluator = cls(paths)
+        evaluator.add_many(predictions)
+        return evaluator
+
+    def add(self, prediction: bool):
+        """Record the prediction for the next path."""
+        if self.count >= len(self.paths):
+            raise ValueError("All paths already have a prediction.")
+        index = self.count
+        label = int(self.labels[index])
+        self.predictions[index] = prediction
+        self.confusion[label, int(prediction)] += 1
+        self.level_confusion[self.levels[index], label, int(prediction)] += 1
+        self.count += 1
+
+    def add_many(self, predictions: list[bool]):
+        """Record the predictions for the next len(predictions) paths."""
+        predictions = np.asarray(predictions, dtype=bool)
+        end = self.count + len(predictions)
+        if end > len(self.paths):
+            raise ValueError("More predictions than paths.")
+        labels = self.labels[self.count:end].astype(np.int64)
+        self.predictions[self.count:end] = predictions
+        np.add.at(self.confusion, (labels, predictions.astype(np.int64)), 1)
+        np.add.at(self.level_confusion, (self.levels[self.count:end], labels, predictions.astype(np.int64)), 1)
+        self.count = end
+
+    @property
+    def accuracy(self) -> float | None:
+        return float(np.trace(self.confusion)) / self.count if self.count else None
+
+    @property
+    def false_positives(self) -> list[str]:
+        mask = self.predictions[:self.count] & ~self.labels[:self.count]
+        return [self.paths[i] for i in np.flatnonzero(mask)]
+
+    @property
+    def false_negatives(self) -> list[str]:
+        mask = ~self.predictions[:self.count] & self.labels[:self.count]
+        return [self.paths[i] for i in np.flatnonzero(mask)]
+
+    def metrics(self) -> dict:
+        """Return accuracy and per-class precision/recall, overall and per level."""
+        metrics = _class_metrics(self.confusion)
+        metrics["levels"] = {
+            str(name): _class_metrics(confusion)
+            for name, confusion in zip(self.level_names, self.level_confusion)
+            if confusion.any()
+        }
+        return metrics
+
+    def bootstrap(self, resamples: int = 10000, confidence: float = 0.95, seed: int = 0) -> dict:
+        """
+        Bootstrap confidence intervals of the accuracy and of the precision/recall
+        of the positive class, over the predictions made so far.
+
+        The metrics only depend on the four confusion matrix cells, so resampling
+        clients with replacement is the same as drawing the cell counts from a
+        multinomial distribution: all resamples are drawn at once, in O(resamples)
+        whatever the number of clients.
+        Returns:
+            Dict mapping each metric to its (low, high) interval
+        """
+        if self.count == 0:
+            raise ValueError("No predictions to bootstrap.")
+        rng = np.random.default_rng(seed)
+        # Columns: true negatives, false positives, false negatives, true positives
+        cells = rng.multinomial(self.count, self.confusion.ravel() / self.count, size=resamples)
+        true_negatives, false_positives, false_negatives, true_positives = cells.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            samples = {
+                "accuracy": (true_negatives + true_positives) / self.count,
+                "precision": true_positives / (true_positives + false_positives),
+                "recall": true_positives / (true_positives + false_negatives),
+            }
+        alpha = (1.0 - confidence) / 2
+        intervals = {}
+        for name, values in samples.items():
+            values = values[~np.isnan(values)]
+            intervals[name] = (
+                (float(np.quantile(values, alpha)), float(np.quantile(values, 1 - alpha)))
+                if len(values) else None
+            )
+        return intervals
@@ -0,0 +1,122 @@
+import time
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    duration REAL,
+    stage TEXT,
+    error_type TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+
+class JobJournal:
+    """
+    SQLite journal of a batch job, recording the status, attempt count, duration
+    and last error of every key.
+
+    Every update is committed immediately, so after a crash a rerun knows which
+    keys are done and only works on the others. Keys left "running" by a crashed
+    run are treated as pending. Safe to share between threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _execute(self, query: str, parameters=()):
+        with self._lock, self._connection:
+            return self._connection.execute(query, parameters).fetchall()
+
+    def add(self, keys: Iterable[str], status: str = PENDING) -> int:
+        """Add keys that are not journaled yet. Returns the number of new keys."""
+        now = time.time()
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO jobs (key, status, updated) VALUES (?, ?, ?)",
+                ((key, status, now) for key in keys),
+            )
+            return self._connection.total_changes - before
+
+    def start(self, key: str):
+        self._execute(
+            "INSERT INTO jobs (key, status, attempts, updated) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT (key) DO UPDATE SET status = excluded.status, attempts = attempts + 1, "
+            "updated = excluded.updated",
+            (key, RUNNING, time.time()),
+        )
+
+    def done(self, key: str, duration: Optional[float] = None):
+        self._execute(
+            "UPDATE jobs SET status = ?, duration = ?, stage = NULL, error_type = NULL, error = NULL, "
+            "updated = ? WHERE key = ?",
+            (DONE, duration, time.time(), key),
+        )
+
+    def fail(self, key: str, stage: str, error: Exception, duration: Optional[float] = None):
+        self._execute(
+            "UPDATE jobs SET status = ?, duration = ?, stage = ?, error_type = ?, error = ?, "
+            "updated = ? WHERE key = ?",
+            (FAILED, duration, stage, type(error).__name__, str(error), time.time(), key),
+        )
+
+    def keys(self, statuses: Iterable[str], prefix: str = "") -> List[str]:
+        """Return the keys below prefix with one of the statuses, sorted."""
+        statuses = list(statuses)
+        placeholders = ", ".join("?" for _ in statuses)
+        rows = self._execute(
+            f"SELECT key FROM jobs WHERE status IN ({placeholders}) AND substr(key, 1, ?) = ? ORDER BY key",
+            (*statuses, len(prefix), prefix),
+        )
+        return [key for key, in rows]
+
+    def count(self, prefix: str = "") -> int:
+        return self._execute("SELECT COUNT(*) FROM jobs WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))[0][0]
+
+    def summary(self, prefix: str = "") -> dict:
+        """Return key counts by status, the failure breakdown and duration statistics."""
+        selection = ("WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+        statuses = dict(self._execute(f"SELECT status, COUNT(*) FROM jobs {selection[0]} GROUP BY status", selection[1]))
+        failures = self._execute(
+            f"SELECT stage, error_type, COUNT(*) FROM jobs {selection[0]} AND status = ? "
+            "GROUP BY stage, error_type ORDER BY COUNT(*) DESC",
+            (*selection[1], FAILED),
+        )
+        attempts, average_duration = self._execute(
+            f"SELECT SUM(attempts), AVG(duration) FROM jobs {selection[0]} AND status = ?",
+            (*selection[1], DONE),
+        )[0]
+        return {
+            "statuses": statuses,
+            "failures": {f"{stage}: {error_type}": count for stage, error_type, count in failures},
+            "done_attempts": attempts or 0,
+            "average_duration": average_duration,
+        }
@@ -0,0 +1,278 @@
+"""
+Process-wide rate limiting for Azure OpenAI calls.
+
+Every deployment (model name) gets one DeploymentLimiter shared by all threads
+of the process. It enforces a requests-per-minute and a tokens-per-minute budget
+with token buckets, and caps the number of calls in flight with an AIMD limit:
+each success raises the limit slowly, each 429 halves it and pauses the whole
+deployment for the Retry-After delay before the call is retried. Transient
+errors (connection errors, timeouts, 408/409 and 5xx responses), which the OpenAI
+client retries by itself but call sites disable with max_retries=0, are retried
+with exponential backoff without touching the limit.
+
+Budgets are read from the environment, per deployment first:
+    AZURE_OPENAI_RPM_GPT_4O / AZURE_OPENAI_RPM     requests per minute
+    AZURE_OPENAI_TPM_GPT_4O / AZURE_OPENAI_TPM     tokens per minute
+    AZURE_OPENAI_MAX_CONCURRENCY_GPT_4O / AZURE_OPENAI_MAX_CONCURRENCY
+or set with configure(). Call sites use chat_completion(client, **kwargs) in
+place of client.chat.completions.create(**kwargs).
+"""
+import os
+import re
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RPM = 60
+DEFAULT_TPM = 60000
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_MAX_ATTEMPTS = 6
+# Token estimate for one image part of a chat message
+IMAGE_TOKENS = 1000
+# Completion tokens assumed when a call does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 500
+
+
+@dataclass
+class DeploymentLimits:
+    """Budgets of one deployment."""
+
+    rpm: float = DEFAULT_RPM
+    tpm: float = DEFAULT_TPM
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    min_concurrency: int = 1
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+
+    @classmethod
+    def from_env(cls, deployment: str) -> "DeploymentLimits":
+        suffix = re.sub(r"[^A-Z0-9]", "_", deployment.upper())
+
+        def setting(name, default):
+            return os.environ.get(f"AZURE_OPENAI_{name}_{suffix}", os.environ.get(f"AZURE_OPENAI_{name}", default))
+
+        return cls(
+            rpm=float(setting("RPM", cls.rpm)),
+            tpm=float(setting("TPM", cls.tpm)),
+            max_concurrency=int(setting("MAX_CONCURRENCY", cls.max_concurrency)),
+        )
+
+
+class TokenBucket:
+    """Bucket refilled continuously at rate_per_minute, holding at most one minute of budget."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float):
+        """Block until amount is available and take it. Amounts above the capacity wait for a full bucket."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def adjust(self, amount: float):
+        """Take (or give back, if negative) tokens after the fact, e.g. once actual usage is known."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class DeploymentLimiter:
+    """Rate and concurrency limiter shared by all calls to one deployment."""
+
+    def __init__(self, deployment: str, limits: DeploymentLimits):
+        self.deployment = deployment
+        self.limits = limits
+        self.requests = TokenBucket(limits.rpm)
+        self.tokens = TokenBucket(limits.tpm)
+        # Start halfway, so a cold start neither bursts nor crawls
+        self.concurrency = max(limits.min_concurrency, limits.max_concurrency / 2)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._decreased_at = 0.0
+        self.calls = 0
+        self.throttled = 0
+        self.transient_errors = 0
+        self._condition = threading.Condition()
+
+    def _enter(self) -> float:
+        with self._condition:
+            while self.in_flight >= int(self.concurrency):
+                self._condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def _leave(self, started: float, throttled: bool):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                # Calls sent before the last decrease report the same overload, only halve once for them
+                if started >= self._decreased_at:
+                    self.concurrency = max(self.limits.min_concurrency, self.concurrency / 2)
+                    self._decreased_at = time.monotonic()
+            else:
+                self.calls += 1
+                # Additive increase of about one slot per concurrency-limit successes
+                self.concurrency = min(self.limits.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self._condition.notify_all()
+
+    def _wait_for_pause(self):
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def call(self, func: Callable, *args, estimated_tokens: int = 0, **kwargs):
+        """
+        Call func(*args, **kwargs) within the budgets of the deployment, retrying on 429
+        and on transient errors.
+        The response's usage.total_tokens, when present, replaces the estimate.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self._wait_for_pause()
+            self.requests.acquire(1)
+            self.tokens.acquire(estimated_tokens)
+            started = self._enter()
+            try:
+                response = func(*args, **kwargs)
+            except Exception as e:
+                if is_transient_error(e):
+                    self._leave(started, throttled=False)
+                    with self._condition:
+                        self.transient_errors += 1
+                    if attempt >= self.limits.max_attempts:
+                        raise
+                    delay = min(60.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+                    logger.warning(
+                        f"{self.deployment} call failed with {type(e).__name__} "
+                        f"(attempt {attempt}/{self.limits.max_attempts}), retrying in {delay:.1f}s"
+                    )
+                    time.sleep(delay)
+                    continue
+                if not is_throttling_error(e):
+                    self._leave(started, throttled=False)
+                    raise
+                self._leave(started, throttled=True)
+                delay = retry_after(e) or min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                if attempt >= self.limits.max_attempts:
+                    raise
+                logger.warning(
+                    f"{self.deployment} throttled (attempt {attempt}/{self.limits.max_attempts}), "
+                    f"retrying in {delay:.1f}s with concurrency {int(self.concurrency)}"
+                )
+                continue
+            self._leave(started, throttled=False)
+            usage = getattr(getattr(response, "usage", None), "total_tokens", None)
+            if usage is not None:
+                self.tokens.adjust(usage - estimated_tokens)
+            return response
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "transient_errors": self.transient_errors,
+            "concurrency": int(self.concurrency),
+            "in_flight": self.in_flight,
+        }
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Return True for a 429 from the OpenAI client (or any error carrying that status)."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Return True for the errors the OpenAI client retries besides 429: connection errors,
+    timeouts, 408 and 409 responses and server errors.
+    """
+    if type(error).__name__ in ("APIConnectionError", "APITimeoutError", "InternalServerError"):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in (408, 409) or (isinstance(status, int) and status >= 500)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Return the delay in seconds requested by a throttling response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+_limiters: Dict[str, DeploymentLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def configure(deployment: str, **limits) -> DeploymentLimiter:
+    """Set the budgets of a deployment, replacing its limiter."""
+    with _limiters_lock:
+        _limiters[deployment] = DeploymentLimiter(deployment, DeploymentLimits(**limits))
+        return _limiters[deployment]
+
+
+def get_limiter(deployment: str) -> DeploymentLimiter:
+    """Return the process-wide limiter of a deployment, creating it from the environment."""
+    limiter = _limiters.get(deployment)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(deployment)
+            if limiter is None:
+                limiter = _limiters[deployment] = DeploymentLimiter(deployment, DeploymentLimits.from_env(deployment))
+    return limiter
+
+
+def stats() -> dict:
+    """Return call and throttling counters of every deployment."""
+    return {deployment: limiter.stats() for deployment, limiter in _limiters.items()}
+
+
+def estimate_tokens(messages: list, max_tokens: Optional[int] = None) -> int:
+    """Rough token estimate of a chat call: about 4 characters per token plus the completion."""
+    characters = 0
+    images = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            characters += len(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                characters += len(part.get("text", ""))
+            else:
+                images += 1
+    return characters // 4 + images * IMAGE_TOKENS + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def chat_completion(client, **kwargs):
+    """Rate-limited client.chat.completions.create(**kwargs), limited per kwargs["model"]."""
+    estimated = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    return get_limiter(kwargs["model"]).call(client.chat.completions.create, estimated_tokens=estimated, **kwargs)
@@ -6,6 +6,7 @@ import base64
 import os
 import re
 
+from llm_limiter import chat_completion
 from model.base_predictor import BasePredictor
 from client_data.client_data import ClientData
 
@@ -25,9 +26,12 @@ class OpenAIPredictor(BasePredictor):
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
             api_version="2025-01-01-preview",
             azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            # Throttling is retried by the shared limiter
+            max_retries=0,
         )
 
-        response = client_openai.chat.completions.create(
+        response = chat_completion(
+            client_openai,
             model="gpt-4o",
             messages=[
                 {
@@ -0,0 +1,225 @@
+"""
+Packed, memory-mapped copy of the train/ folder.
+
+The train set is thousands of small files in train/{0,1}/0/<id>/. pack_dataset()
+concatenates them into a few large shard files plus an index.json of offsets, and
+PackedDataset maps the shards read-only and hands out zero-copy memoryviews of
+any document, so clients can be read in any order without per-file syscalls.
+
+Usage (from the swisshacks folder):
+    python packed_dataset.py                          # pack ../train into ../train_packed
+    python packed_dataset.py --folder ../train --output /tmp/train_packed --shard-size 512
+"""
+import os
+import io
+import json
+import mmap
+import argparse
+from typing import Dict, Iterator, List, Optional
+
+from storage import TMP_SUFFIX
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(__file__), "..", "train")
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "..", "train_packed")
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+DEFAULT_SHARD_SIZE = 256 * 1024 * 1024
+# Documents start on this boundary so they can be handed to code expecting aligned buffers
+ALIGNMENT = 64
+# Files of the train folder that are not part of the dataset
+SKIPPED_SUFFIXES = (TMP_SUFFIX, ".sync_manifest.json")
+
+
+def pack_dataset(folder: str = DEFAULT_FOLDER, output: str = DEFAULT_OUTPUT,
+                 shard_size: int = DEFAULT_SHARD_SIZE) -> dict:
+    """
+    Pack every document below folder into shard files and an offset index.
+
+    Documents of one client always end up in the same shard. The index maps each
+    path relative to folder (e.g. "1/0/42/account.pdf") to [shard, offset, size],
+    and is written last, so an interrupted run never leaves a usable partial pack.
+    Returns:
+        The index
+    """
+    os.makedirs(output, exist_ok=True)
+    clients: Dict[str, List[str]] = {}
+    for root, _, files in os.walk(folder):
+        for filename in sorted(files):
+            if filename.endswith(SKIPPED_SUFFIXES):
+                continue
+            relative_path = os.path.relpath(os.path.join(root, filename), folder).replace(os.sep, "/")
+            client, _, _ = relative_path.rpartition("/")
+            clients.setdefault(client, []).append(relative_path)
+
+    shards: List[str] = []
+    documents: Dict[str, list] = {}
+    handle = None
+    offset = 0
+    try:
+        for client in sorted(clients):
+            if handle is None or offset >= shard_size:
+                if handle is not None:
+                    handle.close()
+                shards.append(f"shard-{len(shards):05d}.bin")
+                handle = open(os.path.join(output, shards[-1]), "wb")
+                offset = 0
+            for relative_path in clients[client]:
+                with open(os.path.join(folder, relative_path), "rb") as source:
+                    data = source.read()
+                padding = -offset % ALIGNMENT
+                handle.write(b"\0" * padding)
+                offset += padding
+                handle.write(data)
+                documents[relative_path] = [len(shards) - 1, offset, len(data)]
+                offset += len(data)
+    finally:
+        if handle is not None:
+            handle.close()
+
+    index = {"version": INDEX_VERSION, "shards": shards, "documents": documents}
+    tmp_path = os.path.join(output, f"{INDEX_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as index_handle:
+        json.dump(index, index_handle)
+    os.replace(tmp_path, os.path.join(output, INDEX_FILE))
+    return index
+
+
+class MemoryViewReader(io.RawIOBase):
+    """Seekable read-only file object over a memoryview, for parsers that need a stream."""
+
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._position:self._position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+
+class PackedDataset:
+    """
+    Read-only access to a dataset written by pack_dataset().
+
+    Shards are memory-mapped on first use and documents are returned as
+    memoryviews into the mapping, so nothing is copied until a parser reads it.
+    Views must not be used after close(). Instances can be sent to worker
+    processes: the shards are mapped again on the other side.
+    """
+
+    def __init__(self, directory: str = DEFAULT_OUTPUT):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as handle:
+            index = json.load(handle)
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported packed dataset version: {index.get('version')}")
+        self._shard_names: List[str] = index["shards"]
+        self._documents: Dict[str, list] = index["documents"]
+        self._maps: List[Optional[mmap.mmap]] = [None] * len(self._shard_names)
+        self._clients: Dict[str, List[str]] = {}
+        for relative_path in self._documents:
+            client, _, filename = relative_path.rpartition("/")
+            self._clients.setdefault(client, []).append(filename)
+
+    def __getstate__(self):
+        return {"directory": self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __contains__(self, relative_path: str) -> bool:
+        return relative_path in self._documents
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def clients(self) -> List[str]:
+        """Return the client folders, relative to the packed folder (e.g. "1/0/42")."""
+        return sorted(self._clients)
+
+    def documents(self, client: str) -> List[str]:
+        """Return the file names of a client folder."""
+        return self._clients.get(client, [])
+
+    def _shard(self, shard: int) -> mmap.mmap:
+        mapping = self._maps[shard]
+        if mapping is None:
+            with open(os.path.join(self.directory, self._shard_names[shard]), "rb") as handle:
+                mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[shard] = mapping
+        return mapping
+
+    def get(self, relative_path: str) -> memoryview:
+        """
+        Return a zero-copy view of a document.
+        Raises:
+            KeyError: If the document is not in the pack
+        """
+        shard, offset, size = self._documents[relative_path]
+        if size == 0:
+            # Empty files cannot be mapped
+            return memoryview(b"")
+        return memoryview(self._shard(shard))[offset:offset + size]
+
+    def open(self, relative_path: str) -> MemoryViewReader:
+        """Return a seekable file object over a document."""
+        return MemoryViewReader(self.get(relative_path))
+
+    def load_client(self, client: str) -> Dict[str, memoryview]:
+        """Return views of all documents of a client folder, by file name."""
+        return {filename: self.get(f"{client}/{filename}") for filename in self.documents(client)}
+
+    def iter_clients(self) -> Iterator[tuple]:
+        """Yield (client, {file name: view}) in shard order, for sequential scans."""
+        for client in sorted(self._clients, key=lambda c: self._documents[f"{c}/{self._clients[c][0]}"][:2]):
+            yield client, self.load_client(client)
+
+    def close(self):
+        """Unmap all shards. Shards with views still alive are unmapped once they are released."""
+        for shard, mapping in enumerate(self._maps):
+            if mapping is not None:
+                try:
+                    mapping.close()
+                except BufferError:
+                    pass
+                self._maps[shard] = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the train folder into memory-mapped shards")
+    parser.add_argument("--folder", default=DEFAULT_FOLDER, help="Dataset folder to pack")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Folder receiving the shards and index")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE // (1024 * 1024),
+                        help="Target shard size in MiB")
+    args = parser.parse_args()
+
+    index = pack_dataset(args.folder, args.output, args.shard_size * 1024 * 1024)
+    total = sum(size for _, _, size in index["documents"].values())
+    print(f"Packed {len(index['documents'])} documents ({total / 1e6:.1f} MB) "
+          f"into {len(index['shards'])} shards in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
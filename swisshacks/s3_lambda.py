@@ -1,54 +1,357 @@
+import os
 import json
+import time
+import queue
+import base64
 import logging
-import concurrent.futures
+import argparse
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
 import storage
+from job_journal import JobJournal, DONE, FAILED, PENDING, RUNNING
 
-from data_parsing.parse_passport_openai import parse_png
+from data_parsing.parse_passport_openai import PassportParserOpenAI
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Default number of workers per pipeline stage. The LLM stage is the slow one,
+# the storage stages only need enough workers to keep it busy.
+DOWNLOAD_WORKERS = 4
+PARSE_WORKERS = 10
+UPLOAD_WORKERS = 2
+# Items waiting between two stages; a full queue blocks the stage feeding it
+QUEUE_SIZE = 16
+# Journal of the processed passports, used to resume interrupted runs
+DEFAULT_JOURNAL = os.path.join(os.path.dirname(__file__), "..", "passport_jobs.sqlite")
+
+_parser: Optional[PassportParserOpenAI] = None
+_parser_lock = threading.Lock()
+
+
+def _get_parser() -> PassportParserOpenAI:
+    """Return the process-wide passport parser, sharing one OpenAI client between threads."""
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = PassportParserOpenAI()
+    return _parser
+
+
+def _json_key(passport_key: str) -> str:
+    return passport_key.replace("passport.png", "passport.json")
+
+
+def _download(passport_key: str, _) -> bytes:
+    data = storage.read_object(passport_key)
+    if data is None:
+        # read_object logs and returns None, the pipeline only records failures that raise
+        raise storage.StorageError("ReadFailed", passport_key)
+    return data
+
+
+def _parse(passport_key: str, image_data: bytes) -> dict:
+    return _get_parser().parse_png(base64.b64encode(image_data).decode("utf-8"))
+
+
+def _upload(passport_key: str, passport_data: dict) -> None:
+    if not storage.store_object(json.dumps(passport_data), _json_key(passport_key)):
+        raise storage.StorageError("StoreFailed")
+    logger.debug(f"Processed passport file: {_json_key(passport_key)}")
+
 
 def parse_s3_passport(passport_key):
-    # Get the image data from S3
-    image_data = storage.read_object(passport_key)
-    json_key = passport_key.replace("passport.png", "passport.json")
+    json_key = _json_key(passport_key)
     if storage.check_object_exists(json_key):
         return
 
+    # Get the image data from S3
+    image_data = _download(passport_key, None)
+
     # Process the passport image
-    passport_data = parse_png(image_data)
+    passport_data = _parse(passport_key, image_data)
 
     # Store the processed data
-    assert storage.store_object(json.dumps(passport_data), json_key)
+    _upload(passport_key, passport_data)
     print(f"Processed passport file: {json_key}")
 
 
-def parse_s3_passports(prefix: str = "train/") -> int:
+@dataclass
+class PipelineReport:
+    """Outcome of a passport pipeline run."""
+
+    total: int = 0
+    skipped: int = 0
+    processed: int = 0
+    # passport key -> "<stage>: <error>"
+    failed: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+    # stage name -> {"items", "busy_seconds", "workers"}
+    stages: dict = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_failure(self, key: str, stage: str, error: Exception):
+        with self._lock:
+            self.failed[key] = f"{stage}: {type(error).__name__}: {error}"
+
+    def add_processed(self):
+        with self._lock:
+            self.processed += 1
+
+    def __str__(self):
+        lines = [
+            f"Processed {self.processed} of {self.total} passport files "
+            f"({self.skipped} skipped, {len(self.failed)} failed) in {self.elapsed:.1f}s "
+            f"({self.processed / max(self.elapsed, 1e-9):.2f} files/s)"
+        ]
+        for name, stage in self.stages.items():
+            average = stage["busy_seconds"] / stage["items"] if stage["items"] else 0.0
+            # Share of the wall time the stage's workers were busy; the bottleneck is close to 100%
+            utilization = stage["busy_seconds"] / max(self.elapsed * stage["workers"], 1e-9)
+            lines.append(f"  {name:<8} {stage['items']:>6} items, {average:.3f}s per item, "
+                         f"{100 * utilization:.0f}% busy with {stage['workers']} workers")
+        for key, error in sorted(self.failed.items())[:20]:
+            lines.append(f"  failed {key}: {error}")
+        return "\n".join(lines)
+
+
+_DONE = object()
+
+
+class _Stage:
+    """
+    Pool of worker threads applying func(key, value) to the items of an input queue.
+
+    Results other than None are put on the output queue as (key, result). Failures
+    are passed to on_failure(key, stage name, error) and the item is dropped. Once
+    every worker has seen the end marker, the stage sends one end marker per worker
+    of the next stage.
+    """
+
+    def __init__(self, name: str, func: Callable, workers: int, inbox: queue.Queue,
+                 outbox: Optional[queue.Queue], on_failure: Callable[[str, str, Exception], None]):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.inbox = inbox
+        self.outbox = outbox
+        self.on_failure = on_failure
+        self.next_workers = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+        self._running = workers
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"passport-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        try:
+            while True:
+                item = self.inbox.get()
+                if item is _DONE:
+                    break
+                key, value = item
+                start = time.perf_counter()
+                try:
+                    result = self.func(key, value)
+                except Exception as e:
+                    logger.warning(f"Passport {self.name} failed for {key}: {e}")
+                    self._report_failure(key, e)
+                    result = None
+                with self._lock:
+                    self.items += 1
+                    self.busy_seconds += time.perf_counter() - start
+                if result is not None and self.outbox is not None:
+                    self.outbox.put((key, result))
+        finally:
+            # Even a worker that died must hand on its end markers, or the next stage waits forever
+            with self._lock:
+                self._running -= 1
+                last = self._running == 0
+            if last and self.outbox is not None:
+                for _ in range(self.next_workers):
+                    self.outbox.put(_DONE)
+
+    def _report_failure(self, key: str, error: Exception):
+        try:
+            self.on_failure(key, self.name, error)
+        except Exception:
+            logger.exception(f"Could not record the {self.name} failure of {key}")
+
+
+def run_passport_pipeline(passport_keys: list, download_workers: int = DOWNLOAD_WORKERS,
+                          parse_workers: int = PARSE_WORKERS, upload_workers: int = UPLOAD_WORKERS,
+                          queue_size: int = QUEUE_SIZE, journal: Optional[JobJournal] = None) -> PipelineReport:
+    """
+    Download, parse and upload passports through three concurrent stages.
+
+    Each stage has its own worker threads and bounded input queue, so a slow stage
+    blocks the ones feeding it instead of buffering every image in memory, and the
+    storage round trips overlap with the LLM calls. With a journal, the start,
+    success or failure of every key is recorded as it happens.
+    """
+    report = PipelineReport(total=len(passport_keys))
+    downloads, parses, uploads = (queue.Queue(maxsize=queue_size) for _ in range(3))
+    started = {}
+
+    def download(key, value):
+        started[key] = time.perf_counter()
+        if journal is not None:
+            journal.start(key)
+        return _download(key, value)
+
+    def elapsed(key):
+        # The key is already gone if recording its success failed
+        start = started.pop(key, None)
+        return time.perf_counter() - start if start is not None else 0.0
+
+    def upload(key, passport_data):
+        _upload(key, passport_data)
+        seconds = elapsed(key)
+        if journal is not None:
+            journal.done(key, seconds)
+        # Counted once recorded, a journal error counts the key as failed instead
+        report.add_processed()
+
+    def on_failure(key, stage, error):
+        report.add_failure(key, stage, error)
+        seconds = elapsed(key)
+        if journal is not None:
+            journal.fail(key, stage, error, seconds)
+
+    stages = [
+        _Stage("download", download, download_workers, downloads, parses, on_failure),
+        _Stage("parse", _parse, parse_workers, parses, uploads, on_failure),
+        _Stage("upload", upload, upload_workers, uploads, None, on_failure),
+    ]
+    for stage, next_stage in zip(stages, stages[1:]):
+        stage.next_workers = next_stage.workers
+
+    start = time.perf_counter()
+    for stage in stages:
+        stage.start()
+    for key in passport_keys:
+        downloads.put((key, None))
+    for _ in range(download_workers):
+        downloads.put(_DONE)
+    for stage in stages:
+        stage.join()
+    report.elapsed = time.perf_counter() - start
+    report.stages = {
+        stage.name: {"items": stage.items, "busy_seconds": stage.busy_seconds, "workers": stage.workers}
+        for stage in stages
+    }
+    return report
+
+
+def parse_s3_passports(prefix: str = "train/", download_workers: int = DOWNLOAD_WORKERS,
+                       parse_workers: int = PARSE_WORKERS, upload_workers: int = UPLOAD_WORKERS,
+                       journal_path: Optional[str] = DEFAULT_JOURNAL, retry_failed: bool = False,
+                       refresh: bool = False) -> PipelineReport:
     """
     Process all passport.png files in S3 under the given prefix and store results as JSON.
+    Passports that already have a passport.json are skipped.
+
+    Progress is recorded in a local journal. A rerun resumes from the keys that are
+    still pending (or were interrupted) without listing the prefix again.
 
     Args:
         prefix: S3 prefix to search for passport.png files (default: "" which means all)
+        download_workers: Number of concurrent image downloads
+        parse_workers: Number of concurrent LLM calls
+        upload_workers: Number of concurrent JSON uploads
+        journal_path: SQLite journal file, or None to process without one
+        retry_failed: Also process the keys that failed in previous runs
+        refresh: List the prefix again to pick up new passports
 
     Returns:
-        Number of processed files
+        Report with the number of processed files and the failed keys
     """
-    # List all objects with the given prefix
-    all_objects = storage.list_objects(prefix=prefix)
+    journal = JobJournal(journal_path) if journal_path else None
+    try:
+        if journal is None or refresh or journal.count(prefix) == 0:
+            # Index the prefix once, listings and existence checks are then answered from memory
+            storage.load_manifest(prefix, refresh=refresh)
+
+            # List all objects with the given prefix
+            all_objects = set(storage.list_objects(prefix=prefix))
+
+            # Filter objects to find passport.png files
+            passport_objects = [obj for obj in all_objects if obj.endswith("passport.png")]
+            done = [key for key in passport_objects if _json_key(key) in all_objects]
+            if journal is not None:
+                journal.add(done, status=DONE)
+                journal.add(passport_objects)
+        statuses = [PENDING, RUNNING] + ([FAILED] if retry_failed else [])
+        if journal is not None:
+            pending = journal.keys(statuses, prefix)
+            total = journal.count(prefix)
+        else:
+            pending = [key for key in passport_objects if key not in done]
+            total = len(passport_objects)
+        pending = sorted(pending, key=lambda x: int(x.split("/")[-2]))
+
+        report = run_passport_pipeline(pending, download_workers, parse_workers, upload_workers, journal=journal)
+        report.total = total
+        report.skipped = total - len(pending)
+
+        storage.flush_manifests()
+        print(report)
+        if journal is not None:
+            print_journal_summary(journal, prefix)
+    finally:
+        if journal is not None:
+            journal.close()
+    return report
+
+
+def print_journal_summary(journal: JobJournal, prefix: str = ""):
+    """Print the status counts and failure breakdown of the journaled keys."""
+    summary = journal.summary(prefix)
+    statuses = ", ".join(f"{count} {status}" for status, count in sorted(summary["statuses"].items()))
+    print(f"Journal {journal.path}: {statuses}")
+    if summary["average_duration"] is not None:
+        print(f"  {summary['average_duration']:.2f}s per passport on average, "
+              f"{summary['done_attempts']} attempts for {summary['statuses'].get(DONE, 0)} done")
+    for failure, count in summary["failures"].items():
+        print(f"  {count:>6} failed in {failure}")
 
-    # Filter objects to find passport.png files
-    passport_objects = [obj for obj in all_objects if obj.endswith("passport.png")]
-    passport_objects = sorted(passport_objects, key=lambda x: int(x.split("/")[-2]))
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        # Submit tasks to the thread pool
-        executor.map(parse_s3_passport, passport_objects)
+def main():
+    parser = argparse.ArgumentParser(description="Parse the passports stored under a prefix with the LLM")
+    parser.add_argument("--prefix", default="train/", help="Storage prefix to process")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL, help="SQLite journal used to resume runs")
+    parser.add_argument("--no-journal", action="store_true", help="Process without a journal")
+    parser.add_argument("--retry-failed", action="store_true", help="Also retry keys that failed before")
+    parser.add_argument("--refresh", action="store_true", help="List the prefix again to find new passports")
+    parser.add_argument("--download-workers", type=int, default=DOWNLOAD_WORKERS)
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    parser.add_argument("--upload-workers", type=int, default=UPLOAD_WORKERS)
+    args = parser.parse_args()
 
-    print(f"Processed {len(passport_objects)} passport files")
-    return len(passport_objects)
+    parse_s3_passports(
+        args.prefix,
+        download_workers=args.download_workers,
+        parse_workers=args.parse_workers,
+        upload_workers=args.upload_workers,
+        journal_path=None if args.no_journal else args.journal,
+        retry_failed=args.retry_failed,
+        refresh=args.refresh,
+    )
 
 
 if __name__ == "__main__":
-    # Example usage
-    parse_s3_passports("train/")
+    main()
@@ -0,0 +1,790 @@
+import os
+import atexit
+import time
+import shutil
+import hashlib
+import threading
+import concurrent.futures
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+import logging
+
+from .backends import (
+    DELETE_BATCH_SIZE,
+    MULTIPART_CHUNKSIZE,
+    FileSystemBackend,
+    NotModified,
+    PRECONDITION_FAILED,
+    S3Backend,
+    StorageBackend,
+    StorageError,
+    create_backend_from_env,
+    get_s3_client,
+)
+from .cache import DiskCache
+from .codecs import (
+    DICTIONARY_PREFIX,
+    Codec,
+    available_codecs,
+    decode_dict,
+    encode_dict,
+    get_codec,
+    load_zstd_dictionary,
+    register_codec,
+    train_zstd_dictionary,
+)
+from .manifest import DEFAULT_SHARD_COUNT, MANIFEST_PREFIX, UNKNOWN_ETAG, PrefixManifest
+from .retry import RetryPolicy
+from .stats import StorageStats
+from .stream import TMP_SUFFIX, ChunkedWriter, StreamReader
+
+logger = logging.getLogger(__name__)
+
+# Number of objects transferred in parallel by the *_many functions
+MAX_CONCURRENCY = int(os.environ.get("S3_MAX_CONCURRENCY", "16"))
+
+# Codec used by store_dict, read_dict detects the codec of each object
+DEFAULT_DICT_CODEC = os.environ.get("STORAGE_DICT_CODEC", "json+gzip")
+
+# The backend is created on first use so that importing this module needs neither
+# network access nor credentials. Select it with STORAGE_BACKEND or set_backend().
+_BACKEND: Optional[StorageBackend] = None
+_BACKEND_LOCK = threading.Lock()
+
+
+def get_backend() -> StorageBackend:
+    """Return the active storage backend, creating it from the environment on first use."""
+    global _BACKEND
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                _BACKEND = create_backend_from_env(max_pool_connections=4 * MAX_CONCURRENCY)
+                logger.info(f"Using storage backend {_BACKEND}")
+    return _BACKEND
+
+
+def set_backend(backend: Optional[StorageBackend]):
+    """
+    Replace the active storage backend.
+
+    Args:
+        backend: Backend to use, or None to create it from the environment again on next use
+    """
+    global _BACKEND
+    with _BACKEND_LOCK:
+        _BACKEND = backend
+
+
+# Retry policy and instrumentation shared by every storage request
+_RETRY_POLICY = RetryPolicy.from_env()
+_STATS = StorageStats()
+
+
+def set_retry_policy(policy: RetryPolicy):
+    """Replace the retry/backoff policy used for all storage requests."""
+    global _RETRY_POLICY
+    _RETRY_POLICY = policy
+
+
+def stats() -> dict:
+    """
+    Return a snapshot of the storage instrumentation.
+
+    Returns:
+        Dictionary keyed by operation (put, get, head, list, delete) holding a latency
+        histogram with percentiles, transferred bytes, errors by code, retries and
+        throttled retries
+    """
+    return _STATS.snapshot()
+
+
+def reset_stats():
+    """Reset all storage counters and histograms."""
+    _STATS.reset()
+
+
+def _request(operation: str, func, *args, **kwargs):
+    """Run one backend request under the retry policy, recording its latency."""
+    return _RETRY_POLICY.call(_STATS, operation, func, *args, **kwargs)
+
+
+# Optional read-through disk cache, enabled by STORAGE_CACHE_DIR or enable_cache()
+DEFAULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+_CACHE: Optional[DiskCache] = None
+_CACHE_CONFIGURED = False
+
+
+def _get_cache() -> Optional[DiskCache]:
+    """Return the active cache, creating it from the environment on first use."""
+    global _CACHE, _CACHE_CONFIGURED
+    if not _CACHE_CONFIGURED:
+        with _BACKEND_LOCK:
+            if not _CACHE_CONFIGURED:
+                if os.environ.get("STORAGE_CACHE_DIR"):
+                    _CACHE = DiskCache(
+                        os.environ["STORAGE_CACHE_DIR"],
+                        int(os.environ.get("STORAGE_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES)),
+                    )
+                _CACHE_CONFIGURED = True
+    return _CACHE
+
+
+def enable_cache(directory: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> DiskCache:
+    """
+    Enable the local read-through cache for read_object, read_dict and read_many.
+
+    Cached entries are revalidated against the backend with conditional GETs on their
+    ETag, so a hit costs one request without a response body.
+
+    Args:
+        directory: Local directory holding the cached objects
+        max_bytes: Maximum total size of the cached objects
+
+    Returns:
+        The enabled cache
+    """
+    global _CACHE, _CACHE_CONFIGURED
+    _CACHE = DiskCache(directory, max_bytes)
+    _CACHE_CONFIGURED = True
+    return _CACHE
+
+
+def disable_cache():
+    """Disable the local read-through cache. Cached files are left on disk."""
+    global _CACHE, _CACHE_CONFIGURED
+    _CACHE = None
+    _CACHE_CONFIGURED = True
+
+
+def cache_stats() -> Optional[dict]:
+    """
+    Return the hit/miss counters of the local cache.
+
+    Returns:
+        Dictionary of cache statistics, or None if the cache is disabled
+    """
+    cache = _get_cache()
+    return cache.stats() if cache is not None else None
+
+
+# Manifests of the prefixes indexed with load_manifest(), by prefix
+_MANIFESTS: Dict[str, PrefixManifest] = {}
+_MANIFESTS_LOCK = threading.Lock()
+# Changes recorded by single writes are flushed at least this often (seconds), so a
+# process that dies leaves a manifest at most this stale
+MANIFEST_FLUSH_INTERVAL = float(os.environ.get("STORAGE_MANIFEST_FLUSH_INTERVAL", "30"))
+# Attempts at rebasing a shard that other processes keep writing
+MANIFEST_FLUSH_ATTEMPTS = 5
+_last_manifest_flush = time.monotonic()
+_manifest_flush_lock = threading.Lock()
+
+
+def _loaded_manifests() -> List[PrefixManifest]:
+    with _MANIFESTS_LOCK:
+        return list(_MANIFESTS.values())
+
+
+def _find_manifest(key: str) -> Optional[PrefixManifest]:
+    """Return the most specific loaded manifest covering a key or prefix."""
+    matches = [manifest for manifest in _loaded_manifests() if manifest.covers(key)]
+    return max(matches, key=lambda manifest: len(manifest.prefix)) if matches else None
+
+
+def _record_write(object_name: str, size: int, etag: Optional[str], flush: bool = True):
+    """Update the loaded manifests after a successful write."""
+    for manifest in _loaded_manifests():
+        if manifest.covers(object_name):
+            manifest.add(object_name, size, etag)
+    if flush:
+        _flush_manifests_if_due()
+
+
+def _record_delete(object_name: str, flush: bool = True):
+    """Update the loaded manifests after a successful delete."""
+    for manifest in _loaded_manifests():
+        if manifest.covers(object_name):
+            manifest.discard(object_name)
+    if flush:
+        _flush_manifests_if_due()
+
+
+def _flush_manifests_if_due():
+    """Flush the manifests if MANIFEST_FLUSH_INTERVAL has passed, unless another thread is at it."""
+    global _last_manifest_flush
+    if time.monotonic() - _last_manifest_flush < MANIFEST_FLUSH_INTERVAL:
+        return
+    if _manifest_flush_lock.acquire(blocking=False):
+        try:
+            _last_manifest_flush = time.monotonic()
+            flush_manifests()
+        finally:
+            _manifest_flush_lock.release()
+
+
+def load_manifest(prefix: str, shard_count: int = DEFAULT_SHARD_COUNT, refresh: bool = False) -> PrefixManifest:
+    """
+    Load (or build) the manifest of a prefix and use it for listings and existence checks.
+
+    Once loaded, list_objects() and check_object_exists() below the prefix are answered
+    from memory, and writes and deletes made through this module keep the manifest up
+    to date. The shards are read with shard_count parallel requests. A missing manifest
+    is built with one full listing and persisted right away.
+
+    The manifest only sees writes made through this module: use refresh=True after
+    objects were added or removed by other means. Processes writing below the same
+    prefix merge their changes into the stored shards, see PrefixManifest. Changes are
+    flushed after the batch operations, every MANIFEST_FLUSH_INTERVAL seconds of
+    single writes and at exit.
+
+    Args:
+        prefix: Storage prefix to index, e.g. "train/"
+        shard_count: Number of manifest shards
+        refresh: Rebuild the manifest from a full listing instead of reading it
+
+    Returns:
+        The loaded manifest
+    """
+    backend = get_backend()
+    manifest = PrefixManifest(prefix, shard_count)
+
+    if not refresh:
+        def read_shard(shard: int) -> Optional[tuple]:
+            try:
+                data, etag = _request("get", backend.get, manifest.shard_key(shard))
+                return decode_dict(data), etag
+            except StorageError:
+                return None
+
+        shards = _run_concurrently(read_shard, list(range(shard_count)), shard_count)
+        if all(shard is not None for shard in shards.values()):
+            manifest.load_shards({shard: content for shard, (content, _) in shards.items()},
+                                 {shard: etag for shard, (_, etag) in shards.items()})
+            logger.info(f"Loaded manifest of {prefix} with {len(manifest)} objects")
+        else:
+            refresh = True
+
+    if refresh:
+        manifest.replace(_request("list", backend.list_info, prefix))
+        logger.info(f"Built manifest of {prefix} with {len(manifest)} objects")
+
+    with _MANIFESTS_LOCK:
+        _MANIFESTS[prefix] = manifest
+    _flush_manifest(manifest)
+    return manifest
+
+
+def _write_shard(manifest: PrefixManifest, shard: int, content: dict, replaced: bool,
+                 changes: Dict[str, Optional[dict]]):
+    """
+    Store one shard. A shard rebuilt from a listing is written as is; otherwise the
+    write is conditional on the ETag the shard was read with, and if another process
+    wrote it since, the stored shard is read and the changes are applied on top of it.
+    """
+    backend = get_backend()
+    shard_key = manifest.shard_key(shard)
+    if replaced:
+        manifest.set_shard_etag(shard, _request("put", backend.put, shard_key, encode_dict(content)))
+        return
+    for _ in range(MANIFEST_FLUSH_ATTEMPTS):
+        etag = manifest.shard_etag(shard)
+        if etag is not UNKNOWN_ETAG:
+            try:
+                manifest.set_shard_etag(shard, _request("put", backend.put_if, shard_key, encode_dict(content), etag))
+                return
+            except StorageError as e:
+                if e.code != PRECONDITION_FAILED:
+                    raise
+        try:
+            data, etag = _request("get", backend.get, shard_key)
+            stored = decode_dict(data)["objects"]
+        except StorageError as e:
+            if e.code not in ("404", "NoSuchKey", "NotFound"):
+                raise
+            stored, etag = {}, None
+        manifest.merge_shard(shard, stored, etag, changes)
+        content = manifest.shard_contents([shard])[shard]
+    raise StorageError(PRECONDITION_FAILED, f"{shard_key} changed {MANIFEST_FLUSH_ATTEMPTS} times while writing it")
+
+
+def _flush_manifest(manifest: PrefixManifest) -> bool:
+    """Write the shards of a manifest that have pending changes."""
+    failed = False
+    shards = manifest.pending_shards()
+    contents = manifest.shard_contents(shards)
+    # Written sequentially: flushes are rare and also run at interpreter exit,
+    # when no new threads can be started
+    for shard in shards:
+        changes, replaced = manifest.take_changes(shard)
+        try:
+            _write_shard(manifest, shard, contents[shard], replaced, changes)
+        except StorageError as e:
+            logger.error(f"Error writing manifest shard {manifest.shard_key(shard)}: {e}")
+            manifest.restore_changes(shard, changes, replaced)
+            failed = True
+    return not failed
+
+
+def flush_manifests() -> bool:
+    """
+    Persist the manifest shards changed since the last flush. Called automatically at exit.
+
+    Returns:
+        True if every dirty shard was written, False otherwise
+    """
+    return all([_flush_manifest(manifest) for manifest in _loaded_manifests()])
+
+
+atexit.register(flush_manifests)
+
+
+def _store_one(object_name: str, data: Union[str, bytes], flush: bool = True) -> bool:
+    """Upload a single object and keep the cache and manifests in sync."""
+    try:
+        # Convert string to bytes if needed
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        backend = get_backend()
+        etag = _request("put", backend.put, object_name, data)
+        _STATS.add_bytes("put", len(data))
+        cache = _get_cache()
+        if cache is not None:
+            cache.put(object_name, data, etag)
+        _record_write(object_name, len(data), etag, flush=flush)
+        logger.debug(f"Successfully uploaded data to {backend}/{object_name}")
+        return True
+    except StorageError as e:
+        logger.error(f"Error uploading {object_name} to storage: {e}")
+        return False
+
+
+def _read_one(object_name: str) -> Optional[bytes]:
+    """
+    Download a single object.
+
+    When the disk cache is enabled, a cached copy is revalidated with a conditional
+    GET and only downloaded again if it changed.
+    """
+    cache = _get_cache()
+    cached = cache.get(object_name) if cache is not None else None
+    try:
+        data, etag = _request(
+            "get", get_backend().get, object_name, if_none_match=cached[1] if cached is not None else None
+        )
+        _STATS.add_bytes("get", len(data))
+    except NotModified:
+        cache.record(hit=True)
+        return cached[0]
+    except StorageError as e:
+        logger.error(f"Error reading {object_name} from storage: {e}")
+        return None
+
+    if cache is not None:
+        cache.record(hit=False)
+        cache.put(object_name, data, etag)
+    return data
+
+
+def store_object(data: Union[str, bytes], object_name: str) -> bool:
+    """
+    Upload data directly to the storage bucket.
+
+    Args:
+        data: The data to upload (string or bytes)
+        object_name: Storage object name
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if _store_one(object_name, data):
+        logger.debug(f"Successfully uploaded data to {get_backend()}/{object_name}")
+        return True
+    return False
+
+
+def store_dict(data: dict, object_name: str, codec: Optional[str] = None) -> bool:
+    """
+    Upload a dictionary as a serialized object to the storage bucket.
+
+    Args:
+        data: The dictionary to upload
+        object_name: Storage object name
+        codec: Name of the codec to use (default: DEFAULT_DICT_CODEC, JSON + gzip)
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        return store_object(encode_dict(data, codec or DEFAULT_DICT_CODEC), object_name)
+    except Exception as e:
+        logger.error(f"Error uploading dictionary to storage: {e}")
+        return False
+
+
+def read_object(object_name: str) -> Optional[bytes]:
+    """
+    Read data from a storage object.
+
+    Args:
+        object_name: Storage object name
+
+    Returns:
+        Object data as bytes or None if failed
+    """
+    data = _read_one(object_name)
+    if data is not None:
+        logger.debug(f"Successfully read object {get_backend()}/{object_name}")
+    return data
+
+
+def read_dict(object_name: str) -> Optional[dict]:
+    """
+    Read a dictionary from the storage bucket, detecting the codec it was stored with.
+
+    Args:
+        object_name: Storage object name
+
+    Returns:
+        Dictionary if successful, None otherwise
+    """
+    try:
+        data = read_object(object_name)
+        if data:
+            return decode_dict(data)
+        return None
+    except Exception as e:
+        logger.error(f"Error reading dictionary from storage: {e}")
+        return None
+
+
+def publish_zstd_dictionary(dictionary_data: bytes) -> bool:
+    """
+    Store a trained zstd dictionary so that every reader can decode json+zstd-dict objects.
+
+    Args:
+        dictionary_data: Raw dictionary returned by train_zstd_dictionary()
+
+    Returns:
+        True if successful, False otherwise
+    """
+    dict_id = load_zstd_dictionary(dictionary_data)
+    return store_object(dictionary_data, f"{DICTIONARY_PREFIX}{dict_id}")
+
+
+def open_reader(object_name: str, start: int = 0, end: Optional[int] = None) -> StreamReader:
+    """
+    Open a streaming, file-like reader over an object (or a byte range of it).
+
+    The content is fetched while it is read, so large objects can be processed in
+    constant memory. Streaming reads bypass the disk cache.
+
+    Args:
+        object_name: Storage object name
+        start: First byte to read
+        end: Byte offset to stop at (exclusive), or None to read until the end
+
+    Returns:
+        Readable file-like object; close it (or use it as a context manager) when done
+
+    Raises:
+        StorageError: If the object cannot be opened
+    """
+    return _request("get", get_backend().open_read, object_name, start, end)
+
+
+def read_range(object_name: str, start: int, end: Optional[int] = None) -> Optional[bytes]:
+    """
+    Read bytes [start, end) of an object with a single ranged request.
+
+    Args:
+        object_name: Storage object name
+        start: First byte to read
+        end: Byte offset to stop at (exclusive), or None to read until the end
+
+    Returns:
+        The requested bytes, or None if failed
+    """
+    if end is not None and end <= start:
+        return b""
+    try:
+        with open_reader(object_name, start, end) as reader:
+            return reader.read()
+    except StorageError as e:
+        logger.error(f"Error reading range {start}-{end} of {object_name} from storage: {e}")
+        return None
+
+
+def iter_object(object_name: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    Iterate over the content of an object in chunks of at most chunk_size bytes.
+
+    Raises:
+        StorageError: If the object cannot be opened
+    """
+    with open_reader(object_name) as reader:
+        yield from reader.iter_chunks(chunk_size)
+
+
+def open_writer(object_name: str, part_size: int = MULTIPART_CHUNKSIZE) -> ChunkedWriter:
+    """
+    Open a chunked, file-like writer for an object.
+
+    Written data is uploaded in parts of part_size bytes as it arrives, so only one
+    part is held in memory. The object is published when the writer is closed; leaving
+    a `with` block with an exception aborts the upload.
+
+    Args:
+        object_name: Storage object name
+        part_size: Size of the uploaded parts (at least 5 MiB)
+
+    Returns:
+        Writable file-like object
+    """
+    cache = _get_cache()
+    if cache is not None:
+        cache.invalidate(object_name)
+    writer = get_backend().open_write(object_name, part_size)
+    writer.request = _request
+
+    def on_complete(completed: ChunkedWriter):
+        _STATS.add_bytes("put", completed.bytes_written)
+        _record_write(object_name, completed.bytes_written, completed.etag)
+
+    writer.on_complete = on_complete
+    return writer
+
+
+def store_file(file_path: str, object_name: str, part_size: int = MULTIPART_CHUNKSIZE) -> bool:
+    """
+    Upload a local file in constant memory.
+
+    Args:
+        file_path: Path of the local file
+        object_name: Storage object name
+        part_size: Size of the uploaded parts
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        with open(file_path, "rb") as source, open_writer(object_name, part_size) as writer:
+            shutil.copyfileobj(source, writer, part_size)
+        return True
+    except (OSError, StorageError) as e:
+        logger.error(f"Error uploading {file_path} to storage: {e}")
+        return False
+
+
+def etag_md5(etag: Optional[str]) -> Optional[str]:
+    """Return the MD5 hex digest carried by a single-part S3 ETag, or None."""
+    etag = (etag or "").strip('"')
+    return etag if len(etag) == 32 and all(c in "0123456789abcdef" for c in etag) else None
+
+
+def download_file(object_name: str, file_path: str, chunk_size: int = MULTIPART_CHUNKSIZE,
+                  size: Optional[int] = None, etag: Optional[str] = None) -> bool:
+    """
+    Download an object to a local file in constant memory.
+
+    The content is written to a temporary file first, so an interrupted download
+    never leaves a truncated file at file_path. With size or etag (as listed by
+    list_objects_info), the download is checked against the object size and the MD5
+    of a single-part ETag before it replaces file_path.
+
+    Args:
+        object_name: Storage object name
+        file_path: Path of the local file
+        chunk_size: Size of the chunks copied at once
+        size: Expected size of the object in bytes
+        etag: Expected ETag of the object
+
+    Returns:
+        True if successful, False otherwise
+    """
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}"
+    expected_md5 = etag_md5(etag)
+    digest = hashlib.md5() if expected_md5 is not None else None
+    try:
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open_reader(object_name) as reader, open(tmp_path, "wb") as target:
+            if digest is None:
+                shutil.copyfileobj(reader, target, chunk_size)
+            else:
+                for chunk in reader.iter_chunks(chunk_size):
+                    digest.update(chunk)
+                    target.write(chunk)
+        written = os.path.getsize(tmp_path)
+        if size is not None and written != size:
+            raise StorageError("SizeMismatch", f"{written} bytes, expected {size}")
+        if digest is not None and digest.hexdigest() != expected_md5:
+            raise StorageError("ChecksumMismatch", f"MD5 {digest.hexdigest()}, expected {expected_md5}")
+        os.replace(tmp_path, file_path)
+        return True
+    except (OSError, StorageError) as e:
+        logger.error(f"Error downloading {object_name} to {file_path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def list_objects(prefix: str = "") -> list:
+    """
+    List objects in the storage bucket with optional prefix, handling pagination
+    for more than 1000 objects. Answered from memory if a loaded manifest covers the prefix.
+
+    Args:
+        prefix: Object key prefix
+
+    Returns:
+        List of object keys
+    """
+    return [info["key"] for info in list_objects_info(prefix)]
+
+
+def list_objects_info(prefix: str = "") -> List[dict]:
+    """
+    List objects with their size and ETag. Answered from memory if a loaded manifest
+    covers the prefix.
+
+    Args:
+        prefix: Object key prefix
+
+    Returns:
+        List of {"key", "size", "etag"} dictionaries sorted by key
+    """
+    manifest = _find_manifest(prefix)
+    if manifest is not None:
+        return manifest.list_info(prefix)
+    try:
+        return _request("list", get_backend().list_info, prefix)
+    except StorageError as e:
+        logger.error(f"Error listing objects in storage: {e}")
+        return []
+
+
+def check_object_exists(object_name: str) -> bool:
+    """
+    Check if an object exists in the storage bucket. Answered from memory if a loaded
+    manifest covers the object.
+
+    Args:
+        object_name: Storage object name
+
+    Returns:
+        True if object exists, False otherwise
+    """
+    manifest = _find_manifest(object_name)
+    if manifest is not None:
+        return object_name in manifest
+    try:
+        return _request("head", get_backend().exists, object_name)
+    except StorageError:
+        return False
+
+
+def delete_object(object_name: str) -> bool:
+    """
+    Delete an object from the storage bucket.
+
+    Args:
+        object_name: Storage object name
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        backend = get_backend()
+        _request("delete", backend.delete, object_name)
+        cache = _get_cache()
+        if cache is not None:
+            cache.invalidate(object_name)
+        _record_delete(object_name)
+        logger.debug(f"Successfully deleted {backend}/{object_name}")
+        return True
+    except StorageError as e:
+        logger.error(f"Error deleting object from storage: {e}")
+        return False
+
+
+def _run_concurrently(func, keys: list, max_workers: int) -> dict:
+    """Run func(key) for every key on a bounded thread pool and collect the results by key."""
+    results = {}
+    if not keys:
+        return results
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as executor:
+        futures = {executor.submit(func, key): key for key in keys}
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def store_many(
+    objects: Union[Mapping[str, Union[str, bytes]], Iterable[Tuple[str, Union[str, bytes]]]],
+    max_workers: int = MAX_CONCURRENCY,
+) -> Dict[str, bool]:
+    """
+    Upload many objects concurrently. Large objects are uploaded in parts.
+
+    Args:
+        objects: Mapping (or iterable of pairs) of object name to data (string or bytes)
+        max_workers: Maximum number of objects uploaded in parallel
+
+    Returns:
+        Dictionary mapping each object name to True if it was uploaded, False otherwise
+    """
+    objects = dict(objects)
+    results = _run_concurrently(lambda key: _store_one(key, objects[key], False), list(objects), max_workers)
+    flush_manifests()
+    return results
+
+
+def read_many(object_names: Iterable[str], max_workers: int = MAX_CONCURRENCY) -> Dict[str, Optional[bytes]]:
+    """
+    Read many objects concurrently. Large objects are downloaded with parallel ranged reads.
+
+    Args:
+        object_names: Storage object names
+        max_workers: Maximum number of objects downloaded in parallel
+
+    Returns:
+        Dictionary mapping each object name to its data, or None if it could not be read
+    """
+    return _run_concurrently(_read_one, list(dict.fromkeys(object_names)), max_workers)
+
+
+def delete_many(object_names: Iterable[str], max_workers: int = 4) -> Dict[str, bool]:
+    """
+    Delete many objects using batched delete requests of up to 1000 keys.
+
+    Args:
+        object_names: Storage object names
+        max_workers: Maximum number of batch delete requests in flight
+
+    Returns:
+        Dictionary mapping each object name to True if it was deleted, False otherwise
+    """
+    keys = list(dict.fromkeys(object_names))
+    batches = [keys[i:i + DELETE_BATCH_SIZE] for i in range(0, len(keys), DELETE_BATCH_SIZE)]
+    backend = get_backend()
+    cache = _get_cache()
+
+    def delete_batch(index: int) -> Dict[str, bool]:
+        try:
+            return _request("delete", backend.delete_batch, batches[index])
+        except StorageError as e:
+            logger.error(f"Error deleting batch of {len(batches[index])} objects from storage: {e}")
+            return {key: False for key in batches[index]}
+
+    results = {}
+    for batch_results in _run_concurrently(delete_batch, list(range(len(batches))), max_workers).values():
+        results.update(batch_results)
+
+    for key, deleted in results.items():
+        if deleted:
+            if cache is not None:
+                cache.invalidate(key)
+            _record_delete(key, flush=False)
+    flush_manifests()
+    return results
@@ -0,0 +1,21 @@
+from . import (
+    store_dict, read_dict, delete_object, list_objects, store_many, read_many, delete_many,
+    open_writer, read_range, iter_object,
+)
+
+store_dict({"foo": "bar"}, "test/hello.txt")
+print(read_dict("test/hello.txt"))
+delete_object("test/hello.txt")
+assert "test/hello.txt" not in list_objects("")
+
+keys = [f"test/many/{i}.txt" for i in range(20)]
+assert all(store_many({key: key for key in keys}).values())
+assert read_many(keys)[keys[0]] == keys[0].encode("utf-8")
+assert all(delete_many(keys).values())
+
+with open_writer("test/stream.bin") as writer:
+    for i in range(3):
+        writer.write(bytes([i]) * 1024)
+assert read_range("test/stream.bin", 1020, 1030) == bytes([0]) * 4 + bytes([1]) * 6
+assert sum(len(chunk) for chunk in iter_object("test/stream.bin", 1000)) == 3 * 1024
+delete_object("test/stream.bin")
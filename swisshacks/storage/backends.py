@@ -0,0 +1,425 @@
+import os
+import io
+import logging
+import threading
+import concurrent.futures
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, conditional puts are then only atomic within one process
+    fcntl = None
+
+from .stream import TMP_SUFFIX, ChunkedWriter, FileWriter, S3MultipartWriter, StreamReader
+
+logger = logging.getLogger(__name__)
+
+# Objects larger than this are transferred in parts
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+# Parallel part transfers per large object
+MULTIPART_CONCURRENCY = 4
+# Hard limit of the DeleteObjects API
+DELETE_BATCH_SIZE = 1000
+
+
+class StorageError(Exception):
+    """Error raised by storage backends, carrying an S3-style error code."""
+
+    def __init__(self, code: str, message: str = ""):
+        super().__init__(f"{code}: {message}" if message else code)
+        self.code = code
+
+
+# Error code of a conditional put whose condition no longer holds
+PRECONDITION_FAILED = "PreconditionFailed"
+
+
+class NotModified(Exception):
+    """Raised by a conditional get when the stored object still matches the given ETag."""
+
+
+class StorageBackend(ABC):
+    """Minimal object store interface used by the storage module."""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> Optional[str]:
+        """Store data under key and return the ETag of the new object if known."""
+
+    @abstractmethod
+    def put_if(self, key: str, data: bytes, etag: Optional[str]) -> Optional[str]:
+        """
+        Store small data under key only if the stored object still has etag, or if
+        there is no object yet when etag is None. Return the ETag of the new object.
+
+        Raises:
+            StorageError: With code PRECONDITION_FAILED if the condition does not hold
+        """
+
+    @abstractmethod
+    def get(self, key: str, if_none_match: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+        """
+        Return (data, etag) of an object.
+
+        Raises:
+            NotModified: If if_none_match is given and still matches the object
+            StorageError: If the object cannot be read
+        """
+
+    @abstractmethod
+    def open_read(self, key: str, start: int = 0, end: Optional[int] = None) -> StreamReader:
+        """
+        Open a streaming reader over bytes [start, end) of an object.
+
+        Raises:
+            StorageError: If the object cannot be read
+        """
+
+    @abstractmethod
+    def open_write(self, key: str, part_size: int = MULTIPART_CHUNKSIZE) -> ChunkedWriter:
+        """Open a writer that uploads the object in parts of part_size bytes."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Return True if an object is stored under key."""
+
+    @abstractmethod
+    def list_info(self, prefix: str = "") -> List[dict]:
+        """
+        Return {"key", "size", "etag"} of all objects whose key starts with prefix,
+        in lexicographic key order.
+        """
+
+    def list(self, prefix: str = "") -> List[str]:
+        """Return all keys starting with prefix, in lexicographic order."""
+        return [info["key"] for info in self.list_info(prefix)]
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Delete an object. Deleting a missing key is not an error."""
+
+    def delete_batch(self, keys: List[str]) -> Dict[str, bool]:
+        """Delete several objects and return the per-key outcome."""
+        results = {}
+        for key in keys:
+            try:
+                self.delete(key)
+                results[key] = True
+            except StorageError as e:
+                logger.error(f"Error deleting {key} from {self}: {e}")
+                results[key] = False
+        return results
+
+
+class S3Backend(StorageBackend):
+    """Backend storing objects in an S3 bucket."""
+
+    def __init__(self, bucket: str, client=None, max_pool_connections: int = 64):
+        if not bucket:
+            raise ValueError("S3_BUCKET environment variable is not set")
+        self.bucket = bucket
+        self.client = client or get_s3_client(max_pool_connections)
+
+    def __str__(self) -> str:
+        return f"s3://{self.bucket}"
+
+    @staticmethod
+    @contextmanager
+    def _translate_errors(key: Optional[str] = None):
+        """Translate the boto3 and botocore errors raised in the block to StorageError."""
+        from boto3.exceptions import S3UploadFailedError
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            yield
+        except BotoCoreError as e:
+            # Connection failures, timeouts, ... raised before any response
+            raise StorageError("ConnectionError", str(e)) from e
+        except ClientError as e:
+            error = e.response.get("Error", {})
+            code = str(error.get("Code", ""))
+            if code in ("304", "NotModified"):
+                raise NotModified(key) from e
+            raise StorageError(code, error.get("Message", str(e))) from e
+        except S3UploadFailedError as e:
+            # Raised by the transfer manager in place of the ClientError of a failed part
+            cause = e.__cause__ or e.__context__
+            code = str(cause.response.get("Error", {}).get("Code", "")) if isinstance(cause, ClientError) else ""
+            raise StorageError(code or "InternalError", str(e)) from e
+
+    def _call(self, method: str, **kwargs) -> dict:
+        """Call a client method and translate botocore errors to StorageError."""
+        with self._translate_errors(kwargs.get("Key")):
+            return getattr(self.client, method)(Bucket=self.bucket, **kwargs)
+
+    def put(self, key: str, data: bytes) -> Optional[str]:
+        if len(data) < MULTIPART_THRESHOLD:
+            return self._call("put_object", Key=key, Body=data).get("ETag")
+
+        from boto3.s3.transfer import TransferConfig
+
+        config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNKSIZE,
+            max_concurrency=MULTIPART_CONCURRENCY,
+        )
+        with self._translate_errors(key):
+            self.client.upload_fileobj(io.BytesIO(data), self.bucket, key, Config=config)
+        # The ETag of a multipart object is not the digest of its content
+        return None
+
+    def put_if(self, key: str, data: bytes, etag: Optional[str]) -> Optional[str]:
+        condition = {"IfMatch": etag} if etag is not None else {"IfNoneMatch": "*"}
+        try:
+            return self._call("put_object", Key=key, Body=data, **condition).get("ETag")
+        except StorageError as e:
+            # 409 when a concurrent conditional write to the same key is in progress
+            if e.code in ("412", PRECONDITION_FAILED, "409", "ConditionalRequestConflict"):
+                raise StorageError(PRECONDITION_FAILED, key) from e
+            raise
+
+    def get(self, key: str, if_none_match: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+        # The first request fetches at most one chunk; larger objects are completed with
+        # parallel ranged GETs, so small objects still cost a single round trip.
+        conditional = {"IfNoneMatch": if_none_match} if if_none_match else {}
+        try:
+            response = self._call("get_object", Key=key, Range=f"bytes=0-{MULTIPART_CHUNKSIZE - 1}", **conditional)
+        except StorageError as e:
+            # Ranged GETs on empty objects are rejected, fall back to a plain GET
+            if e.code != "InvalidRange":
+                raise
+            response = self._call("get_object", Key=key, **conditional)
+
+        data = response["Body"].read()
+        etag = response.get("ETag")
+        content_range = response.get("ContentRange")
+        total_size = int(content_range.rsplit("/", 1)[1]) if content_range else len(data)
+        if total_size > len(data):
+            def read_part(start: int) -> bytes:
+                end = min(start + MULTIPART_CHUNKSIZE, total_size) - 1
+                # IfMatch guarantees all parts come from the same version of the object
+                part = self._call("get_object", Key=key, Range=f"bytes={start}-{end}", IfMatch=etag)
+                return part["Body"].read()
+
+            starts = range(len(data), total_size, MULTIPART_CHUNKSIZE)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=MULTIPART_CONCURRENCY) as executor:
+                data = b"".join([data, *executor.map(read_part, starts)])
+        return data, etag
+
+    def open_read(self, key: str, start: int = 0, end: Optional[int] = None) -> StreamReader:
+        if start == 0 and end is None:
+            response = self._call("get_object", Key=key)
+        else:
+            # HTTP ranges are inclusive on both ends
+            byte_range = f"bytes={start}-{end - 1}" if end is not None else f"bytes={start}-"
+            response = self._call("get_object", Key=key, Range=byte_range)
+        return StreamReader(response["Body"], length=response.get("ContentLength"))
+
+    def open_write(self, key: str, part_size: int = MULTIPART_CHUNKSIZE) -> ChunkedWriter:
+        return S3MultipartWriter(self, key, part_size)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._call("head_object", Key=key)
+            return True
+        except StorageError as e:
+            if e.code in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def list_info(self, prefix: str = "") -> List[dict]:
+        all_objects = []
+        with self._translate_errors():
+            paginator = self.client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                for obj in page.get("Contents", []):
+                    all_objects.append({"key": obj["Key"], "size": obj["Size"], "etag": obj.get("ETag")})
+        return all_objects
+
+    def delete(self, key: str):
+        self._call("delete_object", Key=key)
+
+    def delete_batch(self, keys: List[str]) -> Dict[str, bool]:
+        results = {key: False for key in keys}
+        for i in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[i:i + DELETE_BATCH_SIZE]
+            response = self._call(
+                "delete_objects",
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": False},
+            )
+            for deleted in response.get("Deleted", []):
+                results[deleted["Key"]] = True
+            for error in response.get("Errors", []):
+                logger.error(f"Error deleting {error.get('Key')} from {self}: {error.get('Code')} {error.get('Message')}")
+        return results
+
+
+class FileSystemBackend(StorageBackend):
+    """
+    Backend storing objects as files below a root directory.
+
+    Keys map to relative paths, so "train/1/0/42/passport.png" is stored at
+    <root>/train/1/0/42/passport.png. ETags are derived from the file size and
+    modification time, so listings never have to read the files.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._put_if_lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"file://{self.root}"
+
+    def _path(self, key: str) -> str:
+        """Map a key to a file path below the root directory."""
+        parts = key.split("/")
+        # Keys ending in TMP_SUFFIX would be hidden from listings
+        if (not key or key.endswith(("/", TMP_SUFFIX))
+                or any(part in ("", ".", "..") for part in parts)):
+            raise StorageError("InvalidKey", f"Key {key!r} cannot be stored on the filesystem")
+        return os.path.join(self.root, *parts)
+
+    @staticmethod
+    def _etag(stat: os.stat_result) -> str:
+        return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def put(self, key: str, data: bytes) -> Optional[str]:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+            return self._etag(os.stat(path))
+        except OSError as e:
+            raise StorageError("InternalError", str(e)) from e
+
+    def put_if(self, key: str, data: bytes, etag: Optional[str]) -> Optional[str]:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Serializes the check and the write with other threads, and other processes through the lock file
+            with self._put_if_lock, open(f"{path}.lock{TMP_SUFFIX}", "wb") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    current = self._etag(os.stat(path))
+                except FileNotFoundError:
+                    current = None
+                if current != etag:
+                    raise StorageError(PRECONDITION_FAILED, key)
+                new_etag = self.put(key, data)
+                if new_etag == current:
+                    # Same size within one tick of a coarse clock: move the mtime so the ETag changes
+                    stat = os.stat(path)
+                    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+                    new_etag = self._etag(os.stat(path))
+                return new_etag
+        except OSError as e:
+            raise StorageError("InternalError", str(e)) from e
+
+    def get(self, key: str, if_none_match: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+        try:
+            with open(self._path(key), "rb") as handle:
+                etag = self._etag(os.fstat(handle.fileno()))
+                if if_none_match is not None and if_none_match == etag:
+                    raise NotModified(key)
+                data = handle.read()
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError) as e:
+            raise StorageError("NoSuchKey", key) from e
+        except OSError as e:
+            raise StorageError("InternalError", str(e)) from e
+        return data, etag
+
+    def open_read(self, key: str, start: int = 0, end: Optional[int] = None) -> StreamReader:
+        try:
+            handle = open(self._path(key), "rb")
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError) as e:
+            raise StorageError("NoSuchKey", key) from e
+        except OSError as e:
+            raise StorageError("InternalError", str(e)) from e
+        handle.seek(start)
+        return StreamReader(handle, length=end - start if end is not None else None)
+
+    def open_write(self, key: str, part_size: int = MULTIPART_CHUNKSIZE) -> ChunkedWriter:
+        try:
+            return FileWriter(self._path(key), part_size)
+        except OSError as e:
+            raise StorageError("InternalError", str(e)) from e
+
+    def exists(self, key: str) -> bool:
+        try:
+            return os.path.isfile(self._path(key))
+        except StorageError:
+            return False
+
+    def list_info(self, prefix: str = "") -> List[dict]:
+        # Only walk the deepest directory that can contain keys with this prefix
+        directory = prefix.rsplit("/", 1)[0] if "/" in prefix else ""
+        start = os.path.join(self.root, *directory.split("/")) if directory else self.root
+        objects = []
+        for root, _, files in os.walk(start):
+            relative_root = os.path.relpath(root, self.root).replace(os.sep, "/")
+            for filename in files:
+                if filename.endswith(TMP_SUFFIX):
+                    continue
+                key = filename if relative_root == "." else f"{relative_root}/{filename}"
+                if not key.startswith(prefix):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, filename))
+                except OSError:
+                    continue
+                objects.append({"key": key, "size": stat.st_size, "etag": self._etag(stat)})
+        return sorted(objects, key=lambda info: info["key"])
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            raise StorageError("InternalError", str(e)) from e
+
+
+def get_s3_client(max_pool_connections: int = 64):
+    """Initialize and return an S3 client using environment variables for authentication."""
+    import boto3
+    from botocore.config import Config
+
+    try:
+        s3_client = boto3.client(
+            "s3",
+            aws_access_key_id=os.environ.get("S3_ACCESS"),
+            aws_secret_access_key=os.environ.get("S3_SECRET"),
+            # Keep enough pooled connections for the bulk transfer workers. Retries are
+            # handled by the storage retry policy, which also tracks throttling.
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                retries={"max_attempts": 1, "mode": "standard"},
+            ),
+        )
+        return s3_client
+    except Exception as e:
+        logger.error(f"Failed to initialize S3 client: {e}")
+        raise
+
+
+def create_backend_from_env(max_pool_connections: int = 64) -> StorageBackend:
+    """
+    Create the backend selected by the STORAGE_BACKEND environment variable.
+
+    STORAGE_BACKEND=s3 (default) uses the S3_BUCKET bucket, STORAGE_BACKEND=fs stores
+    objects below STORAGE_ROOT (default: ./storage_data).
+    """
+    kind = os.environ.get("STORAGE_BACKEND", "s3").lower()
+    if kind == "s3":
+        return S3Backend(os.environ.get("S3_BUCKET"), max_pool_connections=max_pool_connections)
+    if kind in ("fs", "file", "filesystem"):
+        return FileSystemBackend(os.environ.get("STORAGE_ROOT", "storage_data"))
+    raise ValueError(f"Unsupported STORAGE_BACKEND: {kind!r}")
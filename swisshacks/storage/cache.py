@@ -0,0 +1,169 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    Size-capped local disk cache for storage objects with LRU eviction.
+
+    Every entry keeps the ETag of the object it was downloaded from, so callers can
+    revalidate it with a conditional GET instead of downloading it again. The LRU
+    order is persisted through the modification time of the cached files and is
+    therefore preserved across processes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        # key -> (size, etag), least recently used first
+        self._entries: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        """Return the data and metadata file paths of a key."""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest[:2], digest)
+        return base, f"{base}.json"
+
+    def _load(self):
+        """Rebuild the in-memory index from the files left by previous runs."""
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                if not filename.endswith(".json"):
+                    continue
+                meta_path = os.path.join(root, filename)
+                data_path = meta_path[:-len(".json")]
+                try:
+                    with open(meta_path, "r", encoding="utf-8") as handle:
+                        meta = json.load(handle)
+                    stat = os.stat(data_path)
+                except (OSError, ValueError):
+                    continue
+                found.append((stat.st_mtime, meta["key"], stat.st_size, meta["etag"]))
+
+        for _, key, size, etag in sorted(found):
+            self._entries[key] = (size, etag)
+            self._size += size
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        while self._size > self.max_bytes and self._entries:
+            key, (size, _) = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Look up a cached object.
+
+        Args:
+            key: Storage object name
+
+        Returns:
+            Tuple of (data, etag) if the key is cached, None otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+
+        data_path, _ = self._paths(key)
+        try:
+            with open(data_path, "rb") as handle:
+                data = handle.read()
+            os.utime(data_path)
+        except OSError:
+            self.invalidate(key)
+            return None
+        return data, entry[1]
+
+    def put(self, key: str, data: bytes, etag: str):
+        """
+        Store an object in the cache, evicting old entries if needed.
+
+        Args:
+            key: Storage object name
+            data: Object content
+            etag: ETag of the stored object
+        """
+        if not etag or len(data) > self.max_bytes:
+            self.invalidate(key)
+            return
+
+        data_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        try:
+            # Write to temporary files first so readers never see a partial entry
+            for path, content in ((data_path, data),
+                                  (meta_path, json.dumps({"key": key, "etag": etag}).encode("utf-8"))):
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as handle:
+                    handle.write(content)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write {key} to the disk cache: {e}")
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[0]
+            self._entries[key] = (len(data), etag)
+            self._size += len(data)
+            self._evict()
+
+    def invalidate(self, key: str):
+        """Remove a key from the cache if present."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            self._size -= entry[0]
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def record(self, hit: bool):
+        """Count a lookup as a hit (served from the cache) or a miss (downloaded)."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        """Return the cache counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
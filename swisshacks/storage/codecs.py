@@ -0,0 +1,245 @@
+import gzip
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Header of objects written by a non-legacy codec: magic, name length, codec name
+HEADER_MAGIC = b"SHC\x01"
+GZIP_MAGIC = b"\x1f\x8b"
+# Storage prefix holding trained zstd dictionaries, named by dictionary id
+DICTIONARY_PREFIX = "_codecs/zstd-dict/"
+
+
+def _import_zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstandard package is required for zstd codecs. Install it with: pip install zstandard")
+    return zstandard
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("msgpack package is required for msgpack codecs. Install it with: pip install msgpack")
+    return msgpack
+
+
+class Codec(ABC):
+    """Serializer turning a dictionary into bytes and back."""
+
+    name: str
+
+    @abstractmethod
+    def encode(self, data: dict) -> bytes:
+        """Serialize data, without the codec header."""
+
+    @abstractmethod
+    def decode(self, payload: bytes) -> dict:
+        """Deserialize a payload produced by encode."""
+
+
+class JsonGzipCodec(Codec):
+    """
+    JSON compressed with gzip, the historical store_dict format.
+
+    Objects are written without the codec header: the gzip magic number already
+    identifies them, and it keeps them readable by older versions of this module.
+    """
+
+    name = "json+gzip"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def encode(self, data: dict) -> bytes:
+        return gzip.compress(json.dumps(data).encode("utf-8"), compresslevel=self.level)
+
+    def decode(self, payload: bytes) -> dict:
+        return json.loads(gzip.decompress(payload).decode("utf-8"))
+
+
+class MsgpackZstdCodec(Codec):
+    """MessagePack compressed with zstd."""
+
+    name = "msgpack+zstd"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+        # zstd (de)compressors must not be shared between threads
+        self._local = threading.local()
+
+    def encode(self, data: dict) -> bytes:
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = _import_zstd().ZstdCompressor(level=self.level)
+        return self._local.compressor.compress(_import_msgpack().packb(data, use_bin_type=True))
+
+    def decode(self, payload: bytes) -> dict:
+        if not hasattr(self._local, "decompressor"):
+            self._local.decompressor = _import_zstd().ZstdDecompressor()
+        raw = self._local.decompressor.decompress(payload)
+        return _import_msgpack().unpackb(raw, raw=False, strict_map_key=False)
+
+
+class ZstdDictCodec(Codec):
+    """
+    JSON compressed with zstd and a dictionary trained on sample objects.
+
+    Small, similar documents share most of their keys and boilerplate, which a
+    dictionary captures once instead of in every object. The dictionary id is part
+    of each zstd frame, so decoding looks the dictionary up by id: first in memory,
+    then in storage under DICTIONARY_PREFIX.
+    """
+
+    name = "json+zstd-dict"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+        self.dictionary = None
+        self._dictionaries: Dict[int, object] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def use_dictionary(self, dictionary_data: bytes) -> int:
+        """
+        Make a dictionary available for decoding and use it for encoding.
+
+        Args:
+            dictionary_data: Raw zstd dictionary
+
+        Returns:
+            The dictionary id
+        """
+        zstd = _import_zstd()
+        dictionary = zstd.ZstdCompressionDict(dictionary_data)
+        dictionary.precompute_compress(level=self.level)
+        with self._lock:
+            self._dictionaries[dictionary.dict_id()] = dictionary
+            self.dictionary = dictionary
+            self._local = threading.local()
+        return dictionary.dict_id()
+
+    def _get_dictionary(self, dict_id: int):
+        with self._lock:
+            dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None:
+            # Imported lazily, the storage package imports this module
+            from . import read_object
+
+            dictionary_data = read_object(f"{DICTIONARY_PREFIX}{dict_id}")
+            if dictionary_data is None:
+                raise ValueError(f"Unknown zstd dictionary id {dict_id}")
+            dictionary = _import_zstd().ZstdCompressionDict(dictionary_data)
+            with self._lock:
+                self._dictionaries[dict_id] = dictionary
+        return dictionary
+
+    def encode(self, data: dict) -> bytes:
+        if self.dictionary is None:
+            raise ValueError(f"Codec {self.name} has no dictionary, train one with train_zstd_dictionary()")
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = _import_zstd().ZstdCompressor(level=self.level, dict_data=self.dictionary)
+            self._local.compressor = compressor
+        return compressor.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def decode(self, payload: bytes) -> dict:
+        zstd = _import_zstd()
+        dict_id = zstd.get_frame_parameters(payload).dict_id
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        if dict_id not in decompressors:
+            decompressors[dict_id] = zstd.ZstdDecompressor(dict_data=self._get_dictionary(dict_id))
+        return json.loads(decompressors[dict_id].decompress(payload).decode("utf-8"))
+
+
+_CODECS: Dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec):
+    """Register a codec under its name, replacing any codec of the same name."""
+    if len(codec.name.encode("ascii")) > 255:
+        raise ValueError(f"Codec name too long: {codec.name!r}")
+    _CODECS[codec.name] = codec
+
+
+def get_codec(name: str) -> Codec:
+    """Return the registered codec with the given name."""
+    try:
+        return _CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec {name!r}, available codecs: {', '.join(sorted(_CODECS))}")
+
+
+def available_codecs() -> list:
+    """Return the names of all registered codecs."""
+    return sorted(_CODECS)
+
+
+register_codec(JsonGzipCodec())
+register_codec(MsgpackZstdCodec())
+register_codec(ZstdDictCodec())
+
+
+def encode_dict(data: dict, codec_name: str = JsonGzipCodec.name) -> bytes:
+    """
+    Serialize a dictionary with a registered codec.
+
+    Args:
+        data: The dictionary to serialize
+        codec_name: Name of the codec to use
+
+    Returns:
+        Self-describing bytes that decode_dict can read back
+    """
+    codec = get_codec(codec_name)
+    payload = codec.encode(data)
+    if isinstance(codec, JsonGzipCodec):
+        return payload
+    name = codec.name.encode("ascii")
+    return b"".join([HEADER_MAGIC, bytes([len(name)]), name, payload])
+
+
+def decode_dict(data: bytes) -> dict:
+    """
+    Deserialize bytes produced by encode_dict, detecting the codec from the data.
+
+    Plain gzip data is read as legacy json+gzip, and uncompressed JSON is accepted too.
+    """
+    if data.startswith(HEADER_MAGIC):
+        length = data[len(HEADER_MAGIC)]
+        start = len(HEADER_MAGIC) + 1
+        name = data[start:start + length].decode("ascii")
+        return get_codec(name).decode(data[start + length:])
+    if data.startswith(GZIP_MAGIC):
+        return get_codec(JsonGzipCodec.name).decode(data)
+    return json.loads(data.decode("utf-8"))
+
+
+def train_zstd_dictionary(samples: Iterable[dict], dict_size: int = 16 * 1024) -> bytes:
+    """
+    Train a zstd dictionary on sample documents and activate it in the json+zstd-dict codec.
+
+    Args:
+        samples: Representative documents, a few hundred is usually enough
+        dict_size: Maximum size of the dictionary in bytes
+
+    Returns:
+        The raw dictionary, to be stored with storage.publish_zstd_dictionary()
+    """
+    zstd = _import_zstd()
+    encoded = [json.dumps(sample, separators=(",", ":")).encode("utf-8") for sample in samples]
+    dictionary = zstd.train_dictionary(dict_size, encoded)
+    dictionary_data = dictionary.as_bytes()
+    dict_id = get_codec(ZstdDictCodec.name).use_dictionary(dictionary_data)
+    logger.info(f"Trained zstd dictionary {dict_id} ({len(dictionary_data)} bytes) on {len(encoded)} samples")
+    return dictionary_data
+
+
+def load_zstd_dictionary(dictionary_data: bytes) -> int:
+    """Activate a previously trained dictionary in the json+zstd-dict codec and return its id."""
+    return get_codec(ZstdDictCodec.name).use_dictionary(dictionary_data)
@@ -0,0 +1,164 @@
+import zlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Storage prefix holding the manifest shards of every indexed prefix
+MANIFEST_PREFIX = "_manifests/"
+DEFAULT_SHARD_COUNT = 8
+# ETag of a shard whose stored version is not known
+UNKNOWN_ETAG = object()
+
+
+class PrefixManifest:
+    """
+    In-memory index of the objects below a storage prefix, persisted as sharded objects.
+
+    Keys are spread over shard_count shards by CRC32, each stored at
+    _manifests/<prefix>shard-<i>-of-<n>. Writes through the storage module update
+    the index and are recorded as pending changes of their shard, so a flush only
+    rewrites the shards that changed. Several processes may write below the same
+    prefix: a shard is written conditionally on the ETag it was read with, and if
+    another process wrote it since, the stored shard is read again and the pending
+    changes are applied on top of it. Lookups and listings are answered from memory
+    without any request.
+    """
+
+    def __init__(self, prefix: str, shard_count: int = DEFAULT_SHARD_COUNT):
+        self.prefix = prefix
+        self.shard_count = shard_count
+        # key -> {"size": ..., "etag": ...}
+        self._objects: Dict[str, dict] = {}
+        # shard -> {key: info, or None if deleted} written or deleted since the last flush
+        self._changes: Dict[int, Dict[str, Optional[dict]]] = {}
+        # Shards rebuilt from a full listing, written whole instead of merged
+        self._replaced = set()
+        # shard -> ETag of the stored shard the index is based on (None: not stored)
+        self._etags: Dict[int, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def shard_of(self, key: str) -> int:
+        """Return the shard holding a key."""
+        return zlib.crc32(key.encode("utf-8")) % self.shard_count
+
+    def shard_key(self, shard: int) -> str:
+        """Return the storage object name of a shard."""
+        return f"{MANIFEST_PREFIX}{self.prefix}shard-{shard:04d}-of-{self.shard_count:04d}"
+
+    def covers(self, key: str) -> bool:
+        """Return True if key belongs to the indexed prefix."""
+        return key.startswith(self.prefix) and not key.startswith(MANIFEST_PREFIX)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._objects
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the size and ETag recorded for a key, or None if it is not indexed."""
+        return self._objects.get(key)
+
+    def add(self, key: str, size: Optional[int] = None, etag: Optional[str] = None):
+        """Record a written object."""
+        with self._lock:
+            self._objects[key] = {"size": size, "etag": etag}
+            self._changes.setdefault(self.shard_of(key), {})[key] = self._objects[key]
+
+    def discard(self, key: str):
+        """Record a deleted object."""
+        with self._lock:
+            if self._objects.pop(key, None) is not None:
+                self._changes.setdefault(self.shard_of(key), {})[key] = None
+
+    def list_info(self, prefix: str = "") -> List[dict]:
+        """Return {"key", "size", "etag"} of the indexed objects starting with prefix, sorted by key."""
+        with self._lock:
+            items = [(key, info) for key, info in self._objects.items() if key.startswith(prefix)]
+        return [{"key": key, **info} for key, info in sorted(items)]
+
+    def load_shards(self, shards: Dict[int, dict], etags: Dict[int, Optional[str]]):
+        """Replace the index with the decoded content of all shards, read with the given ETags."""
+        with self._lock:
+            self._objects = {}
+            for shard in shards.values():
+                self._objects.update(shard["objects"])
+            self._changes = {}
+            self._replaced = set()
+            self._etags = dict(etags)
+
+    def replace(self, objects: List[dict]):
+        """Replace the index with a full listing; every shard is written whole on the next flush."""
+        with self._lock:
+            self._objects = {
+                info["key"]: {"size": info.get("size"), "etag": info.get("etag")}
+                for info in objects
+                if self.covers(info["key"])
+            }
+            self._changes = {}
+            self._replaced = set(range(self.shard_count))
+
+    def pending_shards(self) -> List[int]:
+        """Return the shards with changes that are not stored yet."""
+        with self._lock:
+            return sorted(set(self._changes) | self._replaced)
+
+    def shard_contents(self, shards: List[int]) -> Dict[int, dict]:
+        """Return the stored form of shards, as the index currently sees them, in one pass."""
+        contents = {
+            shard: {"prefix": self.prefix, "shard": shard, "shard_count": self.shard_count, "objects": {}}
+            for shard in shards
+        }
+        with self._lock:
+            for key, info in self._objects.items():
+                shard = self.shard_of(key)
+                if shard in contents:
+                    contents[shard]["objects"][key] = info
+        return contents
+
+    def shard_etag(self, shard: int):
+        """Return the ETag of the stored shard the index is based on, or UNKNOWN_ETAG."""
+        with self._lock:
+            return self._etags.get(shard, UNKNOWN_ETAG)
+
+    def take_changes(self, shard: int) -> Tuple[Dict[str, Optional[dict]], bool]:
+        """Take the pending changes of a shard for a flush: (changes, whether the shard was replaced)."""
+        with self._lock:
+            replaced = shard in self._replaced
+            self._replaced.discard(shard)
+            return self._changes.pop(shard, {}), replaced
+
+    def restore_changes(self, shard: int, changes: Dict[str, Optional[dict]], replaced: bool):
+        """Put back the changes of a failed flush; changes made since then take precedence."""
+        with self._lock:
+            self._changes[shard] = {**changes, **self._changes.get(shard, {})}
+            if replaced:
+                self._replaced.add(shard)
+
+    def merge_shard(self, shard: int, stored_objects: Dict[str, dict], etag: Optional[str],
+                    changes: Dict[str, Optional[dict]]):
+        """
+        Rebase a shard on the version another process stored: its objects with the
+        taken changes and any newer pending changes applied on top.
+        """
+        with self._lock:
+            objects = {key: info for key, info in self._objects.items() if self.shard_of(key) != shard}
+            objects.update(stored_objects)
+            for pending in (changes, self._changes.get(shard, {})):
+                for key, info in pending.items():
+                    if info is None:
+                        objects.pop(key, None)
+                    else:
+                        objects[key] = info
+            self._objects = objects
+            self._etags[shard] = etag
+
+    def set_shard_etag(self, shard: int, etag: Optional[str]):
+        """Record the ETag of a shard after writing it; None if the store did not return one."""
+        with self._lock:
+            if etag is None:
+                self._etags.pop(shard, None)
+            else:
+                self._etags[shard] = etag
@@ -0,0 +1,119 @@
+import os
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, FrozenSet
+
+from .backends import NotModified, StorageError
+from .stats import StorageStats
+
+logger = logging.getLogger(__name__)
+
+# Error codes meaning "too many requests": retried, and every caller slows down
+THROTTLING_CODES = frozenset({
+    "SlowDown", "Throttling", "ThrottlingException", "RequestLimitExceeded",
+    "TooManyRequests", "RequestThrottled", "ProvisionedThroughputExceededException", "429", "503",
+})
+# Error codes of failures that are likely to succeed on a second attempt
+TRANSIENT_CODES = frozenset({
+    "RequestTimeout", "RequestTimeTooSkewed", "InternalError", "ServiceUnavailable",
+    "ConnectionError", "500", "502", "504",
+})
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry and backoff policy for storage requests.
+
+    Throttling and transient errors are retried with exponential backoff and full
+    jitter; any other error (missing key, access denied, ...) fails immediately.
+    Throttling also raises a delay shared by all callers of the policy, which is
+    applied before every request and decays again as requests succeed, so batch
+    jobs slow down as a whole instead of dropping objects.
+    """
+
+    max_attempts: int = 5
+    base_delay: float = 0.1
+    max_delay: float = 20.0
+    # Upper bound and decay factor of the delay shared by all callers
+    max_shared_delay: float = 5.0
+    shared_delay_decay: float = 0.9
+    throttling_codes: FrozenSet[str] = THROTTLING_CODES
+    transient_codes: FrozenSet[str] = TRANSIENT_CODES
+    _shared_delay: float = field(default=0.0, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Create a policy from STORAGE_MAX_ATTEMPTS, STORAGE_BASE_DELAY and STORAGE_MAX_DELAY."""
+        return cls(
+            max_attempts=int(os.environ.get("STORAGE_MAX_ATTEMPTS", cls.max_attempts)),
+            base_delay=float(os.environ.get("STORAGE_BASE_DELAY", cls.base_delay)),
+            max_delay=float(os.environ.get("STORAGE_MAX_DELAY", cls.max_delay)),
+        )
+
+    def is_throttling(self, code: str) -> bool:
+        return code in self.throttling_codes
+
+    def is_retryable(self, code: str) -> bool:
+        return code in self.throttling_codes or code in self.transient_codes
+
+    def backoff(self, attempt: int) -> float:
+        """Return the delay before retry number attempt (1-based), with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    @property
+    def shared_delay(self) -> float:
+        return self._shared_delay
+
+    def on_throttled(self):
+        with self._lock:
+            self._shared_delay = min(self.max_shared_delay, max(self.base_delay, self._shared_delay * 2))
+
+    def on_success(self):
+        if self._shared_delay:
+            with self._lock:
+                self._shared_delay *= self.shared_delay_decay
+                if self._shared_delay < self.base_delay / 100:
+                    self._shared_delay = 0.0
+
+    def call(self, stats: StorageStats, operation: str, func: Callable, *args, **kwargs):
+        """
+        Call a backend method with retries, recording each attempt in stats.
+
+        Raises:
+            StorageError: The last error once it is permanent or attempts are exhausted
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self._shared_delay:
+                time.sleep(self._shared_delay)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except NotModified:
+                stats.record(operation, time.perf_counter() - start)
+                self.on_success()
+                raise
+            except StorageError as e:
+                stats.record(operation, time.perf_counter() - start, error_code=e.code or "unknown")
+                throttled = self.is_throttling(e.code)
+                if throttled:
+                    self.on_throttled()
+                if attempt >= self.max_attempts or not self.is_retryable(e.code):
+                    raise
+                delay = self.backoff(attempt)
+                stats.add_retry(operation, throttled)
+                logger.warning(
+                    f"Storage {operation} failed with {e.code} (attempt {attempt}/{self.max_attempts}), "
+                    f"retrying in {delay:.2f}s"
+                )
+                time.sleep(delay)
+                continue
+            stats.record(operation, time.perf_counter() - start)
+            self.on_success()
+            return result
@@ -0,0 +1,100 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+# Upper bounds of the latency buckets in milliseconds, doubling from 0.25 ms to ~65 s
+BUCKET_BOUNDS_MS = [0.25 * 2 ** i for i in range(19)]
+
+
+class LatencyHistogram:
+    """Fixed log-scale latency histogram with O(1) memory per operation."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, milliseconds: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total_ms += milliseconds
+        self.max_ms = max(self.max_ms, milliseconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Estimate a percentile as the upper bound of the bucket holding it, capped at the maximum."""
+        if not self.count:
+            return None
+        threshold = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= threshold:
+                return min(BUCKET_BOUNDS_MS[index], self.max_ms) if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms if self.count else None,
+            "buckets_ms": {
+                (f"<={bound:g}" if index < len(BUCKET_BOUNDS_MS) else f">{BUCKET_BOUNDS_MS[-1]:g}"): bucket_count
+                for index, (bound, bucket_count) in enumerate(
+                    zip(BUCKET_BOUNDS_MS + [float("inf")], self.counts)
+                )
+                if bucket_count
+            },
+        }
+
+
+class StorageStats:
+    """Thread-safe per-operation latency histograms and byte, error and retry counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+            self._bytes: Dict[str, int] = defaultdict(int)
+            self._errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+            self._retries: Dict[str, int] = defaultdict(int)
+            self._throttled: Dict[str, int] = defaultdict(int)
+
+    def record(self, operation: str, seconds: float, error_code: Optional[str] = None):
+        """Record the duration of one request, and its error code if it failed."""
+        with self._lock:
+            self._latency[operation].record(seconds * 1000.0)
+            if error_code is not None:
+                self._errors[operation][error_code] += 1
+
+    def add_bytes(self, operation: str, count: int):
+        with self._lock:
+            self._bytes[operation] += count
+
+    def add_retry(self, operation: str, throttled: bool):
+        with self._lock:
+            self._retries[operation] += 1
+            if throttled:
+                self._throttled[operation] += 1
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable copy of all counters, by operation."""
+        with self._lock:
+            operations = set(self._latency) | set(self._bytes) | set(self._errors)
+            return {
+                operation: {
+                    "latency": self._latency[operation].snapshot(),
+                    "bytes": self._bytes.get(operation, 0),
+                    "errors": dict(self._errors.get(operation, {})),
+                    "retries": self._retries.get(operation, 0),
+                    "throttled": self._throttled.get(operation, 0),
+                }
+                for operation in sorted(operations)
+            }
@@ -0,0 +1,218 @@
+import os
+import io
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# S3 rejects multipart parts smaller than 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+# Suffix of the temporary files of atomic writes, which listings skip
+TMP_SUFFIX = ".swisshacks-tmp"
+
+
+def _direct_request(operation: str, func: Callable, *args, **kwargs) -> Any:
+    """Run a storage request once, without retries or statistics."""
+    return func(*args, **kwargs)
+
+
+class StreamReader(io.RawIOBase):
+    """
+    Read-only file-like view over a stream of bytes, limited to a number of bytes.
+
+    Wraps anything with a read(size) method (an S3 StreamingBody, an open file, ...)
+    so callers can use readinto(), iteration over chunks or io.BufferedReader on top.
+    """
+
+    def __init__(self, raw, length: Optional[int] = None, close: Optional[Callable[[], None]] = None):
+        super().__init__()
+        self._raw = raw
+        self._remaining = length
+        self._close = close or getattr(raw, "close", None)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = len(buffer)
+        if self._remaining is not None:
+            size = min(size, self._remaining)
+        if size <= 0:
+            return 0
+        data = self._raw.read(size)
+        buffer[:len(data)] = data
+        if self._remaining is not None:
+            self._remaining -= len(data)
+        return len(data)
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024):
+        """Yield the remaining content in chunks of at most chunk_size bytes."""
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        if not self.closed and self._close is not None:
+            self._close()
+        super().close()
+
+
+class ChunkedWriter(io.RawIOBase, ABC):
+    """
+    Write-only file-like object that uploads its content in parts.
+
+    Data is buffered until part_size bytes are available, then handed to upload_part.
+    Nothing becomes visible in storage before close(); leaving a `with` block with an
+    exception aborts the upload instead.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        # io's C base classes skip the abstract method check of ABC
+        if cls.__abstractmethods__:
+            raise TypeError(f"Can't instantiate abstract class {cls.__name__} "
+                            f"with abstract methods {', '.join(sorted(cls.__abstractmethods__))}")
+        return super().__new__(cls)
+
+    def __init__(self, part_size: int):
+        super().__init__()
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.etag: Optional[str] = None
+        self.bytes_written = 0
+        # Called with the writer once the object has been published
+        self.on_complete: Optional[Callable[["ChunkedWriter"], None]] = None
+        # Runs each request as request(operation, func, *args, **kwargs); storage.open_writer
+        # sets it to storage's retry policy and statistics
+        self.request: Callable[..., Any] = _direct_request
+        self._buffer = bytearray()
+        self._aborted = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to closed writer")
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            self._upload_part(part)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            try:
+                if not self._aborted:
+                    self.etag = self._complete(bytes(self._buffer))
+                    if self.on_complete is not None:
+                        self.on_complete(self)
+            finally:
+                self._buffer = bytearray()
+                super().close()
+
+    def abort(self):
+        """Discard everything written so far."""
+        if not self.closed and not self._aborted:
+            self._aborted = True
+            self._abort()
+        self.close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    @abstractmethod
+    def _upload_part(self, data: bytes):
+        """Upload one full part."""
+
+    @abstractmethod
+    def _complete(self, remaining: bytes) -> Optional[str]:
+        """Upload the remaining data, publish the object and return its ETag."""
+
+    @abstractmethod
+    def _abort(self):
+        """Discard the parts uploaded so far."""
+
+
+class S3MultipartWriter(ChunkedWriter):
+    """Chunked writer backed by an S3 multipart upload, started on the first full part."""
+
+    def __init__(self, backend, key: str, part_size: int):
+        super().__init__(part_size)
+        self._backend = backend
+        self._key = key
+        self._upload_id = None
+        self._parts = []
+
+    def _upload_part(self, data: bytes):
+        if self._upload_id is None:
+            self._upload_id = self.request(
+                "multipart_create", self._backend._call, "create_multipart_upload", Key=self._key
+            )["UploadId"]
+        part_number = len(self._parts) + 1
+        # Uploading a part number again replaces it, so retried parts are safe
+        response = self.request(
+            "multipart_part", self._backend._call, "upload_part",
+            Key=self._key, UploadId=self._upload_id, PartNumber=part_number, Body=data,
+        )
+        self._parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+
+    def _complete(self, remaining: bytes) -> Optional[str]:
+        if self._upload_id is None:
+            # Small objects are stored with a single request
+            return self.request("put", self._backend.put, self._key, remaining)
+        try:
+            if remaining:
+                self._upload_part(remaining)
+            response = self.request(
+                "multipart_complete", self._backend._call, "complete_multipart_upload",
+                Key=self._key, UploadId=self._upload_id, MultipartUpload={"Parts": self._parts},
+            )
+        except Exception:
+            self._abort()
+            raise
+        return response.get("ETag")
+
+    def _abort(self):
+        if self._upload_id is not None:
+            try:
+                self.request(
+                    "multipart_abort", self._backend._call, "abort_multipart_upload",
+                    Key=self._key, UploadId=self._upload_id,
+                )
+            except Exception as e:
+                logger.warning(f"Could not abort multipart upload of {self._key}: {e}")
+
+
+class FileWriter(ChunkedWriter):
+    """Chunked writer that streams to a temporary file and renames it into place on close."""
+
+    def __init__(self, path: str, part_size: int):
+        super().__init__(part_size)
+        self._path = path
+        self._tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}{TMP_SUFFIX}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._handle = open(self._tmp_path, "wb")
+
+    def _upload_part(self, data: bytes):
+        self._handle.write(data)
+
+    def _complete(self, remaining: bytes) -> Optional[str]:
+        self._handle.write(remaining)
+        self._handle.close()
+        os.replace(self._tmp_path, self._path)
+        return None
+
+    def _abort(self):
+        self._handle.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
@@ -1,8 +1,18 @@
+import io
 import os
+import json
+import time
 import random
+import hashlib
+import threading
+import collections
+import concurrent.futures
 from pathlib import Path
 from dotenv import load_dotenv
 
+from evaluation import Evaluator
+from packed_dataset import PackedDataset
+
 PROJECT_ROOT = Path(__file__).parent.parent.absolute()
 
 # Load .env file from project root
@@ -12,18 +22,107 @@ import storage
 
 
 FOLDER = f"{os.path.dirname(__file__)}/../train/"
+# Local record of the synced files, used to only transfer changed or missing files
+SYNC_MANIFEST = os.path.join(FOLDER, ".sync_manifest.json")
+# Save the sync manifest at least this often (seconds), so interrupted runs resume
+SYNC_SAVE_INTERVAL = 10.0
 
 random.seed(42)  # Set seed for reproducibility
 
+# Passport parsers are expensive to build (OCR models), so each worker thread keeps its own
+_worker_state = threading.local()
+
+
+def _get_passport_parser(passport_backend: str):
+    from data_parsing.client_passport_parser import ClientPassportParser, PassportBackendType
+
+    parsers = getattr(_worker_state, "passport_parsers", None)
+    if parsers is None:
+        parsers = _worker_state.passport_parsers = {}
+    if passport_backend not in parsers:
+        parsers[passport_backend] = ClientPassportParser(PassportBackendType(passport_backend))
+    return parsers[passport_backend]
+
+
+def load_client(path: str, passport_backend: str = "easyocr", packed: PackedDataset | None = None):
+    """
+    Parse the four documents of a client folder into a ClientData object.
+    Args:
+        path: Client folder, as yielded by TrainIterator
+        passport_backend: PassportBackendType value used to parse passport.png
+        packed: Packed copy of the train folder to read the documents from
+    Returns:
+        ClientData labelled from the folder it was loaded from
+    """
+    from client_data.client_data import ClientData
+    from data_parsing.client_account_parser import ClientAccountParser
+    from data_parsing.client_description_parser import ClientDescriptionParser
+    from data_parsing.client_profile_parser import ClientProfileParser
+
+    path_parts = path.replace('\\', '/').split('/')
+    passport_parser = _get_passport_parser(passport_backend)
+    if packed is not None:
+        # Documents are read through views of the mapped shards, without copying them
+        client = "/".join(path_parts[-3:])
+        account_form = ClientAccountParser.extract_client_data_from_pdf(packed.open(f"{client}/account.pdf"))
+        client_profile = ClientProfileParser.parse(packed.open(f"{client}/profile.docx"))
+        # Decoded like open(..., encoding="utf-8") would, newlines included
+        description = io.TextIOWrapper(packed.open(f"{client}/description.txt"), encoding="utf-8").read()
+        client_description = ClientDescriptionParser.parse_text(description)
+        passport = passport_parser.parse_file(packed.open(f"{client}/passport.png"))
+    else:
+        account_form = ClientAccountParser.parse(Path(path, "account.pdf"))
+        client_profile = ClientProfileParser.parse(os.path.join(path, "profile.docx"))
+        client_description = ClientDescriptionParser.parse(Path(path, "description.txt"))
+        passport = passport_parser.parse(Path(path, "passport.png"))
+    return ClientData(
+        client_file=path,
+        account_form=account_form,
+        client_description=client_description,
+        client_profile=client_profile,
+        passport=passport,
+        label=int(path_parts[-3]),
+    )
+
 
 class TrainIterator:
+    """
+    Iterate over the client folders of the train set in a fixed random order.
+
+    By default the folder paths are yielded. With prefetch > 0, the next prefetch
+    folders are parsed ahead of time on a pool of parse_workers threads (or processes
+    with use_processes=True) and ready ClientData objects are yielded instead, in the
+    same order. A client that fails to parse is yielded as None, so predict() still
+    has to be called once per item.
+
+    With shard_count > 1 only the clients whose id is shard_index modulo shard_count
+    are iterated (limit then applies per shard), so several processes or hosts can
+    split an evaluation into disjoint, stable partitions. Each shard stores its
+    results with save_predictions() and merge_predictions() combines them.
 
-    def __init__(self, limit=None, minkey=None, maxkey=None):
-        self.paths = [os.path.join(FOLDER, x, "0", y) \
-                        for x in "01" for y in os.listdir(os.path.join(FOLDER, x, "0")) \
+    With a packed dataset (see packed_dataset.py) the clients are listed from its
+    index instead of the train folder, and prefetching reads documents from it.
+    """
+
+    def __init__(self, limit=None, minkey=None, maxkey=None, prefetch=0, parse_workers=4,
+                 use_processes=False, passport_backend="easyocr", shard_index=0, shard_count=1, seed=42,
+                 packed: PackedDataset | None = None):
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f"shard_index must be in [0, {shard_count}), got {shard_index}")
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.packed = packed
+        if packed is not None:
+            clients = [client.split("/") for client in packed.clients()]
+        else:
+            clients = [(x, "0", y) for x in "01" for y in os.listdir(os.path.join(FOLDER, x, "0"))]
+        # Sorted before shuffling, so the order does not depend on the filesystem
+        self.paths = sorted(os.path.join(FOLDER, x, level, y) \
+                        for x, level, y in clients \
                         if (maxkey is None or int(y) < maxkey)
-                        and (minkey is None or int(y) >= minkey)]
-        random.shuffle(self.paths)
+                        and (minkey is None or int(y) >= minkey)
+                        and int(y) % shard_count == shard_index)
+        random.Random(seed).shuffle(self.paths)
         self.current_index = 0
         self.predictions = []
         self.accuracy = None
@@ -31,21 +130,77 @@ class TrainIterator:
         self.false_positives = []
         if limit is not None:
             self.paths = self.paths[:limit]
+        self.evaluator = Evaluator(self.paths)
+        self.prefetch = prefetch
+        self.parse_workers = parse_workers
+        self.use_processes = use_processes
+        self.passport_backend = getattr(passport_backend, "value", passport_backend)
+        self._executor = None
+        self._pending = collections.deque()
+        self._submitted = 0
 
     def __iter__(self):
         if self.accuracy is not None:
             raise ValueError("Iterator has already been evaluated.")
+        if self.prefetch > 0 and self._executor is None:
+            pool = (concurrent.futures.ProcessPoolExecutor if self.use_processes
+                    else concurrent.futures.ThreadPoolExecutor)
+            self._executor = pool(max_workers=self.parse_workers)
+            self._submitted = self.current_index
+            self._fill_prefetch()
         return self
 
     def __next__(self):
         if self.current_index < len(self.paths):
             item = self.paths[self.current_index]
+            if self._executor is not None:
+                item = self._next_client(item)
             self.current_index += 1
             return item
         else:
+            self.close()
             print(self)
             raise StopIteration
 
+    def _fill_prefetch(self):
+        while self._submitted < len(self.paths) and len(self._pending) < self.prefetch:
+            path = self.paths[self._submitted]
+            self._pending.append(self._executor.submit(load_client, path, self.passport_backend, self.packed))
+            self._submitted += 1
+
+    def _next_client(self, path):
+        future = self._pending.popleft()
+        self._fill_prefetch()
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Failed to parse {path}: {e}")
+            return None
+
+    def close(self):
+        """Stop the prefetch pool, discarding clients that were parsed ahead."""
+        if self._executor is not None:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def save_predictions(self, file_path: str):
+        """
+        Save the predictions made so far to a JSON file, with paths relative to the
+        train folder so files written on different machines can be merged.
+        """
+        with open(file_path, "w", encoding="utf-8") as handle:
+            json.dump({
+                "shard_index": self.shard_index,
+                "shard_count": self.shard_count,
+                "predictions": [
+                    {"path": os.path.relpath(path, FOLDER).replace(os.sep, "/"), "prediction": prediction}
+                    for path, prediction in zip(self.paths, self.predictions)
+                ],
+            }, handle, indent=1)
+
     def predict(self, prediction: bool):
         """
         Store the prediction for the current item.
@@ -56,22 +211,29 @@ class TrainIterator:
         if len(self.predictions) >= self.current_index:
             raise ValueError("Prediction already stored.")
         self.predictions.append(prediction)
+        self.evaluator.add(prediction)
 
     def __str__(self):
-        self.accuracy, self.false_positives, self.false_negatives = \
-            evaluate_predictions(self.paths[:len(self.predictions)], self.predictions)
+        if not self.predictions:
+            return "No predictions to evaluate"
+        self.accuracy = self.evaluator.accuracy
+        self.false_positives = self.evaluator.false_positives
+        self.false_negatives = self.evaluator.false_negatives
         return f"Accuracy is {round(100*self.accuracy, 1):.1f}%"
 
 
-def load_files(directory: str) -> dict:
+def load_files(directory: str, packed: PackedDataset | None = None) -> dict:
     """
-    Load files from the specified folder and return a dict of file paths.
+    Load the files of a client folder and return a dict of their content by file name.
+    With a packed dataset, zero-copy memoryviews of the packed documents are returned.
     """
+    if packed is not None:
+        client = "/".join(directory.replace('\\', '/').rstrip('/').split('/')[-3:])
+        return packed.load_client(client)
     files = {}
-    for filenames in os.listdir(directory):
-        for filename in filenames:
-            with open(os.path.join(directory, filename), 'rb') as file:
-                files[filename] = file.read()
+    for filename in os.listdir(directory):
+        with open(os.path.join(directory, filename), 'rb') as file:
+            files[filename] = file.read()
     return files
 
 
@@ -84,84 +246,235 @@ def evaluate_predictions(paths: list[str], predictions: list[bool]) -> tuple[flo
             - List of false positive paths.
             - List of false negative paths.
     """
-    if len(paths) != len(predictions):
-        raise ValueError(f"Groundtruth and predictions must have the same length: {len(paths)} vs {len(predictions)}")
-
-    false_negatives = []
-    false_positives = []
-    true_count = 0
-    for path, prediction in zip(paths, predictions):
-        # Split on either \ or / depending on the path format
-        path_parts = path.replace('\\', '/').split('/')
-        gt = {"0": False, "1": True}[path_parts[-3]]
-        if gt == prediction:
-            true_count += 1
-        else:
-            if gt:
-                false_negatives.append(path)
-            else:
-                false_positives.append(path)
-    return true_count / len(predictions), false_positives, false_negatives
+    evaluator = Evaluator.from_predictions(paths, predictions)
+    return evaluator.accuracy, evaluator.false_positives, evaluator.false_negatives
 
 
-def upload_dataset(prefix="train/"):
+def merge_predictions(files: list[str]) -> tuple[float, list[str], list[str]]:
     """
-    Upload the dataset to S3, recursively traversing all subdirectories.
+    Merge the prediction files of several TrainIterator shards and evaluate them.
+    Args:
+        files: Files written by TrainIterator.save_predictions
+    Returns:
+        Tuple containing the accuracy, the false positive and the false negative paths
     """
-    uploaded_files = 0
-    for root, dirs, files in os.walk(FOLDER):
-        for file in files:
-            file_path = os.path.join(root, file)
-            relative_path = os.path.relpath(file_path, FOLDER)
-
-            # Read and upload file using the storage module
-            with open(file_path, 'rb') as handle:
-                storage.store_object(handle.read(), f"{prefix}{relative_path}")
+    merged = {}
+    shards = {}
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as handle:
+            content = json.load(handle)
+        shards.setdefault(content["shard_count"], set()).add(content["shard_index"])
+        for item in content["predictions"]:
+            if item["path"] in merged:
+                raise ValueError(f"{item['path']} is predicted in more than one file")
+            merged[item["path"]] = item["prediction"]
+    if len(shards) > 1:
+        raise ValueError(f"Prediction files come from different shard counts: {sorted(shards)}")
+    for shard_count, indices in shards.items():
+        missing = sorted(set(range(shard_count)) - indices)
+        if missing:
+            print(f"Warning: no predictions for shards {missing} of {shard_count}")
+    paths = sorted(merged)
+    accuracy, false_positives, false_negatives = evaluate_predictions(paths, [merged[path] for path in paths])
+    print(f"Accuracy over {len(paths)} clients is {round(100*accuracy, 1):.1f}%")
+    return accuracy, false_positives, false_negatives
+
+
+def load_sync_manifest() -> dict:
+    """
+    Load the local sync manifest, mapping relative paths to the size, ETag and
+    mtime (in ns) a file had when it was last transferred.
+    """
+    try:
+        with open(SYNC_MANIFEST, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_sync_manifest(manifest: dict):
+    """Atomically write the local sync manifest."""
+    os.makedirs(os.path.dirname(SYNC_MANIFEST), exist_ok=True)
+    tmp_path = f"{SYNC_MANIFEST}{storage.TMP_SUFFIX}"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+    os.replace(tmp_path, SYNC_MANIFEST)
+
+
+def _file_md5(path: str) -> str:
+    """Compute the MD5 hex digest of a file in constant memory."""
+    digest = hashlib.md5()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_synced(local_path: str, entry, remote: dict) -> bool:
+    """Return True if the local file is known to match the remote object."""
+    try:
+        stat = os.stat(local_path)
+    except OSError:
+        return False
+    if stat.st_size != remote["size"]:
+        return False
+    if entry is not None:
+        return (entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns
+                and entry["etag"] == remote["etag"])
+    # No record of this file (e.g. downloaded before the manifest existed): compare content
+    expected_md5 = storage.etag_md5(remote["etag"])
+    return expected_md5 is not None and _file_md5(local_path) == expected_md5
+
+
+class _Progress:
+    """Transfer counter printing files and bytes per second."""
+
+    def __init__(self, verb: str, total: int):
+        self.verb = verb
+        self.total = total
+        self.files = 0
+        self.bytes = 0
+        self.start = time.perf_counter()
+
+    def update(self, size: int):
+        self.files += 1
+        self.bytes += size
+        if self.files % 100 == 0:
+            print(self)
 
-            uploaded_files += 1
-            if uploaded_files % 100 == 0:
-                print(f"Uploaded {uploaded_files} files to storage")
+    def __str__(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return (f"{self.verb} {self.files}/{self.total} files, {self.bytes / 1e6:.1f} MB "
+                f"({self.bytes / 1e6 / elapsed:.2f} MB/s)")
 
-    print(f"Uploaded {uploaded_files} files to storage")
-    return uploaded_files
 
+def _run_sync(transfer, tasks: list, manifest: dict, progress: _Progress, max_workers: int) -> int:
+    """
+    Run transfer(task) for every task on a thread pool. Each transfer returns
+    (relative_path, manifest_entry) or None on failure; a transfer that raises counts
+    as a failure too, so one bad file does not abort the run. The sync manifest is saved
+    periodically so an interrupted run resumes where it stopped.
+    """
+    failures = 0
+    last_save = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(transfer, task) for task in tasks]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Transfer failed: {e!r}")
+                    result = None
+                if result is None:
+                    failures += 1
+                    continue
+                relative_path, entry = result
+                manifest[relative_path] = entry
+                progress.update(entry["size"])
+                if time.monotonic() - last_save > SYNC_SAVE_INTERVAL:
+                    save_sync_manifest(manifest)
+                    last_save = time.monotonic()
+        finally:
+            for future in futures:
+                future.cancel()
+            save_sync_manifest(manifest)
+    return failures
+
+
+def upload_dataset(prefix="train/", max_workers=16):
+    """
+    Upload the dataset to S3, recursively traversing all subdirectories.
+    Only files that are missing remotely or changed since the last sync are uploaded.
+    Args:
+        prefix: Storage prefix to upload to (default: 'train/')
+        max_workers: Number of parallel uploads
+    Returns:
+        Number of files in the dataset
+    """
+    manifest = load_sync_manifest()
+    remote_manifest = storage.load_manifest(prefix)
+    remote = {info["key"]: info for info in storage.list_objects_info(prefix)}
 
-def download_dataset(prefix="train/"):
+    tasks = []
+    dataset_files = 0
+    for root, dirs, files in os.walk(FOLDER):
+        for file in files:
+            file_path = os.path.join(root, file)
+            if file_path == SYNC_MANIFEST or file.endswith(storage.TMP_SUFFIX):
+                continue
+            relative_path = os.path.relpath(file_path, FOLDER).replace(os.sep, "/")
+            dataset_files += 1
+            remote_info = remote.get(f"{prefix}{relative_path}")
+            if remote_info is None or not _is_synced(file_path, manifest.get(relative_path), remote_info):
+                tasks.append((file_path, relative_path))
+
+    print(f"Uploading {len(tasks)} of {dataset_files} files to storage")
+
+    def upload(task):
+        file_path, relative_path = task
+        stat = os.stat(file_path)
+        key = f"{prefix}{relative_path}"
+        if not storage.store_file(file_path, key):
+            return None
+        # The storage manifest recorded the ETag of the new object
+        etag = (remote_manifest.get(key) or {}).get("etag")
+        return relative_path, {"size": stat.st_size, "etag": etag, "mtime": stat.st_mtime_ns}
+
+    progress = _Progress("Uploaded", len(tasks))
+    failures = _run_sync(upload, tasks, manifest, progress, max_workers)
+    storage.flush_manifests()
+
+    print(progress)
+    if failures:
+        print(f"Failed to upload {failures} files, run again to retry them")
+    return dataset_files
+
+
+def download_dataset(prefix="train/", refresh_manifest=False, max_workers=16):
     """
     Download the dataset from S3, preserving directory structure.
+    Only files that are missing locally or changed since the last sync are downloaded.
+    Downloads are verified against the object size and MD5 ETag, and written
+    atomically, so an interrupted run never leaves truncated files behind.
     Args:
         prefix: Storage prefix where files were uploaded (default: 'train/')
+        refresh_manifest: Rebuild the prefix manifest with a full listing first, so
+            objects uploaded by other tools are downloaded too. By default the saved
+            manifest is used, which knows the writes made through storage, and only
+            built with a listing if it is missing
+        max_workers: Number of parallel downloads
     Returns:
-        Number of downloaded files
+        Number of files in the dataset
     """
-    downloaded_files = 0
+    manifest = load_sync_manifest()
     # Get list of all objects in storage with the given prefix
-    objects = storage.list_objects(prefix=prefix)
+    storage.load_manifest(prefix, refresh=refresh_manifest)
+    objects = storage.list_objects_info(prefix=prefix)
 
-    for obj_key in objects:
+    tasks = []
+    for info in objects:
         # Calculate the local path where the file should be saved
-        relative_path = obj_key[len(prefix):]  # Remove prefix to get relative path
+        relative_path = info["key"][len(prefix):]  # Remove prefix to get relative path
         local_path = os.path.join(FOLDER, relative_path)
-        downloaded_files += 1
-
-        if os.path.exists(local_path):
-            continue
-
-        # Create directory structure if it doesn't exist
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        if not _is_synced(local_path, manifest.get(relative_path), info):
+            tasks.append((info, relative_path, local_path))
 
-        # Download the file from storage
-        content = storage.read_object(obj_key)
+    print(f"Downloading {len(tasks)} of {len(objects)} files from storage")
 
-        # Save the file locally
-        with open(local_path, 'wb') as handle:
-            handle.write(content)
+    def download(task):
+        info, relative_path, local_path = task
+        if not storage.download_file(info["key"], local_path, size=info["size"], etag=info["etag"]):
+            return None
+        return relative_path, {"size": info["size"], "etag": info["etag"], "mtime": os.stat(local_path).st_mtime_ns}
 
-        if downloaded_files % 100 == 0:
-            print(f"Downloaded {downloaded_files} files from storage")
+    progress = _Progress("Downloaded", len(tasks))
+    failures = _run_sync(download, tasks, manifest, progress, max_workers)
 
-    print(f"Downloaded {downloaded_files} files from storage")
-    return downloaded_files
+    print(progress)
+    if failures:
+        print(f"Failed to download {failures} files, run again to retry them")
+    return len(objects)
 
 
 if __name__ == "__main__":
@@ -33,6 +33,8 @@ import matplotlib.pyplot as plt
 from openai import AzureOpenAI
 from huggingface_hub import InferenceClient
 
+from swisshacks.llm_limiter import chat_completion
+
 # Try to load environment variables from .env file
 try:
     from dotenv import load_dotenv
@@ -112,6 +114,8 @@ class GPT4oTaskPredictor(TaskPredictor):
             api_key=self.api_key,
             api_version="2025-01-01-preview",
             azure_endpoint=self.endpoint,
+            # Throttling is retried by the shared limiter
+            max_retries=0,
         )
         
         self.prompt_generator = PromptGenerator(training_examples_context)
@@ -122,7 +126,8 @@ class GPT4oTaskPredictor(TaskPredictor):
             system_prompt = self.prompt_generator.create_system_prompt()
             user_prompt = self.prompt_generator.create_user_prompt(conversation)
             
-            response = self.client.chat.completions.create(
+            response = chat_completion(
+                self.client,
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": system_prompt},